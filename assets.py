@@ -0,0 +1,141 @@
+# assets.py
+# Ảnh của giao diện (ảnh bìa, ảnh profile, sơ đồ) được thu nhỏ + nén WebP 1 lần, không base64 ảnh gốc mỗi rerun.
+# - Ảnh bìa: rộng tối đa HERO_MAX_WIDTH, chỉ giữ dải giữa đủ phủ khung 300px (background-size: cover);
+#   ảnh profile: cắt giữa 100x100 (object-fit: cover); sơ đồ: rộng tối đa DIAGRAM_MAX_WIDTH.
+# - File đã tối ưu ghi vào ./static (tạo lại khi ảnh gốc đổi). Bật server.enableStaticServing thì HTML chỉ chứa
+#   URL app/static/... (trình duyệt cache được); không bật thì dùng data URI của bản WebP nhỏ, giữ trong process.
+# - payload_report(): số byte ảnh gửi qua websocket mỗi rerun, trước / sau.
+import base64
+import io
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # không có Pillow -> dùng nguyên ảnh gốc
+    Image = None
+    ImageOps = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"
+WEBP_QUALITY = 80
+
+HERO_HEIGHT = 300  # chiều cao .cover-header
+HERO_MIN_BOX_WIDTH = 400  # khung hẹp nhất vẫn giữ đúng phần ảnh hiển thị như ảnh gốc
+HERO_MAX_WIDTH = 1280
+PROFILE_SIZE = 100
+DIAGRAM_MAX_WIDTH = 1000
+
+# Ảnh dùng trên từng trang (để báo cáo payload mỗi rerun)
+PAGE_ASSETS = {
+    "Tổng quan": [("hero_bike.jpg", "hero"), ("profile_thanh.jpg", "profile"), ("profile_thinh.jpg", "profile")],
+    "Dự đoán giá": [("price_prediction.jpg", "hero")],
+    "Phát hiện bất thường": [("anomaly_detection.jpg", "hero")],
+}
+
+_cache = {}  # (đường dẫn, kiểu, mtime, size) -> Asset
+_lock = threading.Lock()
+
+
+class Asset:
+    def __init__(self, path, data, mime, static_name=None):
+        self.path = path
+        self.data = data
+        self.mime = mime
+        self.static_name = static_name
+        self._data_uri = None
+
+    @property
+    def data_uri(self):
+        if self._data_uri is None:
+            self._data_uri = f"data:{self.mime};base64,{base64.b64encode(self.data).decode()}"
+        return self._data_uri
+
+    def src(self, static_serving=False):
+        # URL tĩnh nếu server phục vụ được ./static, ngược lại data URI (đã cache)
+        if static_serving and self.static_name is not None:
+            return f"{STATIC_URL}/{self.static_name}"
+        return self.data_uri
+
+
+def _resize(img, kind):
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    w, h = img.size
+    if kind == "profile":
+        return ImageOps.fit(img, (PROFILE_SIZE, PROFILE_SIZE), method=Image.LANCZOS)
+    if kind == "hero":
+        target_w = min(w, HERO_MAX_WIDTH)
+        target_h = round(h * target_w / w)
+        img = img.resize((target_w, target_h), Image.LANCZOS) if target_w != w else img
+        band = min(target_h, round(target_w * HERO_HEIGHT / HERO_MIN_BOX_WIDTH))
+        top = (target_h - band) // 2
+        return img.crop((0, top, target_w, top + band))
+    if w > DIAGRAM_MAX_WIDTH:
+        return img.resize((DIAGRAM_MAX_WIDTH, round(h * DIAGRAM_MAX_WIDTH / w)), Image.LANCZOS)
+    return img
+
+
+def _write_static(name, data):
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        path = os.path.join(STATIC_DIR, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return name
+    except OSError:
+        return None  # thư mục chỉ đọc -> chỉ dùng data URI
+
+
+def _build(path, kind):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if Image is None:
+        return Asset(path, raw, "image/jpeg")
+    try:
+        buf = io.BytesIO()
+        _resize(Image.open(io.BytesIO(raw)), kind).save(buf, format="WEBP", quality=WEBP_QUALITY, method=6)
+    except Exception:
+        return Asset(path, raw, "image/jpeg")
+    data = buf.getvalue()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return Asset(path, data, "image/webp", _write_static(f"{stem}-{kind}.webp", data))
+
+
+def get_asset(path, kind="diagram"):
+    # None nếu không có file ảnh (trang sẽ hiện placeholder)
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), kind, st_.st_mtime_ns, st_.st_size)
+    asset = _cache.get(key)
+    if asset is None:
+        with _lock:
+            asset = _cache.get(key)
+            if asset is None:
+                asset = _build(path, kind)
+                for k in [k for k in _cache if k[:2] == key[:2]]:
+                    del _cache[k]
+                _cache[key] = asset
+    return asset
+
+
+def asset_src(path, kind, static_serving=False):
+    asset = get_asset(path, kind)
+    return asset.src(static_serving) if asset is not None else None
+
+
+def payload_report(static_serving=False):
+    # {trang: (byte trước - data URI ảnh gốc, byte sau)} cho phần ảnh nhúng trong HTML mỗi rerun
+    report = {}
+    for page, items in PAGE_ASSETS.items():
+        before = after = 0
+        for path, kind in items:
+            if not os.path.exists(path):
+                continue
+            before += len("data:image/jpeg;base64,") + 4 * -(-os.path.getsize(path) // 3)
+            after += len(asset_src(path, kind, static_serving))
+        report[page] = (before, after)
+    return report
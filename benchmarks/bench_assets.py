@@ -0,0 +1,46 @@
+# benchmarks/bench_assets.py
+# Số byte ảnh nhúng trong HTML gửi xuống trình duyệt mỗi rerun, theo trang:
+# trước (data URI của JPEG gốc) / sau (data URI WebP đã thu nhỏ) / sau + enableStaticServing (chỉ còn URL),
+# và thời gian lấy src ảnh mỗi rerun (lần đầu tạo WebP, các lần sau lấy từ cache process).
+# Chạy (từ thư mục gốc repo): python benchmarks/bench_assets.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import assets  # noqa: E402
+
+REPEAT = 100
+
+
+def main():
+    os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+    t0 = time.perf_counter()
+    inline = assets.payload_report(static_serving=False)
+    first_ms = (time.perf_counter() - t0) * 1000
+    static = assets.payload_report(static_serving=True)
+
+    print(f"{'Trang':<24}{'JPEG base64':>14}{'WebP base64':>14}{'URL tĩnh':>12}")
+    for page, (before, after) in inline.items():
+        print(f"{page:<24}{before:>14,}{after:>14,}{static[page][1]:>12,}")
+    total_before = sum(b for b, _ in inline.values())
+    total_after = sum(a for _, a in inline.values())
+    print(f"{'Tổng':<24}{total_before:>14,}{total_after:>14,}{sum(a for _, a in static.values()):>12,}"
+          f"   (giảm {1 - total_after / total_before:.1%} không cần static serving)")
+
+    for path, kind in [(p, k) for items in assets.PAGE_ASSETS.values() for p, k in items] + [
+            ("ml_pipeline.jpg", "diagram"), ("mechanical_bg.jpg", "diagram")]:
+        asset = assets.get_asset(path, kind)
+        if asset is not None:
+            print(f"  {path:<24}{kind:<9}{os.path.getsize(path):>10,} B -> {len(asset.data):>8,} B {asset.mime}")
+
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        assets.payload_report(static_serving=False)
+    print(f"Tạo src lần đầu: {first_ms:,.1f} ms · mỗi rerun sau đó: "
+          f"{(time.perf_counter() - t0) * 1000 / REPEAT:,.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
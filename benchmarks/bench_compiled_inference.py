@@ -0,0 +1,69 @@
+# benchmarks/bench_compiled_inference.py
+# Kiểm tra compiled_gbr khớp model.predict trên TOÀN BỘ dataset, rồi đo latency p50/p99
+# cho 1 dòng và 100k dòng (sklearn pipeline vs compiled).
+# Chạy: python benchmarks/bench_compiled_inference.py
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+warnings.filterwarnings("ignore")
+
+import data_cache  # noqa: E402
+from compiled_gbr import compile_pipeline  # noqa: E402
+from preprocessing import preprocess_df_before_predict  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DATA_PATH = os.path.join(ROOT, "data_motobikes.xlsx")
+MODEL_PATH = os.path.join(ROOT, "car_price_gbr_pipeline.pkl")
+
+
+def percentiles(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1000
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+
+def main():
+    model = joblib.load(MODEL_PATH)
+    compiled = compile_pipeline(model)
+    df = preprocess_df_before_predict(data_cache.load_dataset(DATA_PATH))
+    X = df[compiled.input_cols]
+
+    # ---- Kiểm tra khớp kết quả trên toàn bộ dataset ----
+    expected = model.predict(X)
+    got = compiled.predict(X)
+    max_abs = float(np.max(np.abs(expected - got)))
+    rows = X.to_dict("records")
+    got_one = np.array([compiled.predict_one(r) for r in rows])
+    max_abs_one = float(np.max(np.abs(expected - got_one)))
+    print(f"Dataset {len(X):,} dòng: max |batch - sklearn| = {max_abs:.3g}, max |1-dòng - sklearn| = {max_abs_one:.3g}")
+    assert np.allclose(expected, got, rtol=1e-12, atol=1e-6)
+    assert np.allclose(expected, got_one, rtol=1e-12, atol=1e-6)
+
+    # ---- Latency ----
+    row_df = X.iloc[[0]]
+    row = rows[0]
+    big = X.iloc[np.random.default_rng(0).integers(0, len(X), 100_000)].reset_index(drop=True)
+    results = [
+        ("1 dòng   sklearn (DataFrame)", *percentiles(lambda: model.predict(row_df), 500)),
+        ("1 dòng   compiled predict_one", *percentiles(lambda: compiled.predict_one(row), 500)),
+        ("100k dòng sklearn", *percentiles(lambda: model.predict(big), 5)),
+        ("100k dòng compiled", *percentiles(lambda: compiled.predict(big), 5)),
+    ]
+    print(f"{'Trường hợp':<32}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for name, p50, p99 in results:
+        print(f"{name:<32}{p50:>12.3f}{p99:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_data_load.py
+# So sánh thời gian load data_motobikes.xlsx: openpyxl (cũ) vs cache Arrow (mới).
+# Chạy: python benchmarks/bench_data_load.py
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_cache  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data_motobikes.xlsx")
+
+
+def timeit(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), sum(times) / len(times)
+
+
+def main():
+    data_cache.CACHE_DIR = tempfile.mkdtemp(prefix="motobike-cache-")
+    try:
+        rows = []
+        rows.append(("openpyxl (mỗi rerun cũ)", *timeit(lambda: data_cache.read_excel_raw(DATA_PATH), repeat=3)))
+
+        t0 = time.perf_counter()
+        data_cache.load_dataset_uncached(DATA_PATH)
+        build = time.perf_counter() - t0
+        rows.append(("cold: Excel -> .arrow (1 lần)", build, build))
+
+        rows.append(("warm đĩa: .arrow mmap", *timeit(lambda: data_cache.load_dataset_uncached(DATA_PATH))))
+
+        data_cache.clear_memory_cache()
+        data_cache.load_dataset(DATA_PATH)
+        rows.append(("warm process: memo", *timeit(lambda: data_cache.load_dataset(DATA_PATH), repeat=20)))
+
+        print(f"{'Kiểu load':<32}{'min (ms)':>12}{'mean (ms)':>12}")
+        for name, best, mean in rows:
+            print(f"{name:<32}{best * 1000:>12.2f}{mean * 1000:>12.2f}")
+    finally:
+        shutil.rmtree(data_cache.CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_eda.py
+# So sánh chi phí vẽ EDA trang "Tổng quan": sns.histplot(kde=True) x2 + corr() trên toàn bộ dữ liệu
+# với eda_cache (lần đầu tính đủ, rerun lấy từ memo, thêm dòng vào cuối thì cộng dồn).
+# Chạy: python benchmarks/bench_eda.py
+import os
+import sys
+import time
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+warnings.filterwarnings("ignore")
+
+import data_cache  # noqa: E402
+import eda_cache  # noqa: E402
+from preprocessing import cleaned_dataset  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SIZES = [7_208, 100_000, 1_000_000]
+
+
+def seaborn_eda(df):
+    df_eda = cleaned_dataset(df).dropna(subset=['Giá'])
+    df_eda = df_eda[df_eda['Giá'] > 0]
+    fig, ax = plt.subplots(1, 2)
+    sns.histplot(df_eda['Giá'], ax=ax[0], bins=50, kde=True)
+    sns.histplot(np.log1p(df_eda['Giá']), ax=ax[1], bins=50, kde=True)
+    plt.close(fig)
+    return cleaned_dataset(df).select_dtypes(include=np.number).dropna().corr()
+
+
+def cached_eda(df):
+    eda = eda_cache.eda_artifacts(df)
+    eda.price.kde_curve()
+    eda.log_price.kde_curve()
+    return eda.correlation()
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return (time.perf_counter() - t0) * 1000, out
+
+
+def main():
+    base = data_cache.load_dataset(os.path.join(ROOT, "data_motobikes.xlsx"))
+    print(f"{'dòng':>10}{'seaborn (ms)':>15}{'cache lần đầu':>16}{'rerun (memo)':>15}{'+1% dòng':>12}{'lệch corr':>12}")
+    for n in SIZES:
+        idx = np.random.default_rng(0).integers(0, len(base), n + n // 100)
+        grown = base.iloc[idx].reset_index(drop=True)
+        df = grown.iloc[:n].copy()
+        cleaned_dataset(df)
+        cleaned_dataset(grown)  # bỏ thời gian làm sạch (đã memo, dùng chung cả 2 cách)
+        eda_cache.clear_memo()
+        t_sns, ref = timed(seaborn_eda, df)
+        t_first, corr = timed(cached_eda, df)
+        t_memo, _ = timed(cached_eda, df)
+        t_append, _ = timed(cached_eda, grown)
+        diff = np.nanmax(np.abs(ref.to_numpy() - corr.to_numpy()))
+        print(f"{n:>10,}{t_sns:>15,.1f}{t_first:>16,.1f}{t_memo:>15,.2f}{t_append:>12,.1f}{diff:>12.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_ingest.py
+# Đọc file upload: pd.read_csv / pd.read_excel mặc định (18 cột, kiểu object) so với ingest.read_upload
+# (chỉ các cột cần, category / số nguyên gọn, pyarrow.csv đa luồng): thời gian parse và RAM của DataFrame.
+# Chạy: python benchmarks/bench_ingest.py
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_cache  # noqa: E402
+import ingest  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+CSV_SIZES = [7_208, 100_000, 500_000]
+XLSX_SIZES = [7_208]
+
+
+def default_read(data, fmt):
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(data))
+    return pd.read_excel(io.BytesIO(data), engine="openpyxl")
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return (time.perf_counter() - t0) * 1000, out
+
+
+def main():
+    base = data_cache.load_dataset(os.path.join(ROOT, "data_motobikes.xlsx"))
+    print(f"{'file':>6}{'dòng':>10}{'MB file':>9}{'mặc định (ms)':>15}{'RAM (MB)':>10}{'ingest (ms)':>13}{'RAM (MB)':>10}  engine")
+    for fmt, sizes in (("csv", CSV_SIZES), ("xlsx", XLSX_SIZES)):
+        for n in sizes:
+            df = base.iloc[np.random.default_rng(0).integers(0, len(base), n)].reset_index(drop=True)
+            buf = io.BytesIO()
+            if fmt == "csv":
+                df.to_csv(buf, index=False)
+            else:
+                df.to_excel(buf, index=False)
+            data = buf.getvalue()
+            t_default, raw = timed(default_read, data, fmt)
+            t_ingest, (typed, report) = timed(ingest.read_upload, data)
+            print(f"{fmt:>6}{n:>10,}{len(data) / 1e6:>9,.1f}{t_default:>15,.0f}{raw.memory_usage(deep=True).sum() / 1e6:>10,.1f}"
+                  f"{t_ingest:>13,.0f}{report.memory_bytes / 1e6:>10,.1f}  {report.engine}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_parallel_scan.py
+# Đo khả năng mở rộng của bước predict khi quét dataset lớn với 1/2/4/8 worker
+# (dataset mẫu được nhân bản lên N dòng), kèm kiểm tra kết quả giống hệt bản 1 worker.
+# Chạy: python benchmarks/bench_parallel_scan.py [số dòng]
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+warnings.filterwarnings("ignore")
+
+import data_cache  # noqa: E402
+import model_manager  # noqa: E402
+import scoring  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    os.chdir(ROOT)
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    base = data_cache.load_dataset("data_motobikes.xlsx")
+    df = base.iloc[np.random.default_rng(0).integers(0, len(base), n_rows)].reset_index(drop=True)
+    source = scoring.frame_chunks(df, len(df))
+    stats = scoring.compute_impute_stats(source)
+    X = scoring.clean_chunk(df, stats, add_price_min=False).drop(columns=["Giá"])
+
+    print(f"{n_rows:,} dòng, {os.cpu_count()} CPU, start method = {scoring.MP_START_METHOD}, "
+          f"engine = {'compiled' if state.compiled is not None else 'sklearn'}")
+    print(f"{'workers':>8}{'predict (s)':>14}{'speedup':>10}")
+    reference = None
+    base_time = None
+    for workers in WORKER_COUNTS:
+        scoring.parallel_predict(X.iloc[:scoring.MIN_SHARD_ROWS * workers], state, workers)  # khởi động pool
+        t0 = time.perf_counter()
+        pred = scoring.parallel_predict(X, state, workers)
+        elapsed = time.perf_counter() - t0
+        if reference is None:
+            reference, base_time = pred, elapsed
+        assert np.array_equal(reference, pred), "Kết quả song song khác bản 1 worker"
+        print(f"{workers:>8}{elapsed:>14.2f}{base_time / elapsed:>9.2f}x")
+    scoring.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_preprocess.py
+# So sánh preprocess_df_before_predict bản cũ (apply/lambda + copy toàn frame) với bản vectorized,
+# ở 7k / 100k / 1M dòng (nhân bản data_motobikes.xlsx), kèm kiểm tra kết quả giống hệt.
+# Chạy: python benchmarks/bench_preprocess.py
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_cache  # noqa: E402
+import preprocessing  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data_motobikes.xlsx")
+SIZES = [7_208, 100_000, 1_000_000]
+
+
+def legacy_preprocess(df_raw):
+    # Bản gốc trong demo_streamlit.py trước khi tách module
+    df = df_raw.copy()
+    if "Giá" in df.columns:
+        df["Giá"] = df["Giá"].astype(str).str.replace(r"[^0-9]", "", regex=True)
+        df["Giá"] = pd.to_numeric(df["Giá"], errors="coerce")
+    if "Năm đăng ký" in df.columns:
+        df["Năm đăng ký"] = df["Năm đăng ký"].astype(str).str.strip()
+        df["Năm đăng ký"] = df["Năm đăng ký"].apply(lambda x: 1980 if "trước" in x.lower() else x)
+        df["Năm đăng ký"] = pd.to_numeric(df["Năm đăng ký"], errors="coerce")
+        df["Năm đăng ký"] = df["Năm đăng ký"].fillna(1980)
+    if "Số Km đã đi" in df.columns:
+        df["Số Km đã đi"] = df["Số Km đã đi"].astype(str).str.replace(r"[^0-9]", "", regex=True)
+        df["Số Km đã đi"] = pd.to_numeric(df["Số Km đã đi"], errors="coerce")
+    return df
+
+
+def scale(df, n, seed=0):
+    idx = np.random.default_rng(seed).integers(0, len(df), size=n)
+    return df.iloc[idx].reset_index(drop=True)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    base = data_cache.read_excel_raw(DATA_PATH)
+    print(f"{'rows':>10}{'legacy (ms)':>14}{'vectorized (ms)':>18}{'fingerprint (ms)':>18}{'memo hit (ms)':>16}{'speedup':>10}")
+    for n in SIZES:
+        df = scale(base, n)
+        repeat = 3 if n <= 100_000 else 1
+        cols = ["Giá", "Năm đăng ký", "Số Km đã đi"]
+        pd.testing.assert_frame_equal(legacy_preprocess(df)[cols], preprocessing.preprocess_df_before_predict(df)[cols])
+
+        t_old = best_of(lambda: legacy_preprocess(df), repeat)
+        t_new = best_of(lambda: preprocessing.preprocess_df_before_predict(df), repeat)
+        t_fp = best_of(lambda: preprocessing._content_fingerprint(df), repeat)
+        preprocessing.clear_memo()
+        preprocessing.cleaned_dataset(df)
+        t_memo = best_of(lambda: preprocessing.cleaned_dataset(df), 5)
+        print(f"{n:>10,}{t_old * 1000:>14.1f}{t_new * 1000:>18.1f}{t_fp * 1000:>18.1f}{t_memo * 1000:>16.3f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_review_queue.py
+# Đo thời gian đọc 1 trang của hàng đợi duyệt (count + page có lọc / sắp xếp) khi số cảnh báo tăng 10k -> 1M:
+# lọc và phân trang chạy trong SQLite trên index, số dòng khớp chỉ đếm tới COUNT_CAP như UI
+# -> thời gian gần như không đổi theo kích thước hàng đợi.
+# Chạy: python benchmarks/bench_review_queue.py
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import review_queue  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+BRANDS = ["Honda", "Yamaha", "Suzuki", "Piaggio", "SYM", "Kawasaki"]
+PAGE_SIZE = 50
+COUNT_CAP = 10_000
+REPEAT = 5
+
+
+def fake_anomalies(n, rng):
+    residual = rng.normal(0, 30_000_000, n)
+    return pd.DataFrame({
+        "Original Index": np.arange(n),
+        "Thương hiệu": rng.choice(BRANDS, n),
+        "Dòng xe": rng.choice(["Vision", "Exciter", "Vespa", "Wave"], n),
+        "Giá": rng.integers(5, 200, n) * 1_000_000.0,
+        "Giá dự đoán": rng.integers(5, 200, n) * 1_000_000.0,
+        "Chênh lệch": residual,
+        "Bất thường loại": np.where(residual > 0, "Quá cao", "Quá thấp"),
+        "Status": "Pending",
+        "Tiêu đề": "xe đẹp chính chủ",
+    })
+
+
+def time_page(queue, **kwargs):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        total = queue.count(review_queue.SOURCE_DATASET, cap=COUNT_CAP, **{k: v for k, v in kwargs.items() if k not in ("order_by", "descending", "offset")})
+        queue.page(review_queue.SOURCE_DATASET, limit=PAGE_SIZE, with_payload=True, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, total
+
+
+def main():
+    rng = np.random.default_rng(0)
+    cases = {
+        "không lọc": {},
+        "status=Pending, sort Chênh lệch giảm": {"status": "Pending", "order_by": "residual", "descending": True},
+        "brand=Honda + residual >= 50tr": {"brand": ["Honda"], "residual_min": 50_000_000},
+        "trang thứ 100": {"offset": 99 * PAGE_SIZE},
+    }
+    print(f"{'cảnh báo':>10}  " + "".join(f"{name[:28]:>30}" for name in cases))
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = review_queue.ReviewQueue(os.path.join(tmp, "queue.sqlite3"))
+            queue.add_scan(fake_anomalies(n, rng), "bench")
+            cells = [time_page(queue, **kwargs)[0] for kwargs in cases.values()]
+            print(f"{n:>10,}  " + "".join(f"{ms:>27,.2f} ms" for ms in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_spark_scan.py
+# So sánh quét anomaly pandas (scoring.scan_dataframe, 1 core) với Spark local[*] (spark_scan.scan_dataframe)
+# trên tin đăng giả lập nhiều kích thước: thời gian mỗi bên, kết quả phải giống hệt nhau (cùng dòng, cùng giá dự đoán),
+# và kích thước từ đó Spark bắt đầu nhanh hơn.
+# - Thời gian Spark tính cả chuyển DataFrame pandas -> Spark (như khi bấm quét trong app).
+# - Khởi động SparkSession (JVM) đo riêng 1 lần; 1 lần quét nhỏ làm nóng worker Python trước khi đo.
+# Chạy (cần pyspark + Java): python benchmarks/bench_spark_scan.py [--sizes 10000 100000 1000000]
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+warnings.filterwarnings("ignore")
+
+import model_manager  # noqa: E402
+import scoring  # noqa: E402
+import spark_scan  # noqa: E402
+import synthetic_listings  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SIZES = [10_000, 100_000, 1_000_000]
+WARMUP_ROWS = 2_000
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+def same_result(a, b):
+    if len(a) != len(b):
+        return False
+    if not len(a):
+        return True
+    return (np.array_equal(a["Original Index"].to_numpy(), b["Original Index"].to_numpy())
+            and np.array_equal(a["Giá dự đoán"].to_numpy(), b["Giá dự đoán"].to_numpy()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quét anomaly: pandas vs Spark local[*] theo kích thước dữ liệu.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not spark_scan.available():
+        print("Cần pyspark (pip install pyspark) và Java 17 để chạy benchmark này.")
+        return 1
+    os.chdir(ROOT)
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    if state.model is None:
+        print(f"Lỗi load model: {state.error}")
+        return 1
+
+    t_start, spark = timed(spark_scan.get_spark)
+    spark_scan.scan_dataframe(synthetic_listings.generate(WARMUP_ROWS, args.seed), state, scoring.DEFAULT_THRESHOLD)
+    cores = spark.sparkContext.defaultParallelism
+    print(f"Spark {spark.version}, {spark_scan.SPARK_MASTER} ({cores} core), khởi động session {t_start:.1f} s · "
+          f"engine = {'compiled' if state.compiled is not None else 'sklearn'}")
+    print(f"{'dòng':>10}{'pandas (s)':>12}{'spark (s)':>12}{'spark/pandas':>14}{'bất thường':>12}{'khớp':>6}")
+
+    crossover = None
+    for n_rows in args.sizes:
+        df = synthetic_listings.generate(n_rows, args.seed)
+        t_pandas, expected = timed(scoring.scan_dataframe, df, state, scoring.DEFAULT_THRESHOLD)
+        t_spark, got = timed(spark_scan.scan_dataframe, df, state, scoring.DEFAULT_THRESHOLD)
+        ok = same_result(expected, got)
+        print(f"{n_rows:>10,}{t_pandas:>12.2f}{t_spark:>12.2f}{t_spark / t_pandas:>13.2f}x{len(expected):>12,}"
+              f"{'✓' if ok else '✗':>6}")
+        if crossover is None and t_spark < t_pandas:
+            crossover = n_rows
+    spark_scan.stop()
+
+    if crossover is None:
+        print("Spark chưa nhanh hơn pandas ở các kích thước đã đo (chi phí JVM / chuyển Arrow lớn hơn phần song song).")
+    else:
+        print(f"Spark bắt đầu nhanh hơn pandas từ khoảng {crossover:,} dòng ({cores} core).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# benchmarks/bench_vehicle_index.py
+# Chi phí lấy danh sách lựa chọn cho 6 selectbox thông số xe mỗi rerun:
+# df[col].dropna().unique() x6 (cách cũ) so với vehicle_index (dựng 1 lần / dataset, rerun chỉ tra dict).
+# Chạy: python benchmarks/bench_vehicle_index.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import data_cache  # noqa: E402
+import vehicle_index  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SIZES = [7_208, 100_000, 1_000_000]
+COLS = vehicle_index.LEVELS + vehicle_index.FLAT_COLS
+REPEAT = 20
+
+
+def unique_scans(df):
+    return [df[c].dropna().unique() for c in COLS]
+
+
+def index_lookups(df):
+    index = vehicle_index.vehicle_index(df)
+    brand = index.options()[0]
+    model = index.options(brand)[0]
+    vtype = index.options(brand, model)[0]
+    capacity = index.options(brand, model, vtype)[0]
+    origin = index.options(brand, model, vtype, capacity)[0]
+    return index.count(brand, model, vtype, capacity, origin)
+
+
+def timed(fn, *args, repeat=1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def main():
+    base = data_cache.load_dataset(os.path.join(ROOT, "data_motobikes.xlsx"))
+    print(f"{'dòng':>10}{'unique() x6 (ms)':>18}{'dựng chỉ mục':>15}{'rerun (tra)':>14}{'tổ hợp':>9}")
+    for n in SIZES:
+        df = base.iloc[np.random.default_rng(0).integers(0, len(base), n)].reset_index(drop=True)
+        vehicle_index.clear_memo()
+        t_build = timed(index_lookups, df)
+        t_lookup = timed(index_lookups, df, repeat=REPEAT)
+        t_scan = timed(unique_scans, df, repeat=REPEAT)
+        n_combos = vehicle_index.vehicle_index(df).n_combinations
+        print(f"{n:>10,}{t_scan:>18,.2f}{t_build:>15,.1f}{t_lookup:>14,.3f}{n_combos:>9,}")
+
+
+if __name__ == "__main__":
+    main()
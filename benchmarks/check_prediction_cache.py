@@ -0,0 +1,82 @@
+# benchmarks/check_prediction_cache.py
+# Kiểm tra cache dự đoán không đổi kết quả của model: với các dòng có khoảng trắng thừa / số lẻ / ô trống,
+# cached_predict(row) == model_state.predict_one(model_row(row)) bất kể dòng nào cùng key được hỏi trước.
+# Tương tự cho scoring_service (gửi đồng thời -> cùng 1 micro-batch, rồi gửi lại -> lấy từ PREDICTION_CACHE).
+# Lệch -> thoát 1.
+# Chạy (từ thư mục gốc repo): python benchmarks/check_prediction_cache.py
+import asyncio
+import math
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+warnings.filterwarnings("ignore")
+
+import model_manager  # noqa: E402
+import scoring_service  # noqa: E402
+from prediction_cache import PREDICTION_CACHE, PredictionCache, cached_predict, model_row, normalize_key  # noqa: E402
+
+BASE = {"Thương hiệu": "Honda", "Loại xe": "Xe số", "Dung tích xe": "100 - 175 cc", "Dòng xe": "Wave",
+        "Xuất xứ": "Việt Nam", "Năm đăng ký": 2015, "Số Km đã đi": 50000}
+# Các nhóm dòng cùng key chuẩn hoá nhưng khác giá trị gốc
+GROUPS = [
+    [BASE, dict(BASE, **{"Thương hiệu": " Honda "}), dict(BASE, **{"Dòng xe": "Wave\t"})],
+    [dict(BASE, **{"Số Km đã đi": 50000.4}), dict(BASE, **{"Số Km đã đi": "49999.6"}),
+     dict(BASE, **{"Năm đăng ký": 2015.2})],
+    [dict(BASE, **{"Xuất xứ": None}), dict(BASE, **{"Xuất xứ": float("nan")}), {k: v for k, v in BASE.items()
+                                                                                 if k != "Xuất xứ"}],
+    [dict(BASE, **{"Số Km đã đi": None}), dict(BASE, **{"Số Km đã đi": float("nan")})],
+]
+SERVICE_GROUPS = GROUPS[:2]  # service trả 400 khi thiếu trường -> chỉ các nhóm đủ trường
+
+
+def _changed(row):
+    return {k: row.get(k) for k in BASE if row.get(k, "-") != BASE[k]} or "gốc"
+
+
+async def service_predictions(rows):
+    # Lần 1 gửi đồng thời (gom chung lô), lần 2 gửi lại (trả từ cache dùng chung)
+    service = scoring_service.ScoringService()
+    service.batcher.start()
+    try:
+        first = await asyncio.gather(*[service.predict_price(row) for row in rows])
+        second = [await service.predict_price(row) for row in rows]
+    finally:
+        await service.batcher.stop()
+    return first + second
+
+
+def main():
+    os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    if state.model is None:
+        print(f"Lỗi load model: {state.error}")
+        return 1
+    failed = 0
+    for rows in GROUPS:
+        assert len({normalize_key(r) for r in rows}) == 1
+        expected = float(state.predict_one(model_row(rows[0])))
+        # hỏi theo thứ tự xuôi và ngược trên cache trống: dòng hỏi trước không được quyết định giá cho dòng sau
+        for order in (rows, rows[::-1]):
+            cache = PredictionCache()
+            for row in order:
+                got = cached_predict(state, row, cache)
+                ok = got == expected == float(state.predict_one(model_row(row)))
+                failed += not ok
+                print(f"[{'OK' if ok else 'LỆCH'}] {_changed(row)}: {got:,.0f} (model {expected:,.0f})")
+    for rows in SERVICE_GROUPS:
+        expected = float(state.predict_one(model_row(rows[0])))
+        for order in (rows, rows[::-1]):
+            PREDICTION_CACHE.invalidate()
+            got = asyncio.run(service_predictions(order))
+            # service predict theo lô (DataFrame) -> chỉ lệch predict_one ở vài bit cuối do thứ tự cộng
+            ok = all(math.isclose(g, expected, rel_tol=1e-9) for g in got)
+            failed += not ok
+            print(f"[{'OK' if ok else 'LỆCH'}] service {[_changed(r) for r in order]}: "
+                  f"{', '.join(f'{g:,.0f}' for g in sorted(set(got)))} (model {expected:,.0f})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# benchmarks/check_spark_parity.py
+# Kiểm tra backend Spark cho cùng kết quả với quét pandas (scoring.scan_dataframe) trên vài bộ dữ liệu giả lập:
+# - ImputeStats: mode từng cột categorical (cùng giá trị, cùng kiểu, cùng cách phá hoà) và median 'Số Km đã đi' / 'Giá'.
+# - Bảng bất thường: cùng dòng, cùng giá dự đoán.
+# - Các trường hợp: dữ liệu mẫu, categorical thiếu nhiều, cột categorical kiểu số, mode bị hoà (DataFrame -> from_pandas);
+#   dữ liệu mẫu và 'Giá' dạng số có ô trống ghi ra CSV / Parquet (spark.read qua read_file, pandas qua file_chunks).
+# Không có pyspark / Java -> in "bỏ qua" và thoát 0; lệch -> thoát 1.
+# Chạy: python benchmarks/check_spark_parity.py [--rows 5000]
+import argparse
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+warnings.filterwarnings("ignore")
+
+import model_manager  # noqa: E402
+import scoring  # noqa: E402
+import spark_scan  # noqa: E402
+import synthetic_listings  # noqa: E402
+from bench_spark_scan import same_result  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def scenarios(n_rows, seed):
+    base = synthetic_listings.generate(n_rows, seed)
+    rng = np.random.default_rng(seed)
+    sparse = base.copy()
+    for col in scoring.CAT_COLS:
+        sparse.loc[rng.random(n_rows) < 0.3, col] = None
+    numeric = base.copy()
+    numeric['Dung tích xe'] = numeric['Dung tích xe'].astype("category").cat.codes.astype(np.int64)
+    tie = base.head(4).copy()
+    tie['Thương hiệu'] = ["Yamaha", "Honda", "Yamaha", "Honda"]
+    return [("mẫu", base), ("categorical thiếu 30%", sparse), ("'Dung tích xe' kiểu số", numeric), ("mode hoà", tie)]
+
+
+def file_scenarios(n_rows, seed):
+    base = synthetic_listings.generate(n_rows, seed)
+    numeric_price = base.copy()
+    numeric_price['Giá'] = pd.to_numeric(base['Giá'].astype(str).str.replace(r"\D", "", regex=True), errors="coerce")
+    return [("mẫu", base), ("'Giá' kiểu số có ô trống", numeric_price)]
+
+
+def pandas_scan(chunk_source, columns, state):
+    add_price_min = scoring.check_columns(columns)
+    stats = scoring.compute_impute_stats(chunk_source)
+    parts = [anom for _, _, anom in scoring.iter_scan(chunk_source, state, scoring.DEFAULT_THRESHOLD, stats=stats,
+                                                      add_price_min=add_price_min)]
+    return stats, pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def spark_scan_frame(sdf, state):
+    stats = spark_scan.compute_impute_stats(sdf)
+    return stats, spark_scan.scan(sdf, state, scoring.DEFAULT_THRESHOLD, stats=stats)
+
+
+def _same_value(a, b):
+    if isinstance(a, float) and isinstance(b, float) and a != a and b != b:
+        return True
+    return a == b and isinstance(a, str) == isinstance(b, str)
+
+
+def compare_stats(expected, got):
+    diffs = [f"mode {col}: {expected.modes[col]!r} != {got.modes[col]!r}" for col in scoring.CAT_COLS
+             if not _same_value(expected.modes[col], got.modes[col])]
+    for name in ("km_median", "gia_median", "n_rows"):
+        a, b = float(getattr(expected, name)), float(getattr(got, name))
+        if not _same_value(a, b):
+            diffs.append(f"{name}: {a} != {b}")
+    return diffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="So khớp quét anomaly Spark với pandas.")
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not spark_scan.available():
+        print("Bỏ qua: không có pyspark (pip install pyspark) / Java 17.")
+        return 0
+    os.chdir(ROOT)
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    if state.model is None:
+        print(f"Lỗi load model: {state.error}")
+        return 1
+
+    spark = spark_scan.get_spark()
+    failed = 0
+
+    def check(name, n_rows, expected, got):
+        nonlocal failed
+        diffs = compare_stats(expected[0], got[0])
+        if not same_result(expected[1], got[1]):
+            diffs.append(f"bảng bất thường khác ({len(expected[1]):,} / spark {len(got[1]):,} dòng)")
+        failed += bool(diffs)
+        print(f"[{'LỆCH' if diffs else 'OK'}] {name}: {n_rows:,} dòng, {len(expected[1]):,} bất thường")
+        for diff in diffs:
+            print(f"      {diff}")
+
+    for name, df in scenarios(args.rows, args.seed):
+        check(name, len(df), pandas_scan(scoring.frame_chunks(df), df.columns, state),
+              spark_scan_frame(spark_scan.from_pandas(spark, df), state))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, df in file_scenarios(args.rows, args.seed):
+            for ext, write in ((".csv", lambda p: df.to_csv(p, index=False)),
+                               (".parquet", lambda p: df.to_parquet(p, index=False))):
+                path = os.path.join(tmp, f"listings{ext}")
+                write(path)
+                check(f"{name} ({ext})", len(df),
+                      pandas_scan(scoring.file_chunks(path), scoring.read_columns(path), state),
+                      spark_scan_frame(spark_scan.read_file(spark, path), state))
+    spark_scan.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmarks/load_scoring_service.py
+# Tạo tải cho scoring_service.py: N kết nối keep-alive song song gửi tin đăng lấy ngẫu nhiên từ dataset mẫu,
+# in throughput + latency phía client và /metrics phía server (kích thước batch, độ sâu hàng đợi).
+# Chạy:  uvicorn scoring_service:app --port 8000   (terminal khác)
+#        python benchmarks/load_scoring_service.py --requests 5000 --concurrency 64 [--endpoint anomaly] [--unique]
+# --unique: cộng thêm số km ngẫu nhiên để mỗi request là bộ thông số mới (không trúng cache, đo micro-batching thật).
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+warnings.filterwarnings("ignore")
+
+import data_cache  # noqa: E402
+from prediction_cache import KEY_CAT_COLS  # noqa: E402
+from preprocessing import cleaned_dataset  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def sample_listings(n, unique, seed=0):
+    df = cleaned_dataset(data_cache.load_dataset(os.path.join(ROOT, "data_motobikes.xlsx")))
+    df = df.dropna(subset=KEY_CAT_COLS)  # service trả 400 khi thiếu trường bắt buộc
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(0, len(df), n)]
+    listings = []
+    for i, (_, r) in enumerate(rows.iterrows()):
+        item = {col: str(r[col]) for col in KEY_CAT_COLS}
+        km = 0 if r["Số Km đã đi"] != r["Số Km đã đi"] else int(r["Số Km đã đi"])
+        item.update({"Năm đăng ký": int(r["Năm đăng ký"]), "Số Km đã đi": km + (i if unique else 0),
+                     "Giá": 0 if r["Giá"] != r["Giá"] else int(r["Giá"])})
+        listings.append(item)
+    return listings
+
+
+async def _request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _worker(host, port, path, queue, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                listing = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", path, listing)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    listings = sample_listings(args.requests, args.unique)
+    queue = asyncio.Queue()
+    for item in listings:
+        queue.put_nowait(item)
+    latencies, errors = [], []
+    path = f"/{args.endpoint}"
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_worker(args.host, args.port, path, queue, latencies, errors)
+                           for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - t0
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{len(latencies):,} request {path}, {args.concurrency} kết nối, {elapsed:,.2f} s "
+          f"-> {len(latencies) / elapsed:,.0f} req/s, lỗi: {len(errors)}")
+    print(f"latency client (ms): p50 {p50:,.2f} · p95 {p95:,.2f} · p99 {p99:,.2f}")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, metrics = await _request(reader, writer, args.host, "GET", "/metrics")
+    writer.close()
+    print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test cho scoring_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--endpoint", choices=["predict", "anomaly"], default="predict")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--unique", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
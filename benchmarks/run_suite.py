@@ -0,0 +1,210 @@
+# benchmarks/run_suite.py
+# Bộ benchmark theo kích thước dữ liệu trên tin đăng giả lập (synthetic_listings) 10k / 100k / 1M dòng:
+# - clean: preprocess_df_before_predict
+# - batch predict: model_state.predict trên toàn bộ frame đã clean + impute
+# - scan: scoring.scan_dataframe (clean -> impute -> predict -> flag theo lô, như tab Admin), kèm tỷ lệ dòng trùng
+#   vector đặc trưng được dedup và thời gian tiết kiệm ước lượng
+# - single predict: latency p50 / p95 / p99 của 1 dòng (compiled predict_one và pipeline sklearn)
+# Kết quả ghi ra JSON (kèm commit git, phiên bản thư viện, CPU) để so giữa các phiên bản:
+#   python benchmarks/run_suite.py                                 -> benchmarks/results/<thời gian>-<commit>.json
+#   python benchmarks/run_suite.py --sizes 10000 100000 --compare benchmarks/results/cu.json --tolerance 0.2
+# --compare: in tỉ lệ mới / cũ từng chỉ số, mã thoát 1 nếu có chỉ số chậm hơn quá tolerance.
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+warnings.filterwarnings("ignore")
+
+import model_manager  # noqa: E402
+import scoring  # noqa: E402
+import synthetic_listings  # noqa: E402
+from preprocessing import preprocess_df_before_predict  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SIZES = [10_000, 100_000, 1_000_000]
+SINGLE_ROWS = 500
+SCHEMA_VERSION = 1
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    # -> (thời gian tốt nhất trong repeat lần, ms; kết quả lần cuối)
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return {"p50_ms": float(np.percentile(arr, 50)), "p95_ms": float(np.percentile(arr, 95)),
+            "p99_ms": float(np.percentile(arr, 99))}
+
+
+def bench_single(state, df):
+    # 1 dòng / lần như trang "Dự đoán giá" (dict đầu vào, không có cột Giá)
+    source = scoring.frame_chunks(df, len(df))
+    X = scoring.clean_chunk(df, scoring.compute_impute_stats(source), add_price_min=True).drop(columns=["Giá"])
+    rows = X.iloc[:SINGLE_ROWS].to_dict("records")
+    result = {}
+    if state.compiled is not None:
+        samples = []
+        for row in rows:
+            t0 = time.perf_counter()
+            state.compiled.predict_one(row)
+            samples.append((time.perf_counter() - t0) * 1000)
+        result["compiled"] = percentiles(samples)
+    samples = []
+    for row in rows[:max(50, SINGLE_ROWS // 5)]:  # pipeline sklearn chậm hơn nhiều -> ít mẫu hơn
+        t0 = time.perf_counter()
+        state.model.predict(pd.DataFrame([row]))
+        samples.append((time.perf_counter() - t0) * 1000)
+    result["sklearn"] = percentiles(samples)
+    return result
+
+
+def bench_size(state, n_rows, repeat, seed):
+    t_gen, df = timed(synthetic_listings.generate, n_rows, seed)
+    t_clean, _ = timed(preprocess_df_before_predict, df, repeat=repeat)
+    stats = scoring.compute_impute_stats(scoring.frame_chunks(df, len(df)))
+    X = scoring.clean_chunk(df, stats, add_price_min=True).drop(columns=["Giá"])
+    t_predict, _ = timed(state.predict, X, repeat=repeat)
+    dedup = scoring.DedupStats()
+    t_scan, anomalies = timed(scoring.scan_dataframe, df, state, scoring.DEFAULT_THRESHOLD,
+                              repeat=repeat, dedup=dedup)
+    return {
+        "rows": n_rows,
+        "generate_ms": t_gen,
+        "clean_ms": t_clean,
+        "batch_predict_ms": t_predict,
+        "scan_ms": t_scan,
+        "scan_rows_per_s": n_rows / (t_scan / 1000) if t_scan else None,
+        "anomalies": int(len(anomalies)),
+        "dedup_ratio": dedup.ratio,
+        "dedup_saved_ms": dedup.saved_seconds * 1000 / repeat,  # stats cộng dồn qua các lần lặp
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short=12", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(state):
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "model_version": state.version,
+        "engine": "compiled" if state.compiled is not None else "sklearn",
+    }
+
+
+# ---------- So sánh 2 file kết quả ----------
+TIMING_KEYS = ["clean_ms", "batch_predict_ms", "scan_ms"]
+
+
+def flatten(results):
+    # {tên chỉ số: ms} để so sánh, vd "scan_ms@100000", "single.compiled.p95_ms"
+    flat = {}
+    for size in results["sizes"]:
+        for key in TIMING_KEYS:
+            flat[f"{key}@{size['rows']}"] = size[key]
+    for engine, stats in results.get("single_predict", {}).items():
+        for key, value in stats.items():
+            flat[f"single.{engine}.{key}"] = value
+    return flat
+
+
+def compare(new, old, tolerance):
+    # -> danh sách chỉ số chậm hơn quá tolerance
+    new_flat, old_flat = flatten(new), flatten(old)
+    regressions = []
+    print(f"\nSo với {old.get('commit') or '?'} ({old.get('created_at', '?')}):")
+    print(f"{'chỉ số':<32}{'cũ (ms)':>12}{'mới (ms)':>12}{'mới/cũ':>9}")
+    for key in new_flat:
+        if key not in old_flat or not old_flat[key]:
+            continue
+        ratio = new_flat[key] / old_flat[key]
+        mark = ""
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+            mark = "  ⚠ chậm hơn"
+        print(f"{key:<32}{old_flat[key]:>12,.2f}{new_flat[key]:>12,.2f}{ratio:>8.2f}x{mark}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark clean / predict / scan theo kích thước dữ liệu giả lập.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Số dòng cần đo")
+    parser.add_argument("--repeat", type=int, default=1, help="Lặp mỗi phép đo, lấy lần nhanh nhất")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="File JSON kết quả (mặc định benchmarks/results/<thời gian>-<commit>.json)")
+    parser.add_argument("--compare", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Chậm hơn quá tỷ lệ này thì coi là regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.chdir(ROOT)
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    if state.model is None:
+        print(f"Lỗi load model: {state.error}")
+        return 1
+    commit = git_commit()
+    created_at = datetime.datetime.now().isoformat(timespec="seconds")
+    results = {"schema": SCHEMA_VERSION, "commit": commit, "created_at": created_at,
+               "environment": environment(state), "sizes": []}
+
+    print(f"{'dòng':>10}{'sinh (ms)':>12}{'clean (ms)':>12}{'predict (ms)':>14}{'scan (ms)':>12}{'dòng/s':>12}{'bất thường':>12}")
+    for n_rows in args.sizes:
+        size = bench_size(state, n_rows, args.repeat, args.seed)
+        results["sizes"].append(size)
+        print(f"{n_rows:>10,}{size['generate_ms']:>12,.0f}{size['clean_ms']:>12,.1f}{size['batch_predict_ms']:>14,.1f}"
+              f"{size['scan_ms']:>12,.1f}{size['scan_rows_per_s']:>12,.0f}{size['anomalies']:>12,}")
+
+    results["single_predict"] = bench_single(state, synthetic_listings.generate(SINGLE_ROWS, args.seed))
+    for engine, stats in results["single_predict"].items():
+        print(f"1 dòng ({engine}): p50 {stats['p50_ms']:.3f} ms · p95 {stats['p95_ms']:.3f} ms · p99 {stats['p99_ms']:.3f} ms")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{created_at.replace(':', '').replace('-', '')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Kết quả -> {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        regressions = compare(results, old, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} chỉ số chậm hơn quá {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+# compiled_gbr.py
+# Đường suy luận "compiled" cho pipeline GBR (ColumnTransformer + OneHotEncoder + GradientBoostingRegressor):
+# - Trích imputer (median / most_frequent), categories_ của OneHotEncoder và 300 cây quyết định
+#   ra các mảng NumPy phẳng (feature / threshold / left / right / value).
+# - Không dựng ma trận one-hot: mỗi cột categorical giữ dạng mã số nguyên, node tách trên feature one-hot
+#   được đổi thành phép so sánh "mã == category" (handle_unknown='ignore' -> mã -1, không khớp category nào).
+# - Batch: kiểu QuickScorer. Mỗi cây <= 64 leaf được đánh số trái -> phải thành 1 bitmask; mỗi node khi đi
+#   sang phải sẽ "tắt" các leaf của cây con trái. Với mỗi cột nguồn, bảng tiền tính (theo threshold đã sắp xếp
+#   hoặc theo mã category) cho sẵn bitmask của cả 300 cây -> mỗi dòng chỉ cần 7 lần tra bảng + AND,
+#   leaf thoát = bit thấp nhất còn bật.
+# - 1 dòng: predict_one(dict) duyệt trực tiếp các mảng phẳng, không cần DataFrame.
+# Kết quả khớp model.predict (cùng cast float32 của sklearn tree, cùng thứ tự cộng dồn từng cây).
+import numpy as np
+import pandas as pd
+
+
+class CompileError(ValueError):
+    pass
+
+
+BATCH_ROWS = 4096
+
+
+def _named_step(pipeline, name, default=None):
+    steps = getattr(pipeline, "named_steps", None)
+    if steps is None or name not in steps:
+        return default
+    return steps[name]
+
+
+class CompiledGBR:
+    def __init__(self, input_cols, num_cols, num_fill, cat_cols, cat_fill, categories,
+                 init_value, learning_rate, node_src, node_cat, node_thr, node_left, node_right,
+                 node_value, roots, max_depth):
+        self.input_cols = input_cols
+        self.num_cols = num_cols
+        self.num_fill = num_fill
+        self.cat_cols = cat_cols
+        self.cat_fill = cat_fill
+        self.categories = categories
+        self.cat_lookup = [{v: i for i, v in enumerate(cats)} for cats in categories]
+        self.init_value = float(init_value)
+        self.learning_rate = float(learning_rate)
+        self.node_src = node_src      # cột nguồn (index trong num_cols + cat_cols)
+        self.node_cat = node_cat      # mã category cho node one-hot, -1 cho node số
+        self.node_thr = node_thr
+        self.node_left = node_left    # index node con trái (toàn cục); leaf tự trỏ về chính nó
+        self.node_right = node_right
+        self.node_value = node_value  # giá trị leaf gốc (chưa nhân learning_rate)
+        self.roots = roots
+        self.max_depth = max_depth
+        self._build_masks()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # ---------- Trích xuất từ pipeline ----------
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        preprocess = _named_step(pipeline, "preprocess")
+        reg = _named_step(pipeline, "model")
+        if preprocess is None or reg is None:
+            raise CompileError("Pipeline cần 2 bước 'preprocess' và 'model'.")
+        if type(reg).__name__ != "GradientBoostingRegressor" or getattr(reg, "loss", None) != "squared_error":
+            raise CompileError(f"Chỉ hỗ trợ GradientBoostingRegressor(loss='squared_error'), gặp {reg!r}.")
+        init_value = getattr(reg.init_, "constant_", None) if reg.init_ != "zero" else np.zeros((1, 1))
+        if init_value is None:
+            raise CompileError("init_ của GBR không phải DummyRegressor.")
+
+        num_cols, num_fill, cat_cols, cat_fill, categories = [], [], [], [], []
+        out_map = []  # mỗi feature sau ColumnTransformer -> (loại cột, index cột nguồn, mã category hoặc -1)
+        for name, trans, cols in preprocess.transformers_:
+            if trans == "drop" or name == "remainder":
+                continue
+            if isinstance(cols, str) or trans == "passthrough":
+                raise CompileError(f"Transformer '{name}' không được hỗ trợ.")
+            imputer = _named_step(trans, "imputer")
+            onehot = _named_step(trans, "onehot")
+            if imputer is None or len(trans.steps) != (2 if onehot is not None else 1):
+                raise CompileError(f"Transformer '{name}' phải là imputer (+ onehot).")
+            stats = imputer.statistics_
+            if onehot is None:
+                if imputer.strategy not in ("median", "mean", "constant"):
+                    raise CompileError(f"Imputer '{name}' strategy={imputer.strategy} không hỗ trợ.")
+                for col, fill in zip(cols, stats):
+                    out_map.append(("num", len(num_cols), -1))
+                    num_cols.append(col)
+                    num_fill.append(float(fill))
+            else:
+                if onehot.drop_idx_ is not None or getattr(onehot, "_infrequent_enabled", False):
+                    raise CompileError("OneHotEncoder có drop/infrequent chưa được hỗ trợ.")
+                if onehot.handle_unknown != "ignore":
+                    raise CompileError("OneHotEncoder cần handle_unknown='ignore'.")
+                for col, fill, cats in zip(cols, stats, onehot.categories_):
+                    cat_cols.append(col)
+                    cat_fill.append(fill)
+                    categories.append(list(cats))
+                    out_map.extend(("cat", len(cat_cols) - 1, code) for code in range(len(cats)))
+
+        n_num = len(num_cols)
+        out_src = np.array([idx if kind == "num" else n_num + idx for kind, idx, _ in out_map], dtype=np.int64)
+        out_cat = np.array([code for _, _, code in out_map], dtype=np.int64)
+        if hasattr(reg, "n_features_in_") and reg.n_features_in_ != len(out_map):
+            raise CompileError(f"Số feature không khớp: {reg.n_features_in_} vs {len(out_map)}.")
+
+        srcs, cats_, thrs, lefts, rights, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in reg.estimators_[:, 0]:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left < 0
+            feat = np.where(is_leaf, 0, tree.feature)
+            srcs.append(np.where(is_leaf, 0, out_src[feat]))
+            cats_.append(np.where(is_leaf, -1, out_cat[feat]))
+            thrs.append(tree.threshold.astype(np.float64))
+            local = np.arange(n)
+            lefts.append(np.where(is_leaf, local, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, local, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            input_cols=list(getattr(pipeline, "feature_names_in_", num_cols + cat_cols)),
+            num_cols=num_cols, num_fill=np.array(num_fill, dtype=np.float64),
+            cat_cols=cat_cols, cat_fill=cat_fill, categories=categories,
+            init_value=np.asarray(init_value).ravel()[0], learning_rate=reg.learning_rate,
+            node_src=np.concatenate(srcs), node_cat=np.concatenate(cats_), node_thr=np.concatenate(thrs),
+            node_left=np.concatenate(lefts), node_right=np.concatenate(rights),
+            node_value=np.concatenate(values), roots=np.array(roots, dtype=np.int64), max_depth=max_depth,
+        )
+
+    # ---------- Mã hoá đầu vào ----------
+    def encode(self, X: pd.DataFrame):
+        # Ma trận (n, n_num + n_cat) float32: cột số đã impute, cột categorical là mã category (-1 = unknown)
+        n = len(X)
+        out = np.empty((n, len(self.num_cols) + len(self.cat_cols)), dtype=np.float32)
+        for j, col in enumerate(self.num_cols):
+            vals = pd.to_numeric(X[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            out[:, j] = np.where(np.isnan(vals), self.num_fill[j], vals)
+        base = len(self.num_cols)
+        for j, col in enumerate(self.cat_cols):
+            s = X[col]
+            s = s.where(s.notna(), self.cat_fill[j])
+            codes = pd.Categorical(s, categories=self.categories[j]).codes
+            out[:, base + j] = codes
+        return out
+
+    def _encode_one(self, row):
+        out = np.empty(len(self.num_cols) + len(self.cat_cols), dtype=np.float32)
+        for j, col in enumerate(self.num_cols):
+            v = row.get(col)
+            try:
+                v = float(v)
+            except (TypeError, ValueError):
+                v = np.nan
+            out[j] = self.num_fill[j] if np.isnan(v) else v
+        base = len(self.num_cols)
+        for j, col in enumerate(self.cat_cols):
+            v = row.get(col)
+            if v is None or (isinstance(v, float) and np.isnan(v)):
+                v = self.cat_fill[j]
+            out[base + j] = self.cat_lookup[j].get(v, -1)
+        return out
+
+    # ---------- Bảng bitmask cho batch ----------
+    def _build_masks(self):
+        n_trees = self.n_trees
+        n_src = len(self.num_cols) + len(self.cat_cols)
+        is_leaf = self.node_left == np.arange(len(self.node_left))
+        n_leaves = np.zeros(n_trees, dtype=np.int64)
+        leaf_no = np.full(len(self.node_left), -1, dtype=np.int64)
+        left_mask = np.zeros(len(self.node_left), dtype=object)  # bitmask leaf của cây con trái (int Python)
+
+        def walk(node, t):
+            # đánh số leaf theo thứ tự trái -> phải, trả về bitmask leaf của cây con tại node
+            if is_leaf[node]:
+                leaf_no[node] = n_leaves[t]
+                n_leaves[t] += 1
+                return 1 << int(leaf_no[node])
+            lm = walk(self.node_left[node], t)
+            rm = walk(self.node_right[node], t)
+            left_mask[node] = lm
+            return lm | rm
+
+        for t, root in enumerate(self.roots):
+            walk(root, t)
+        max_leaves = int(n_leaves.max())
+        if max_leaves > 64:
+            raise CompileError(f"Cây có {max_leaves} leaf, tối đa 64 cho bitmask.")
+        self.mask_dtype = np.uint32 if max_leaves <= 32 else np.uint64
+        bits = 32 if max_leaves <= 32 else 64
+        full = (1 << bits) - 1
+        # hash de Bruijn: (bit đơn * mul) >> shift cho mỗi vị trí bit một slot khác nhau trong [0, bits)
+        mul = 0x077CB531 if bits == 32 else 0x03F79D71B4CB0A89
+        shift = bits - (5 if bits == 32 else 6)
+        self._debruijn_mul = self.mask_dtype(mul)
+        self._debruijn_shift = self.mask_dtype(shift)
+        self.slots = bits
+
+        base = np.full(n_trees, full, dtype=self.mask_dtype)
+        events = [[] for _ in range(n_src)]  # (khoá sắp xếp, cây, mask khi đi phải)
+        tree_of = np.repeat(np.arange(n_trees), np.diff(np.append(self.roots, len(self.node_left))))
+        n_num = len(self.num_cols)
+        for node in np.flatnonzero(~is_leaf):
+            t = int(tree_of[node])
+            go_right_mask = full & ~left_mask[node]
+            src, cat, thr = int(self.node_src[node]), int(self.node_cat[node]), float(self.node_thr[node])
+            if cat < 0:
+                events[src].append((thr, t, go_right_mask))
+            elif thr < 0:       # one-hot luôn > thr -> luôn đi phải
+                base[t] &= go_right_mask
+            elif thr < 1:       # đi phải khi one-hot = 1, tức mã == cat
+                events[src].append((cat, t, go_right_mask))
+            # thr >= 1: không bao giờ đi phải, bỏ qua
+
+        self.num_thresholds = []
+        self.src_tables = []
+        for src in range(n_src):
+            ev = sorted(events[src], key=lambda e: e[0])
+            if src < n_num:
+                # hàng k = AND mask của k node có threshold nhỏ nhất (x > thr <=> có đúng k threshold < x)
+                table = np.full((len(ev) + 1, n_trees), full, dtype=self.mask_dtype)
+                for k, (_, t, mask) in enumerate(ev, start=1):
+                    table[k] = table[k - 1]
+                    table[k, t] &= mask
+                self.num_thresholds.append(np.array([e[0] for e in ev], dtype=np.float64))
+            else:
+                # hàng theo mã category; hàng cuối (mã -1 = unknown) giữ nguyên toàn bit 1
+                n_codes = len(self.categories[src - n_num])
+                table = np.full((n_codes + 1, n_trees), full, dtype=self.mask_dtype)
+                for code, t, mask in ev:
+                    table[code, t] &= mask
+            self.src_tables.append(table)
+        self.base_mask = base
+
+        # bảng giá trị leaf đánh index theo (cây, slot de Bruijn của bit leaf) -> tra thẳng từ bit thấp nhất
+        leaf_values = np.zeros((n_trees, bits), dtype=np.float64)
+        leaves = np.flatnonzero(is_leaf)
+        slot = np.array([((mul << int(i)) & full) >> shift for i in leaf_no[leaves]], dtype=np.int64)
+        # nhân learning_rate trước: cùng phép nhân như sklearn (out += lr * value) nên kết quả không đổi
+        leaf_values[tree_of[leaves], slot] = self.learning_rate * self.node_value[leaves]
+        self.leaf_values = leaf_values.ravel()
+
+    def _exit_slots(self, codes):
+        # codes: (m, n_src) -> slot của leaf thoát (m, n_trees) trong leaf_values
+        n_num = len(self.num_cols)
+        mask = np.broadcast_to(self.base_mask, (codes.shape[0], self.n_trees)).copy()
+        for src, table in enumerate(self.src_tables):
+            col = codes[:, src]
+            if src < n_num:
+                idx = np.searchsorted(self.num_thresholds[src], col.astype(np.float64), side="left")
+            else:
+                idx = col.astype(np.int64)  # -1 -> hàng cuối (unknown)
+            mask &= table[idx]
+        low = mask & (~mask + self.mask_dtype(1))  # chỉ giữ bit thấp nhất
+        return (low * self._debruijn_mul) >> self._debruijn_shift
+
+    def predict_encoded(self, codes):
+        n = codes.shape[0]
+        out = np.empty(n, dtype=np.float64)
+        tree_offset = np.arange(self.n_trees, dtype=np.intp) * self.slots
+        for start in range(0, n, BATCH_ROWS):
+            chunk = codes[start:start + BATCH_ROWS]
+            # layout (cây, dòng): sum theo axis 0 cộng tuần tự từng cây = đúng thứ tự cộng của sklearn
+            vals = np.empty((self.n_trees + 1, len(chunk)), dtype=np.float64)
+            vals[0] = self.init_value
+            vals[1:] = self.leaf_values[(self._exit_slots(chunk).astype(np.intp) + tree_offset).T]
+            out[start:start + len(chunk)] = vals.sum(axis=0)
+        return out
+
+    def predict(self, X: pd.DataFrame):
+        return self.predict_encoded(self.encode(X))
+
+    def predict_one(self, row):
+        # row: dict {cột: giá trị}; trả về float
+        codes = self._encode_one(row)
+        node = self.roots.copy()
+        for _ in range(self.max_depth):
+            x = codes[self.node_src[node]]
+            cat = self.node_cat[node]
+            x = np.where(cat >= 0, (x == cat).astype(np.float32), x)
+            node = np.where(x <= self.node_thr[node], self.node_left[node], self.node_right[node])
+        acc = self.init_value
+        lr = self.learning_rate
+        for v in self.node_value[node].tolist():
+            acc += lr * v
+        return acc
+
+
+def compile_pipeline(pipeline):
+    return CompiledGBR.from_pipeline(pipeline)
@@ -0,0 +1,132 @@
+# data_cache.py
+# Cache dữ liệu dạng cột (Arrow IPC) cho file Excel mẫu.
+# - Lần đầu: đọc Excel bằng openpyxl rồi ghi ra file .arrow trong CACHE_DIR.
+# - Các lần sau: đọc file .arrow (memory-mapped), không parse Excel nữa.
+# - Trong cùng một process: giữ DataFrame (dạng gọn: category / int nhỏ, xem frame_memory) trong bộ nhớ, mọi lần rerun dùng chung.
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from frame_memory import compact_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow không có -> vẫn chạy được, chỉ không có cache trên đĩa
+    pa = None
+    pa_ipc = None
+
+CACHE_DIR = os.environ.get("MOTOBIKE_CACHE_DIR", "./.cache")
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dataset_cache_key(path):
+    # Key = đường dẫn tuyệt đối + mtime + hash nội dung
+    abspath = os.path.abspath(path)
+    st_ = os.stat(abspath)
+    raw = f"{abspath}|{st_.st_mtime_ns}|{_file_sha1(abspath)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_file(path, key):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{key}.arrow")
+
+
+def read_excel_raw(path):
+    return pd.read_excel(path, engine="openpyxl")
+
+
+def to_arrow_safe(df):
+    # Cột object lẫn kiểu (vd 'Năm đăng ký' vừa int vừa "trước năm 1980")
+    # không ghi được sang Arrow -> ép về chuỗi. Bước tiền xử lý vẫn astype(str) nên kết quả không đổi.
+    out = df
+    for col in df.columns:
+        if df[col].dtype == object:
+            kinds = set(df[col].dropna().map(type))
+            if len(kinds) > 1:
+                if out is df:
+                    out = df.copy()
+                out[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return out
+
+
+def _write_arrow(df, cache_path):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = cache_path + ".tmp"
+    with pa_ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, cache_path)  # ghi atomic, tránh process khác đọc file dở dang
+
+
+def _read_arrow(cache_path):
+    with pa.memory_map(cache_path, "r") as source:
+        table = pa_ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def _remove_stale(path, keep):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(stem + "-") and name.endswith(".arrow") and os.path.join(CACHE_DIR, name) != keep:
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
+
+
+def load_dataset_uncached(path):
+    # Bỏ qua cache bộ nhớ, chỉ dùng cache trên đĩa (dùng cho benchmark)
+    if pa is None:
+        return read_excel_raw(path)
+    cache_path = _cache_file(path, dataset_cache_key(path))
+    if os.path.exists(cache_path):
+        try:
+            return compact_frame(_read_arrow(cache_path))  # file cache cũ chưa gọn -> gọn lại trong bộ nhớ
+        except Exception:
+            pass  # file cache hỏng -> build lại
+    df = compact_frame(to_arrow_safe(read_excel_raw(path)))
+    try:
+        _write_arrow(df, cache_path)
+        _remove_stale(path, cache_path)
+    except Exception:
+        pass  # không ghi được cache (read-only FS...) vẫn trả về data
+    return df
+
+
+def load_dataset(path):
+    # DataFrame trả về được dùng chung giữa các session -> KHÔNG sửa trực tiếp, hãy .copy()
+    abspath = os.path.abspath(path)
+    st_ = os.stat(abspath)
+    memo_key = (abspath, st_.st_mtime_ns, st_.st_size)
+    df = _memo.get(memo_key)
+    if df is not None:
+        return df
+    with _memo_lock:
+        df = _memo.get(memo_key)
+        if df is None:
+            df = load_dataset_uncached(abspath)
+            for k in [k for k in _memo if k[0] == abspath]:
+                del _memo[k]
+            _memo[memo_key] = df
+    return df
+
+
+def clear_memory_cache():
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,207 @@
+# eda_cache.py
+# Số liệu vẽ biểu đồ EDA (trang "Tổng quan") tính 1 lần / dataset, rerun chỉ vẽ lại từ các mảng nhỏ:
+# - Histogram 50 bin của 'Giá' và 'Log Giá' (cùng cạnh bin với sns.histplot(bins=50)).
+# - Đường KDE: binning tuyến tính lên lưới mịn + tích chập FFT với kernel Gauss (O(n + G log G)),
+#   bandwidth Scott và lưới 200 điểm trong [min, max] như histplot(kde=True); không còn O(n x lưới).
+# - Ma trận tương quan tính từ tổng moment (n, Σx, Σxxᵀ) của các cột số.
+# - Memo theo fingerprint dataset; dataset mới chỉ là dataset cũ + thêm dòng ở cuối thì cộng dồn phần mới.
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import cleaned_dataset, dataset_fingerprint
+
+HIST_BINS = 50
+KDE_GRIDSIZE = 200  # số điểm vẽ (giống seaborn)
+FINE_GRID = 1 << 14  # lưới binning cho FFT
+MEMO_MAX_ENTRIES = 4
+
+
+def _digest(arrays):
+    h = hashlib.sha1()
+    for arr in arrays:
+        h.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class SeriesArtifact:
+    # Histogram + lưới đếm mịn + moment của 1 cột số (đã bỏ NaN); cộng dồn được khi giá trị mới nằm trong [lo, hi]
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.lo, self.hi = float(values.min()), float(values.max())
+        self.edges = np.histogram_bin_edges(values, bins=HIST_BINS, range=(self.lo, self.hi))
+        self.counts = np.zeros(HIST_BINS, dtype=np.int64)
+        self.fine = np.zeros(FINE_GRID, dtype=np.float64)
+        self.shift = float(values.mean())  # dịch gốc để tổng bình phương không mất chính xác
+        self.n, self.s1, self.s2 = 0, 0.0, 0.0
+        self._curve = None
+        self.add(values)
+
+    def covers(self, values):
+        return len(values) == 0 or (values.min() >= self.lo and values.max() <= self.hi)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        if self.hi > self.lo:
+            # binning tuyến tính: mỗi giá trị chia trọng số cho 2 điểm lưới kề nhau
+            pos = (values - self.lo) / (self.hi - self.lo) * (FINE_GRID - 1)
+            left = np.clip(np.floor(pos).astype(np.int64), 0, FINE_GRID - 2)
+            frac = pos - left
+            self.fine += np.bincount(left, weights=1 - frac, minlength=FINE_GRID)
+            self.fine += np.bincount(left + 1, weights=frac, minlength=FINE_GRID)
+        else:
+            self.fine[0] += len(values)
+        centered = values - self.shift
+        self.n += len(values)
+        self.s1 += float(centered.sum())
+        self.s2 += float((centered * centered).sum())
+        self._curve = None
+
+    @property
+    def std(self):
+        if self.n < 2:
+            return 0.0
+        return float(np.sqrt(max(self.s2 - self.s1 * self.s1 / self.n, 0.0) / (self.n - 1)))
+
+    def kde_curve(self):
+        # -> (x, y) đã scale theo tần suất như histplot: mật độ * n * độ rộng bin (giữ lại tới khi add thêm dòng)
+        if self._curve is None:
+            self._curve = self._compute_curve()
+        return self._curve
+
+    def _compute_curve(self):
+        x = np.linspace(self.lo, self.hi, KDE_GRIDSIZE)
+        bw = self.std * self.n ** (-1 / 5)  # quy tắc Scott (scipy gaussian_kde mặc định)
+        if bw <= 0 or self.hi <= self.lo:
+            return x, np.zeros_like(x)
+        delta = (self.hi - self.lo) / (FINE_GRID - 1)
+        half = min(FINE_GRID - 1, int(np.ceil(8 * bw / delta)))
+        offsets = np.arange(-half, half + 1) * delta
+        kernel = np.exp(-0.5 * (offsets / bw) ** 2) / (bw * np.sqrt(2 * np.pi))
+        size = 1 << int(np.ceil(np.log2(FINE_GRID + len(kernel) - 1)))  # đệm 0 -> tích chập tuyến tính, không vòng
+        conv = np.fft.irfft(np.fft.rfft(self.fine, size) * np.fft.rfft(kernel, size), size)
+        density = conv[half:half + FINE_GRID] / self.n
+        grid = np.linspace(self.lo, self.hi, FINE_GRID)
+        y = np.interp(x, grid, np.maximum(density, 0.0))
+        return x, y * self.n * (self.edges[1] - self.edges[0])
+
+
+class CorrArtifact:
+    # Moment của các dòng không thiếu giá trị ở mọi cột số (giống select_dtypes(number).dropna().corr())
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        values = frame.to_numpy(dtype=np.float64)
+        self.shift = values.mean(axis=0) if len(values) else np.zeros(len(self.columns))
+        self.n = 0
+        self.s1 = np.zeros(len(self.columns))
+        self.s2 = np.zeros((len(self.columns), len(self.columns)))
+        self.add(frame)
+
+    def add(self, frame):
+        centered = frame.to_numpy(dtype=np.float64) - self.shift
+        self.n += len(centered)
+        self.s1 += centered.sum(axis=0)
+        self.s2 += centered.T @ centered
+
+    def matrix(self):
+        if self.n < 2:
+            return pd.DataFrame(np.nan, index=self.columns, columns=self.columns)
+        cov = (self.s2 - np.outer(self.s1, self.s1) / self.n) / (self.n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class EdaArtifacts:
+    def __init__(self, numeric):
+        self.columns = list(numeric.columns)
+        self.n_rows = len(numeric)
+        self.digest = _digest([numeric[c] for c in self.columns])
+        self.updates = 0  # số lần cộng dồn dòng mới (0 = tính đầy đủ)
+        self.price = self.log_price = None
+        self.corr = None
+        self._build(numeric)
+
+    @staticmethod
+    def _price_values(numeric):
+        price = numeric["Giá"].dropna().to_numpy(dtype=np.float64) if "Giá" in numeric.columns else np.empty(0)
+        return price[price > 0]
+
+    def _build(self, numeric):
+        price = self._price_values(numeric)
+        if len(price):
+            self.price = SeriesArtifact(price)
+            self.log_price = SeriesArtifact(np.log1p(price))
+        complete = numeric.dropna()
+        if len(complete) and len(self.columns) >= 2:
+            self.corr = CorrArtifact(complete)
+
+    def try_append(self, numeric):
+        # numeric = toàn bộ dataset mới; True nếu n_rows dòng đầu trùng với dataset cũ và đã cộng dồn phần thêm
+        if list(numeric.columns) != self.columns or len(numeric) <= self.n_rows:
+            return False
+        if _digest([numeric[c].iloc[:self.n_rows] for c in self.columns]) != self.digest:
+            return False
+        tail = numeric.iloc[self.n_rows:]
+        price = self._price_values(tail)
+        if self.price is None or not self.price.covers(price) or not self.log_price.covers(np.log1p(price)):
+            return False  # giá trị mới ngoài khoảng bin cũ -> để tính lại đầy đủ
+        complete = tail.dropna()
+        if len(complete) and self.corr is None:
+            return False
+        self.price.add(price)
+        self.log_price.add(np.log1p(price))
+        if len(complete):
+            self.corr.add(complete)
+        self.n_rows = len(numeric)
+        self.digest = _digest([numeric[c] for c in self.columns])
+        self.updates += 1
+        return True
+
+    def correlation(self):
+        return self.corr.matrix() if self.corr is not None else None
+
+
+_memo = OrderedDict()  # dataset fingerprint -> EdaArtifacts
+_memo_lock = threading.Lock()
+
+
+def eda_artifacts(df):
+    fp = dataset_fingerprint(df)
+    with _memo_lock:
+        cached = _memo.get(fp)
+        if cached is not None:
+            _memo.move_to_end(fp)
+            return cached
+        previous = list(_memo.items())
+    numeric = cleaned_dataset(df).select_dtypes(include=np.number)
+    artifacts = None
+    for old_fp, old in reversed(previous):
+        # dataset mới = dataset cũ + dòng thêm ở cuối -> copy rồi cộng dồn (entry cũ vẫn dùng được cho session khác)
+        candidate = copy.deepcopy(old)
+        if candidate.try_append(numeric):
+            artifacts = candidate
+            break
+    if artifacts is None:
+        artifacts = EdaArtifacts(numeric)
+    with _memo_lock:
+        _memo[fp] = artifacts
+        _memo.move_to_end(fp)
+        while len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return artifacts
+
+
+def clear_memo():
+    with _memo_lock:
+        _memo.clear()
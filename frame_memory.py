@@ -0,0 +1,161 @@
+# frame_memory.py
+# Biểu diễn gọn cho dataset làm việc (giữ 1 bản trong process, mọi session dùng chung, chỉ đọc):
+# - 6 cột thông số xe -> category (mã số nguyên + bảng giá trị, dictionary trong Arrow).
+# - Cột số nguyên (id, Số Km đã đi, Năm đăng ký / Giá sau làm sạch, ...) -> kiểu int nhỏ nhất vừa;
+#   cột chuỗi chỉ gồm số nguyên cũng được đổi, cột có chữ (vd "trước năm 1980", "66.000.000 đ") giữ nguyên.
+# - Không copy: pandas Copy-on-Write -> trang nào cần thêm / thay cột thì copy(deep=False) là đủ, frame chung không bị sửa.
+# - memory_report(): byte / session trước (mỗi session 1 bản copy object dtype) và sau (bản gọn dùng chung).
+# - active_sessions(): đếm session đã register_session() ở đầu rerun mà Runtime.is_active_session (API public) còn
+#   coi là đang mở; không hỏi được Runtime thì ghi log 1 lần thay vì lặng lẽ trả 1.
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLS = ['Thương hiệu', 'Dòng xe', 'Tình trạng', 'Loại xe', 'Dung tích xe', 'Xuất xứ']
+CATEGORY_MAX_RATIO = 0.5  # nhiều giá trị khác nhau hơn tỷ lệ này thì category không còn gọn hơn chuỗi
+
+log = logging.getLogger(__name__)
+
+
+def compact_integers(series, nullable=True):
+    # Toàn số nguyên -> int nhỏ nhất vừa (Int* nullable nếu có ô trống, nullable=False thì giữ float);
+    # có chữ / số thập phân -> giữ nguyên
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        values = series
+    else:
+        values = pd.to_numeric(series, errors="coerce")
+        if values.notna().sum() != series.notna().sum():
+            return series
+        non_null = values.dropna()
+        if not len(non_null) or not (non_null == np.floor(non_null)).all():
+            return series
+    if values.hasnans:
+        if not nullable:
+            return series
+        peak = values.abs().max()
+        for dtype, limit in (("Int16", np.iinfo(np.int16).max), ("Int32", np.iinfo(np.int32).max)):
+            if peak <= limit:
+                return values.astype(dtype)
+        return values.astype("Int64")
+    return pd.to_numeric(values.astype(np.int64), downcast="integer")
+
+
+def compact_frame(df, integer_cols=None, nullable=True):
+    # Trả về frame mới (cột không đổi dùng chung buffer với df); gọi lại trên frame đã gọn thì gần như không tốn gì.
+    # nullable=False: cột số có NaN giữ nguyên float (frame sạch còn fillna bằng median không nguyên)
+    out = df.copy(deep=False)
+    for col in CATEGORY_COLS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            if out[col].nunique() <= max(1, CATEGORY_MAX_RATIO * len(out)):
+                out[col] = out[col].astype("category")
+    numeric_like = integer_cols if integer_cols is not None else [
+        c for c in out.columns if c not in CATEGORY_COLS and (pd.api.types.is_numeric_dtype(out[c]) or c in ('Giá', 'Năm đăng ký'))]
+    for col in numeric_like:
+        if col in out.columns:
+            out[col] = compact_integers(out[col], nullable)
+    return out
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def _object_bytes(df):
+    # Kích thước nếu mọi cột không phải số là object dtype (cách đọc mặc định cũ)
+    legacy = df.copy(deep=False)
+    for col in legacy.columns:
+        if not pd.api.types.is_numeric_dtype(legacy[col]) or isinstance(legacy[col].dtype, pd.CategoricalDtype):
+            legacy[col] = legacy[col].astype(object)
+        elif not pd.api.types.is_float_dtype(legacy[col]):
+            legacy[col] = legacy[col].astype(np.float64 if legacy[col].hasnans else np.int64)
+    return frame_bytes(legacy)
+
+
+_sessions = set()  # id session đã chạy script trong process, bỏ khi Runtime báo không còn active
+_sessions_lock = threading.Lock()
+_lookup_failed = False
+
+
+def _runtime():
+    # Runtime Streamlit đang chạy; None khi chạy ngoài server (script, AppTest)
+    from streamlit.runtime import Runtime
+    return Runtime.instance() if Runtime.exists() else None
+
+
+def _prune(runtime):
+    # Bỏ các session đã đóng (gọi khi đang giữ _sessions_lock); False nếu Runtime không trả lời được
+    global _lookup_failed
+    try:
+        inactive = [s for s in _sessions if not runtime.is_active_session(s)]
+    except (AttributeError, TypeError) as e:
+        if not _lookup_failed:
+            _lookup_failed = True
+            log.warning("active_sessions: không hỏi được Runtime.is_active_session (%s), "
+                        "báo cáo bộ nhớ / session tính như chỉ có 1 session", e)
+        _sessions.clear()
+        return False
+    _sessions.difference_update(inactive)
+    return True
+
+
+def register_session(session):
+    # Gọi ở đầu mỗi rerun (demo_streamlit)
+    runtime = _runtime()
+    if runtime is None:
+        return
+    with _sessions_lock:
+        _sessions.add(session)
+        _prune(runtime)
+
+
+def active_sessions():
+    # Số session Streamlit đang mở (1 khi chạy ngoài server hoặc không hỏi được Runtime)
+    runtime = _runtime()
+    if runtime is None:
+        return 1
+    with _sessions_lock:
+        return max(1, len(_sessions)) if _prune(runtime) else 1
+
+
+class MemoryReport:
+    def __init__(self, raw_before, clean_before, raw_after, clean_after):
+        self.raw_before = raw_before
+        self.clean_before = clean_before
+        self.raw_after = raw_after
+        self.clean_after = clean_after
+
+    def per_session(self, sessions):
+        # trước: mỗi session giữ 1 bản copy raw + 1 bản sạch; sau: bản gọn dùng chung chia đều cho các session
+        before = self.raw_before + self.clean_before
+        after = (self.raw_after + self.clean_after) / max(1, sessions)
+        return before, after
+
+    def table(self, sessions):
+        before, after = self.per_session(sessions)
+        return pd.DataFrame({
+            "Trước (object, copy / session)": [self.raw_before, self.clean_before, before, before * sessions],
+            "Sau (gọn, dùng chung)": [self.raw_after, self.clean_after, after, self.raw_after + self.clean_after],
+        }, index=["Dataset gốc", "Dataset đã làm sạch", f"Mỗi session ({sessions} session)", "Tổng process"])
+
+
+_reports = {}  # dataset fingerprint -> MemoryReport
+_reports_lock = threading.Lock()
+
+
+def memory_report(df, cleaned, fp):
+    # fp = preprocessing.dataset_fingerprint(df): đo 1 lần / dataset
+    with _reports_lock:
+        report = _reports.get(fp)
+    if report is None:
+        # frame sạch là shallow copy của frame gốc: chỉ các cột đã làm sạch (đổi kiểu) là bộ nhớ riêng
+        own_cols = [c for c in cleaned.columns if c not in df.columns or cleaned[c].dtype != df[c].dtype]
+        report = MemoryReport(_object_bytes(df), _object_bytes(cleaned), frame_bytes(df), frame_bytes(cleaned[own_cols]))
+        with _reports_lock:
+            if len(_reports) >= 8:
+                _reports.clear()
+            _reports[fp] = report
+    return report
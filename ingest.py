@@ -0,0 +1,135 @@
+# ingest.py
+# Đọc file upload (CSV / XLSX / Parquet) cho sidebar:
+# - Nhận dạng định dạng theo magic bytes (không tin đuôi file), kiểm tra header trước: thiếu cột bắt buộc thì
+#   báo lỗi ngay, không parse cả file.
+# - Chỉ đọc các cột model dùng (scoring.REQUIRED_COLS) + 'id', với kiểu khai báo sẵn: 6 cột thông số xe là
+#   category, 'Số Km đã đi' / 'Năm đăng ký' là số nguyên nhỏ nhất vừa (giữ dạng chuỗi nếu có giá trị không phải số,
+#   để làm sạch giống hệt đọc mặc định).
+# - CSV đọc bằng pyarrow.csv (đa luồng) nếu có, không thì pandas.
+# - Memo theo nội dung file: rerun không parse lại, frame dùng chung (chỉ đọc).
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import scoring
+from frame_memory import compact_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # không có pyarrow -> đọc CSV bằng pandas
+    pa = None
+    pa_csv = None
+
+OPTIONAL_COLS = ["id"]  # khoá tin đăng, giữ lại để đối chiếu trong hàng đợi duyệt
+INTEGER_COLS = ["Giá", "Số Km đã đi", "Năm đăng ký"]  # 'Giá' thường là chuỗi "66.000.000 đ" -> giữ nguyên
+MEMO_MAX_ENTRIES = 4
+
+
+class IngestReport:
+    def __init__(self, fmt, engine, n_rows, columns, n_file_cols, parse_seconds, memory_bytes, file_bytes):
+        self.fmt = fmt
+        self.engine = engine
+        self.n_rows = n_rows
+        self.columns = columns
+        self.n_file_cols = n_file_cols
+        self.parse_seconds = parse_seconds
+        self.memory_bytes = memory_bytes
+        self.file_bytes = file_bytes
+
+    def summary(self):
+        return (f"{self.fmt.upper()} · {self.engine} · {self.n_rows:,} dòng × {len(self.columns)}/{self.n_file_cols} cột · "
+                f"{self.parse_seconds * 1000:,.0f} ms · RAM {self.memory_bytes / 1e6:,.1f} MB "
+                f"(file {self.file_bytes / 1e6:,.1f} MB)")
+
+
+def sniff_format(data, name=""):
+    if data[:4] == b"PAR1":
+        return "parquet"
+    if data[:4] == b"PK\x03\x04":  # xlsx = file zip
+        return "xlsx"
+    if data[:8] == b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1":
+        raise ValueError("File .xls (Excel 97-2003) không được hỗ trợ, hãy lưu lại dạng .xlsx hoặc .csv")
+    try:
+        data[:1 << 16].decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < (1 << 16) - 4:  # lỗi không phải do cắt giữa 1 ký tự nhiều byte
+            raise ValueError(f"Không nhận dạng được định dạng file {name} (không phải CSV UTF-8 / XLSX / Parquet)")
+    return "csv"
+
+
+def _header(data, fmt):
+    if fmt == "csv":
+        return list(pd.read_csv(io.BytesIO(data), nrows=0, encoding="utf-8-sig").columns)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(io.BytesIO(data)).schema_arrow.names)
+    return list(pd.read_excel(io.BytesIO(data), nrows=0, engine="openpyxl").columns)
+
+
+def _read_csv(data, columns):
+    if pa_csv is not None:
+        try:
+            table = pa_csv.read_csv(
+                io.BytesIO(data),
+                read_options=pa_csv.ReadOptions(use_threads=True),
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),  # mô tả nhiều dòng trong ô có ngoặc kép
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=columns,
+                    column_types={col: pa.string() for col in columns if col not in OPTIONAL_COLS},
+                    strings_can_be_null=True,  # ô trống -> NaN như pandas
+                ),
+            )
+            return table.to_pandas(), "pyarrow"
+        except pa.ArrowInvalid:
+            pass  # CSV lệch chuẩn (số cột không đều...) -> để pandas thử
+    text_cols = {col: str for col in columns if col not in OPTIONAL_COLS}
+    return pd.read_csv(io.BytesIO(data), usecols=columns, dtype=text_cols, encoding="utf-8-sig"), "pandas"
+
+
+def _read(data, fmt, columns):
+    if fmt == "csv":
+        return _read_csv(data, columns)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(io.BytesIO(data), columns=columns).to_pandas(), "pyarrow"
+    return pd.read_excel(io.BytesIO(data), usecols=columns, engine="openpyxl"), "openpyxl"
+
+
+def read_upload(data, name=""):
+    # -> (DataFrame, IngestReport); raise scoring.MissingColumnsError nếu thiếu cột bắt buộc (chỉ đọc header)
+    t0 = time.perf_counter()
+    fmt = sniff_format(data, name)
+    header = _header(data, fmt)
+    scoring.check_columns(header)
+    wanted = set(scoring.REQUIRED_COLS + OPTIONAL_COLS)
+    columns = [col for col in header if col in wanted]
+    df, engine = _read(data, fmt, columns)
+    df = compact_frame(df[columns], integer_cols=INTEGER_COLS)
+    report = IngestReport(fmt, engine, len(df), columns, len(header), time.perf_counter() - t0,
+                          int(df.memory_usage(deep=True).sum()), len(data))
+    return df, report
+
+
+_memo = OrderedDict()  # sha1 nội dung file -> (DataFrame, IngestReport)
+_memo_lock = threading.Lock()
+
+
+def load_upload(data, name=""):
+    key = hashlib.sha1(data).hexdigest()
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+            return cached
+    result = read_upload(data, name)
+    with _memo_lock:
+        _memo[key] = result
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return result
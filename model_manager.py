@@ -0,0 +1,336 @@
+# model_manager.py
+# Giữ pipeline GBR trong bộ nhớ 1 lần / process, dùng chung cho mọi session Streamlit.
+# - joblib.load chỉ chạy lại khi file model thay đổi (mtime/size).
+# - Warm-up: predict 1 dòng tổng hợp ngay sau khi load để request đầu tiên không chịu chi phí lazy-init.
+# - Ghi lại thời gian load, warm-up và bộ nhớ RSS để hiển thị trên UI.
+# - MOTOBIKE_SURROGATE=1: predict qua bảng tra chưng cất (surrogate.py) nếu file khớp đúng model, GBR làm fallback;
+#   version đổi theo surrogate -> kết quả đã lưu / cache của bản GBR thuần không bị dùng lẫn.
+# - Hot-swap (start_watcher): thread nền poll file model (+ surrogate) mỗi WATCH_INTERVAL giây; file đổi và đã ghi xong
+#   (key giữ nguyên qua 2 lần poll) -> load bản mới ở nền, smoke predict, rồi mới thay vào _states. Request đang chạy
+#   giữ object ModelState cũ tới hết; cache / kết quả đã lưu đều khoá theo version nên tự bỏ bản cũ.
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compiled_gbr import CompileError, compile_pipeline
+from surrogate import SURROGATE_PATH, LookupSurrogate, SurrogateError
+
+MODEL_PATH = "car_price_gbr_pipeline.pkl"
+# Bật/tắt đường suy luận compiled (mảng NumPy) thay cho model.predict của sklearn
+USE_COMPILED = os.environ.get("MOTOBIKE_COMPILED_GBR", "1") != "0"
+USE_SURROGATE = os.environ.get("MOTOBIKE_SURROGATE", "0") == "1"
+WATCH_INTERVAL = float(os.environ.get("MOTOBIKE_MODEL_WATCH_INTERVAL", "5"))  # 0 = tắt hot-swap
+SWAP_HISTORY = 20
+
+# Cột đầu vào dự phòng nếu pipeline không có feature_names_in_
+DEFAULT_FEATURE_COLS = ['Thương hiệu', 'Loại xe', 'Dung tích xe', 'Dòng xe', 'Xuất xứ', 'Năm đăng ký', 'Số Km đã đi']
+
+
+def rss_bytes():
+    # Bộ nhớ RSS hiện tại của process (None nếu không đo được)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class ModelState:
+    def __init__(self, path, file_key=None, model=None, error=None):
+        self.path = path
+        self.file_key = file_key
+        self.model = model
+        self.error = error
+        self.version = None  # sha1 nội dung file model (12 ký tự), dùng làm khoá cho kết quả đã lưu
+        self.teacher_version = None  # version của riêng GBR (version có thêm hậu tố khi dùng surrogate)
+        self.compiled = None
+        self.compile_error = None
+        self.surrogate = None
+        self.surrogate_error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.rss_before = None
+        self.rss_after = None
+        self.loaded_at = None
+
+    @property
+    def model_rss_delta(self):
+        if self.rss_before is None or self.rss_after is None:
+            return None
+        return self.rss_after - self.rss_before
+
+    def predict_teacher(self, X):
+        # Dùng bản compiled nếu có (kết quả giống hệt model.predict), ngược lại gọi pipeline sklearn
+        if self.compiled is not None:
+            return self.compiled.predict(X)
+        return self.model.predict(X)
+
+    def predict_teacher_one(self, row):
+        # row: dict {cột: giá trị} -> float, không cần dựng DataFrame khi có bản compiled
+        if self.compiled is not None:
+            return self.compiled.predict_one(row)
+        return float(self.model.predict(pd.DataFrame([row]))[0])
+
+    def predict(self, X):
+        if self.surrogate is not None:
+            return self.surrogate.predict(X, fallback=self.predict_teacher)
+        return self.predict_teacher(X)
+
+    def predict_one(self, row):
+        if self.surrogate is not None:
+            return self.surrogate.predict_one(row, fallback=self.predict_teacher_one)
+        return self.predict_teacher_one(row)
+
+    def summary(self):
+        if self.model is None:
+            return f"Model chưa sẵn sàng: {self.error}"
+        parts = [f"v {self.version}", f"load {self.load_seconds * 1000:,.0f} ms", f"warm-up {self.warmup_seconds * 1000:,.0f} ms"]
+        parts.append("compiled" if self.compiled is not None else "sklearn")
+        if self.surrogate is not None:
+            parts.append(self.surrogate.describe())
+        elif self.surrogate_error is not None:
+            parts.append(f"không dùng surrogate: {self.surrogate_error}")
+        if self.rss_after is not None:
+            parts.append(f"RSS {self.rss_after / 2**20:,.0f} MB")
+        if self.model_rss_delta is not None:
+            parts.append(f"(+{self.model_rss_delta / 2**20:,.1f} MB cho model)")
+        return " · ".join(parts)
+
+
+_states = {}
+_lock = threading.Lock()
+
+
+def _file_key(path):
+    st_ = os.stat(path)
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+def _state_key(abspath):
+    # model cần load lại khi file model (hoặc file surrogate, nếu bật) đổi
+    try:
+        key = _file_key(abspath)
+    except OSError:
+        return None
+    if USE_SURROGATE:
+        try:
+            return key, _file_key(os.path.abspath(SURROGATE_PATH))
+        except OSError:
+            return key, None
+    return key
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def feature_columns(model):
+    cols = getattr(model, "feature_names_in_", None)
+    return list(cols) if cols is not None else list(DEFAULT_FEATURE_COLS)
+
+
+def synthetic_row(model):
+    # Dòng tổng hợp cho warm-up: lấy median / most_frequent mà các SimpleImputer đã học,
+    # cột nào không có thống kê thì để NaN (imputer trong pipeline sẽ tự điền).
+    row = {col: np.nan for col in feature_columns(model)}
+    steps = getattr(model, "named_steps", {})
+    preprocess = steps.get("preprocess") if hasattr(steps, "get") else None
+    for _, transformer, cols in getattr(preprocess, "transformers_", []):
+        inner = getattr(transformer, "named_steps", {})
+        imputer = inner.get("imputer") if hasattr(inner, "get") else None
+        stats = getattr(imputer, "statistics_", None)
+        if stats is not None and not isinstance(cols, str):
+            row.update({c: v for c, v in zip(cols, stats) if c in row})
+    return pd.DataFrame([row])
+
+
+def _load(path):
+    abspath = os.path.abspath(path)
+    if not os.path.exists(abspath):
+        return ModelState(abspath, error=FileNotFoundError(f"Không tìm thấy model: {path}"))
+
+    state = ModelState(abspath, file_key=_state_key(abspath))
+    state.rss_before = rss_bytes()
+    t0 = time.perf_counter()
+    try:
+        state.version = state.teacher_version = _file_digest(abspath)
+        state.model = joblib.load(abspath)
+    except Exception as e:
+        state.error = e
+        return state
+    state.load_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    try:
+        warm_row = synthetic_row(state.model)
+        expected = state.model.predict(warm_row)
+    except Exception:
+        warm_row = expected = None  # warm-up lỗi không chặn app; lỗi thật sẽ hiện ở lần predict của user
+    if USE_COMPILED and expected is not None:
+        try:
+            compiled = compile_pipeline(state.model)
+            # Chỉ dùng bản compiled khi nó cho kết quả khớp sklearn trên dòng warm-up
+            if np.allclose(compiled.predict(warm_row), expected, rtol=1e-9, atol=1e-6):
+                state.compiled = compiled
+            else:
+                state.compile_error = CompileError("Kết quả compiled lệch so với model.predict.")
+        except Exception as e:
+            state.compile_error = e
+    if USE_SURROGATE:
+        _attach_surrogate(state)
+    state.warmup_seconds = time.perf_counter() - t0
+    state.rss_after = rss_bytes()
+    state.loaded_at = time.time()
+    return state
+
+
+def _attach_surrogate(state):
+    # Chỉ dùng surrogate đã qua cổng MAE và được dựng từ đúng file model đang load
+    try:
+        surrogate = LookupSurrogate.load(SURROGATE_PATH)
+        if surrogate.meta.get("teacher_version") != state.teacher_version:
+            raise SurrogateError(f"Surrogate dựng từ model {surrogate.meta.get('teacher_version')}, "
+                                 f"model hiện tại {state.teacher_version} -> chạy lại python surrogate.py")
+        if not surrogate.meta.get("metrics", {}).get("accepted"):
+            raise SurrogateError("Surrogate chưa qua cổng MAE.")
+    except Exception as e:
+        state.surrogate_error = e
+        return
+    state.surrogate = surrogate
+    state.version = f"{state.teacher_version}-s{surrogate.digest[:6]}"
+
+
+def validate_state(state):
+    # smoke test trước khi swap: predict batch + 1 dòng trên dòng tổng hợp phải ra số hữu hạn và khớp nhau
+    if state.model is None:
+        raise ValueError(f"Không load được model: {state.error}")
+    row = synthetic_row(state.model)
+    batch = np.asarray(state.predict(row), dtype=np.float64)
+    one = state.predict_one(row.iloc[0].to_dict())
+    if batch.shape != (1,) or not np.isfinite(batch).all() or not np.isclose(batch[0], one, rtol=1e-6):
+        raise ValueError(f"Smoke prediction không hợp lệ: batch {batch}, 1 dòng {one}")
+
+
+_swaps = deque(maxlen=SWAP_HISTORY)  # lịch sử swap (thành công / bị từ chối) để hiện trên UI
+_watcher = None
+
+
+def _record_swap(abspath, old, new, error=None):
+    _swaps.append({"at": time.time(), "path": abspath, "old_version": old, "new_version": new,
+                   "ok": error is None, "error": None if error is None else str(error)})
+
+
+def reload_model(path=MODEL_PATH):
+    # Load bản mới ở thread gọi hàm, chỉ thay bản đang dùng khi smoke test qua -> (ok, ModelState đang dùng)
+    abspath = os.path.abspath(path)
+    new = _load(abspath)
+    old = _states.get(abspath)
+    old_version = old.version if old is not None else None
+    try:
+        validate_state(new)
+    except Exception as e:
+        _record_swap(abspath, old_version, new.version, e)
+        return False, old if old is not None else new
+    with _lock:
+        _states[abspath] = new
+    _record_swap(abspath, old_version, new.version)
+    return True, new
+
+
+class ModelWatcher(threading.Thread):
+    def __init__(self, interval=WATCH_INTERVAL):
+        super().__init__(name="model-watcher", daemon=True)
+        self.interval = interval
+        self.paths = set()
+        self._pending = {}  # path -> key thấy ở lần poll trước, chờ 1 chu kỳ cho chắc file đã ghi xong
+        self._failed = {}  # path -> key đã load lỗi, không thử lại tới khi file đổi tiếp
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for abspath in list(self.paths):
+                try:
+                    self.poll(abspath)
+                except Exception as e:  # thread watcher không được chết vì 1 lần poll lỗi
+                    _record_swap(abspath, None, None, e)
+
+    def poll(self, abspath):
+        current = _states.get(abspath)
+        key = _state_key(abspath)
+        if current is None or key is None or key == current.file_key or key == self._failed.get(abspath):
+            self._pending.pop(abspath, None)
+            return
+        if self._pending.get(abspath) != key:
+            self._pending[abspath] = key
+            return
+        del self._pending[abspath]
+        ok, _ = reload_model(abspath)
+        if not ok:
+            self._failed[abspath] = key
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_watcher(path=MODEL_PATH, interval=WATCH_INTERVAL):
+    # Bật hot-swap cho path (gọi lại nhiều lần không sao); interval <= 0 -> giữ cách cũ: load lại đồng bộ khi file đổi
+    global _watcher
+    if interval <= 0:
+        return None
+    with _lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = ModelWatcher(interval)
+            _watcher.start()
+        _watcher.paths.add(os.path.abspath(path))
+    return _watcher
+
+
+def swap_history(path=None):
+    # Mới nhất trước; path=None -> mọi model
+    abspath = os.path.abspath(path) if path is not None else None
+    return [event for event in reversed(_swaps) if abspath is None or event["path"] == abspath]
+
+
+def get_model_state(path=MODEL_PATH):
+    # Trả về ModelState dùng chung; có watcher thì trả ngay bản đang dùng (swap diễn ra ở nền),
+    # không có thì load lại đồng bộ khi file model đổi
+    abspath = os.path.abspath(path)
+    state = _states.get(abspath)
+    watcher = _watcher
+    if state is not None and watcher is not None and watcher.is_alive() and abspath in watcher.paths:
+        return state
+    key = _state_key(abspath)
+    if state is not None and state.file_key == key:
+        return state
+    with _lock:
+        state = _states.get(abspath)
+        if state is None or state.file_key != key:
+            state = _load(abspath)
+            _states[abspath] = state
+    return state
+
+
+def peek_model_state(path=MODEL_PATH):
+    # ModelState đã load (nếu có), không load / không stat file -> trang không cần model vẫn hiện được trạng thái
+    return _states.get(os.path.abspath(path))
+
+
+def get_model(path=MODEL_PATH):
+    # Giữ đúng cặp (model, model_load_error) mà các trang đang dùng
+    state = get_model_state(path)
+    return state.model, state.error
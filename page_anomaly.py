@@ -0,0 +1,396 @@
+# page_anomaly.py
+# Trang "Phát hiện bất thường": kiểm tra 1 bài đăng (tab Người dùng) và quét dataset + hàng đợi duyệt (tab Admin).
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+import frame_memory # Dataset dạng gọn dùng chung + báo cáo bộ nhớ / session
+import perf_trace
+import review_queue # Hàng đợi duyệt cảnh báo (SQLite) dùng chung giữa các moderator
+import score_store # Lưu kết quả đã chấm để quét lại tăng dần
+import scoring # Quét anomaly theo lô (streaming)
+import segment_thresholds # Ngưỡng bất thường theo phân khúc (Hãng, Dòng xe, khoảng năm)
+import spark_scan # Quét bằng Spark local[*] (tuỳ chọn, khi có pyspark)
+import startup
+from prediction_cache import PREDICTION_CACHE, cached_predict # Cache LRU/TTL kết quả dự đoán dùng chung
+from preprocessing import cleaned_dataset, dataset_fingerprint # Làm sạch vectorized + memo theo dataset
+from ui_common import display_title_overlay, vehicle_selectors
+
+# Chế độ quét dataset ở tab Admin
+SCAN_STREAMING = "Streaming (theo lô)"
+SCAN_BATCH = "Batch (một lần)"
+SCAN_SPARK = "Spark (local)"
+
+# Cách tính ngưỡng khi quét dataset: 1 ngưỡng VND chung hoặc theo phân phối chênh lệch của từng phân khúc
+THRESHOLD_FIXED = "Cố định (VND)"
+THRESHOLD_QUANTILE = "Phân vị theo phân khúc"
+THRESHOLD_ZSCORE = "Z-score theo phân khúc"
+SEGMENT_ALERT_RATES = [0.01, 0.02, 0.05, 0.1]  # tỷ lệ cảnh báo mong muốn trong mỗi phân khúc
+
+# Hàng đợi duyệt (SQLite): lọc + sắp xếp + phân trang phía server, mỗi lần chỉ đọc / gửi đúng 1 trang
+REVIEW_PAGE_SIZES = [20, 50, 100]
+REVIEW_COUNT_CAP = 10_000  # đếm tối đa bấy nhiêu dòng khớp lọc; nhiều hơn thì hiện "10,000+" (lọc hẹp lại để xem hết)
+STATUS_ALL = "Tất cả"
+REVIEW_SORT_COLS = {"Mã duyệt": "id", "Thời gian": "created_at", "Hãng xe": "brand", "Giá thực tế": "price", "Giá dự đoán": "pred_price", "Chênh lệch": "residual", "Status": "status"}
+
+
+def highlight_pending(s):
+    return ['background-color: rgba(255, 0, 0, 0.2)' if v == 'Pending' else '' for v in s]
+
+
+def set_review_status(queue, key, review_id, status):
+    # Chạy trong on_click (trước lần rerun) -> bảng vẽ ngay sau đó đã có Status mới
+    if queue.set_status(review_id, status):
+        verb = "chấp nhận" if status == review_queue.APPROVED else "từ chối"
+        st.session_state[f"{key}_msg"] = (status, f"Đã {verb} cảnh báo mã {review_id}.")
+
+
+def review_filters(queue, source, key):
+    # Bộ lọc + sắp xếp -> tham số cho ReviewQueue.count/page (lọc bằng SQL trên index, không lọc trong pandas)
+    with st.expander("🔎 Bộ lọc & sắp xếp", expanded=False):
+        col_status, col_type, col_brand = st.columns(3)
+        with col_status:
+            status = st.selectbox("Status", [STATUS_ALL] + review_queue.STATUSES, key=f"{key}_status")
+        with col_type:
+            anomaly_types = st.multiselect("Loại bất thường", ["Quá cao", "Quá thấp"], key=f"{key}_type")
+        with col_brand:
+            brands = st.multiselect("Hãng xe", queue.distinct(source, "brand"), key=f"{key}_brand")
+        col_rmin, col_rmax, col_sort, col_dir = st.columns([1, 1, 1, 1])
+        with col_rmin:
+            residual_min = st.number_input("Chênh lệch từ (VND)", value=None, step=1_000_000, key=f"{key}_rmin")
+        with col_rmax:
+            residual_max = st.number_input("Chênh lệch đến (VND)", value=None, step=1_000_000, key=f"{key}_rmax")
+        with col_sort:
+            sort_label = st.selectbox("Sắp xếp theo", list(REVIEW_SORT_COLS), key=f"{key}_sort")
+        with col_dir:
+            descending = st.radio("Thứ tự", ["Tăng dần", "Giảm dần"], horizontal=True, key=f"{key}_dir") == "Giảm dần"
+    filters = {
+        "status": None if status == STATUS_ALL else status,
+        "anomaly_type": anomaly_types or None,
+        "brand": brands or None,
+        "residual_min": residual_min,
+        "residual_max": residual_max,
+    }
+    return filters, REVIEW_SORT_COLS[sort_label], descending
+
+
+def render_review_queue(queue, source, key, label_suffix=""):
+    filters, order_by, descending = review_filters(queue, source, key)
+    t0 = time.perf_counter()
+    total = queue.count(source, cap=REVIEW_COUNT_CAP, **filters)
+    col_size, col_page = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Số dòng / trang", REVIEW_PAGE_SIZES, key=f"{key}_size")
+    n_pages = max(1, -(-total // page_size))
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    with col_page:
+        page_no = st.number_input(f"Trang (/{n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key=f"{key}_page")
+
+    df_page = queue.page(source, limit=page_size, offset=(page_no - 1) * page_size, order_by=order_by, descending=descending,
+                         with_payload=source == review_queue.SOURCE_DATASET, **filters)
+    query_ms = (time.perf_counter() - t0) * 1000
+    if df_page.empty:
+        st.info("Không có cảnh báo nào khớp bộ lọc.")
+        return
+    # Chỉ style đúng các dòng của trang đang xem
+    st.dataframe(df_page.style.apply(highlight_pending, subset=['Status'], axis=0), use_container_width=True, hide_index=True)
+    total_text = f"{total:,}+" if total >= REVIEW_COUNT_CAP else f"{total:,}"
+    st.caption(f"{total_text} cảnh báo khớp bộ lọc · trang {page_no}/{n_pages} · truy vấn {query_ms:,.1f} ms")
+
+    st.markdown(f"##### 🔑 **CỔNG PHÊ DUYỆT{label_suffix}**")
+    col_select, col_app, col_rej = st.columns([2, 1, 1])
+    with col_select:
+        selected_id = st.selectbox("Chọn mã cảnh báo", df_page["Mã duyệt"].tolist(), key=f"{key}_select")
+    with col_app:
+        st.button(f"✅ CHẤP NHẬN{label_suffix}", key=f"{key}_app", on_click=set_review_status, args=(queue, key, selected_id, review_queue.APPROVED))
+    with col_rej:
+        st.button(f"❌ TỪ CHỐI{label_suffix}", key=f"{key}_rej", on_click=set_review_status, args=(queue, key, selected_id, review_queue.REJECTED))
+    msg = st.session_state.pop(f"{key}_msg", None)
+    if msg is not None:
+        (st.success if msg[0] == review_queue.APPROVED else st.warning)(msg[1])
+
+
+def render(df, model_state):
+    model = model_state.model
+    model_load_error = model_state.error
+
+    # Use Title Overlay for the anomaly page
+    display_title_overlay("ANOMALY DETECTION", "anomaly_detection.jpg")
+
+    if df is None:
+        st.error("⚠️ Hệ thống chưa có dữ liệu. Vui lòng **Upload File Data** ở Sidebar.")
+        return
+
+    st.write("Cơ chế: So sánh **Giá Bạn Đăng** với **Giá Tham Chiếu** của hệ thống. Chênh lệch vượt **Ngưỡng Cho Phép** sẽ kích hoạt cảnh báo.")
+
+    # Tạo 2 sub-tabs
+    tab_user, tab_admin = st.tabs(["Người dùng (Kiểm tra bài đăng)", "Admin (Quản lý cảnh báo)"])
+
+    with tab_user:
+        st.subheader("📝 **Kiểm tra trước khi đăng bài**")
+        # Inputs for user
+        try:
+            thuong_hieu_a, tinh_trang_a, dong_xe_a, loai_xe_a, dung_tich_a, xuat_xu_a = vehicle_selectors(
+                df, keys=("u1", "u3", "u2", "u4", "u5", "u6"), free_key="u_free")
+
+            col_u_num1, col_u_num2 = st.columns(2)
+            with col_u_num1:
+                nam_dk_a = st.slider("Năm đăng ký", 1980, 2025, 2015, key="u7")
+            with col_u_num2:
+                so_km_a = st.number_input("Số Km đã đi", min_value=0, max_value=500000, value=50000, step=1000, key="u8")
+        except Exception:
+            # Giữ nguyên source Code cho phần này theo yêu cầu của user
+            st.error("❌ Data mẫu bị lỗi hoặc thiếu cột thông số xe.")
+            return
+
+        gia_thuc_te = st.number_input("💲 **Giá thực tế (VND) bạn muốn đăng**", min_value=0, max_value=1_000_000_000, value=150_000_000, step=100_000)
+        residual_threshold = st.number_input("📐 **Ngưỡng Chênh Lệch Tối Đa** (VND)", min_value=0, max_value=200_000_000, value=10_000_000, step=500_000)
+
+        st.session_state.residual_threshold = residual_threshold
+
+        btn_check_user = st.button("🔥 **KÍCH HOẠT KIỂM TRA HỆ THỐNG**", type="primary")
+        if btn_check_user:
+            if model is None:
+                st.error(f"❌ Mô hình kiểm định chưa sẵn sàng ({model_load_error}).")
+            else:
+                # FIX: Thêm cột 'Khoảng giá min' với giá trị 0
+                input_row = {
+                    "Thương hiệu": thuong_hieu_a,
+                    "Dòng xe": dong_xe_a,
+                    "Tình trạng": tinh_trang_a,
+                    "Loại xe": loai_xe_a,
+                    "Dung tích xe": dung_tich_a,
+                    "Xuất xứ": xuat_xu_a,
+                    "Năm đăng ký": nam_dk_a,
+                    "Số Km đã đi": so_km_a,
+                    'Khoảng giá min': 0, # Cột bị thiếu trong lỗi
+                    "Giá": gia_thuc_te
+                }
+
+                def detect_residual_anomaly_single(row, model_state, threshold):
+                    # Giá tham chiếu lấy qua cache dùng chung với trang "Dự đoán giá"
+                    pred_price = cached_predict(model_state, row)
+                    residual = row["Giá"] - pred_price
+                    is_anom = abs(residual) > threshold
+                    return pred_price, residual, is_anom
+
+                try:
+                    with perf_trace.span("predict"):
+                        pred_price, residual, is_anom = detect_residual_anomaly_single(input_row, model_state, residual_threshold)
+                    
+                    st.markdown("### **KẾT QUẢ KIỂM ĐỊNH**")
+                    col_res1, col_res2 = st.columns(2)
+                    with col_res1:
+                        st.metric("Giá Tham Chiếu", f"{pred_price:,.0f} VND")
+                    with col_res2:
+                        delta_color = "inverse" if abs(residual) > residual_threshold else "normal"
+                        st.metric("Chênh Lệch", f"{residual:,.0f} VND", delta=f"{residual:,.0f} VND", delta_color=delta_color)
+                    
+                    anomaly_type = None
+                    if is_anom:
+                        delta = residual / 1000000
+                        if residual > 0:
+                            st.error(f"🚨 **CẢNH BÁO: GIÁ QUÁ CAO**! (Chênh **{delta:,.1f} triệu VND**). Bài đăng cần **Admin Phê Duyệt**. (Lý do: Thổi phồng giá).")
+                        else:
+                            st.error(f"🚨 **CẢNH BÁO: GIÁ QUÁ THẤP**! (Chênh **{abs(delta):,.1f} triệu VND**). Bài đăng cần **Admin Phê Duyệt**. (Lý do: Nghi vấn Lỗi nhập liệu/Gian lận).")
+                        anomaly_type = "Quá cao" if residual > 0 else "Quá thấp"
+                    else:
+                        st.success(f"✅ **GIAO DỊCH CHUẨN**: Giá nằm trong ngưỡng cho phép (± {residual_threshold:,} VND). Bài đăng được duyệt tự động.")
+
+                    # Ghi vào hàng đợi duyệt dùng chung (SQLite) thay cho list trong session_state
+                    review_queue.get_queue().add(
+                        review_queue.SOURCE_USER, thuong_hieu_a, dong_xe_a, gia_thuc_te, pred_price, residual, is_anom,
+                        anomaly_type=anomaly_type, status=review_queue.PENDING if is_anom else review_queue.APPROVED)
+                except Exception as e:
+                    st.error("❌ Lỗi trong quá trình kiểm tra. Vui lòng kiểm tra lại dữ liệu đầu vào.")
+                    # st.exception(e) # Dùng st.exception(e) để xem chi tiết lỗi nếu cần debug thêm.
+
+    with tab_admin:
+        st.subheader("🛡️ **QUẢN LÝ CẢNH BÁO**")
+
+        st.markdown("#### 1. Bài đăng **CHỜ DUYỆT** từ Người dùng")
+        queue = review_queue.get_queue()
+        if not queue.exists(review_queue.SOURCE_USER):
+            st.info("Chưa có cảnh báo nào từ người dùng.")
+        else:
+            total_anom_user = queue.count(review_queue.SOURCE_USER, cap=REVIEW_COUNT_CAP, anomalies_only=True)
+            st.write(f"Tổng số cảnh báo **Bất Thường** từ người dùng: **{total_anom_user:,}{'+' if total_anom_user >= REVIEW_COUNT_CAP else ''}**.")
+            render_review_queue(queue, review_queue.SOURCE_USER, "user_queue")
+
+        cache_stats = PREDICTION_CACHE.stats()
+        st.caption(
+            f"⚡ Cache dự đoán: {cache_stats['size']:,}/{cache_stats['maxsize']:,} mục · "
+            f"hit {cache_stats['hits']:,} · miss {cache_stats['misses']:,} ({cache_stats['hit_rate']:.0%}) · "
+            f"evict {cache_stats['evictions']:,} · hết hạn {cache_stats['expirations']:,} · "
+            f"reset do đổi model {cache_stats['invalidations']:,}"
+        )
+
+        # Dataset gọn (category / int nhỏ) giữ 1 bản / process, các trang chỉ đọc -> không còn copy theo session
+        with st.expander("🧮 Bộ nhớ dataset / session"):
+            mem_report = frame_memory.memory_report(df, cleaned_dataset(df), dataset_fingerprint(df))
+            n_sessions = frame_memory.active_sessions()
+            mem_before, mem_after = mem_report.per_session(n_sessions)
+            st.dataframe((mem_report.table(n_sessions) / 1e6).style.format("{:,.2f} MB"), use_container_width=True)
+            st.caption(f"Mỗi session: **{mem_before / 1e6:,.1f} MB → {mem_after / 1e6:,.1f} MB** ({n_sessions} session đang mở dùng chung 1 bản dataset gọn).")
+
+        # Thời gian từng giai đoạn rerun (load dữ liệu / model, làm sạch, predict, vẽ biểu đồ, ảnh), số liệu tới lần rerun trước
+        with st.expander("⏱️ Hiệu năng rerun (p50 / p95)"):
+            perf_scope = st.radio("Phạm vi", ["Cả process", "Session này"], horizontal=True, key="perf_scope")
+            perf_table = perf_trace.TRACER.table(None if perf_scope == "Cả process" else perf_trace.session_id())
+            st.dataframe(perf_table.style.format({"p50 (ms)": "{:,.1f}", "p95 (ms)": "{:,.1f}", "max (ms)": "{:,.1f}", "Tổng (s)": "{:,.2f}"}), use_container_width=True, hide_index=True)
+            last_run = perf_trace.TRACER.last_run()
+            if last_run is not None:
+                last_page, last_stages = last_run
+                st.caption(f"Lần rerun trước ({last_page}): " + " · ".join(f"{stage} {ms:,.0f} ms" for stage, ms in sorted(last_stages.items(), key=lambda item: -item[1])))
+            col_json, col_prom, col_reset = st.columns(3)
+            with col_json:
+                st.download_button("⬇️ JSON", perf_trace.TRACER.to_json(), file_name="perf_stats.json", mime="application/json", key="perf_json")
+            with col_prom:
+                st.download_button("⬇️ Prometheus", perf_trace.TRACER.to_prometheus(), file_name="motobike_perf.prom", mime="text/plain", key="perf_prom")
+            with col_reset:
+                if st.button("♻️ Xoá số liệu", key="perf_reset"):
+                    perf_trace.TRACER.reset()
+            st.caption(f"{perf_trace.TRACER.n_sessions()} session · cửa sổ {perf_trace.WINDOW} rerun gần nhất / (trang, giai đoạn)"
+                       + (f" · tự ghi {perf_trace.PROM_FILE} mỗi {perf_trace.EXPORT_INTERVAL:g} s" if perf_trace.PROM_FILE else ""))
+
+            # Cold start của process này: khởi động server, import phần dùng chung / từng trang, lần render đầu tiên
+            startup_info = startup.report()
+            st.markdown("###### 🚀 Khởi động")
+            st.dataframe(startup.table().style.format({"Giây": "{:,.2f}"}), use_container_width=True, hide_index=True)
+            first_render = startup_info["time_to_first_render_s"]
+            if first_render is not None:
+                over = first_render > startup_info["budget_s"]
+                st.caption(f"{'⚠️' if over else '✅'} Time-to-first-render **{first_render:,.1f} s** (budget {startup_info['budget_s']:g} s, "
+                           f"process bắt đầu {startup_info['process_start']}). Đo từng trang trong process mới: `python startup.py`.")
+
+        st.markdown("#### 2. Quét Anomaly trên **Dữ liệu Lớn**")
+        col_thres_mode, col_thres = st.columns([2, 1])
+        with col_thres_mode:
+            threshold_mode = st.radio("Cách tính ngưỡng", [THRESHOLD_FIXED, THRESHOLD_QUANTILE, THRESHOLD_ZSCORE], horizontal=True, key="thres_mode")
+        with col_thres:
+            if threshold_mode == THRESHOLD_QUANTILE:
+                segment_level = st.selectbox("Tỷ lệ cảnh báo / phân khúc", SEGMENT_ALERT_RATES, index=2, format_func=lambda r: f"{r:.0%}", key="seg_rate")
+            elif threshold_mode == THRESHOLD_ZSCORE:
+                segment_level = st.number_input("Ngưỡng |z|", min_value=1.0, max_value=10.0, value=3.0, step=0.5, key="seg_z")
+        admin_threshold = st.number_input("📐 Ngưỡng chênh lệch (VND) cho data load", min_value=0, max_value=200_000_000, value=st.session_state.get('residual_threshold', 10_000_000), step=500_000, key="admin_thres", disabled=threshold_mode != THRESHOLD_FIXED)
+        
+        col_mode, col_chunk, col_workers = st.columns([2, 1, 1])
+        with col_mode:
+            scan_modes = [SCAN_STREAMING, SCAN_BATCH] + ([SCAN_SPARK] if spark_scan.enabled() else [])
+            scan_mode = st.radio("Chế độ quét", scan_modes, horizontal=True, key="scan_mode")
+        with col_chunk:
+            scan_chunk_size = st.number_input("Số dòng mỗi lô", min_value=1_000, max_value=500_000, value=scoring.DEFAULT_CHUNK_SIZE, step=1_000, key="scan_chunk", disabled=scan_mode not in (SCAN_STREAMING, SCAN_SPARK))
+        with col_workers:
+            # Số process chạy predict song song (1 = tuần tự trong process Streamlit)
+            max_workers = os.cpu_count() or 1
+            scan_workers = st.number_input("Số worker (CPU)", min_value=1, max_value=max(max_workers, scoring.DEFAULT_WORKERS), value=min(scoring.DEFAULT_WORKERS, max_workers), step=1, key="scan_workers")
+        # Dòng không đổi so với lần quét trước (cùng model) lấy lại giá dự đoán đã lưu, đổi ngưỡng không cần gọi model
+        scan_incremental = st.checkbox("♻️ Quét tăng dần (chỉ dự đoán dòng mới / đã thay đổi)", value=True, key="scan_incremental")
+
+        btn_check_df = st.button("🔎 **QUÉT TOÀN BỘ DATASET**", type="secondary")
+        if btn_check_df:
+            if model is None:
+                st.error(f"❌ Mô hình kiểm định chưa sẵn sàng ({model_load_error}).")
+            else:
+                try:
+                    df_anom = None
+                    store = score_store.get_store(model_state.version) if scan_incremental else None
+                    reuse = scoring.ReuseStats()
+                    dedup = scoring.DedupStats()  # tin đăng trùng vector đặc trưng chỉ predict 1 lần
+                    # FIX: Thêm 'Khoảng giá min' vào cột yêu cầu (tự thêm = 0 nếu thiếu, thiếu cột khác thì dừng)
+                    add_price_min = scoring.check_columns(df.columns)
+                    if add_price_min:
+                        st.warning("Cột 'Khoảng giá min' bị thiếu trong file upload. Đã đặt giá trị mặc định là 0 để Pipeline hoạt động.")
+
+                    segment_rule = None
+                    if threshold_mode != THRESHOLD_FIXED:
+                        # Bảng phân khúc lưu theo (model, dataset): chỉ tính lại (1 lượt predict) khi đổi model hoặc dữ liệu
+                        with st.spinner("Đang lấy bảng phân phối chênh lệch theo phân khúc..."), perf_trace.span("segments"):
+                            segments = segment_thresholds.get_segments(scoring.frame_chunks(df, int(scan_chunk_size)), dataset_fingerprint(df)[:16], model_state, add_price_min=add_price_min, workers=int(scan_workers), store=store)
+                        method = segment_thresholds.METHOD_QUANTILE if threshold_mode == THRESHOLD_QUANTILE else segment_thresholds.METHOD_ZSCORE
+                        segment_rule = segment_thresholds.SegmentRule(segments, method, segment_level)
+                        st.caption(f"🎯 Ngưỡng {segment_rule.describe()}: {segments.n_segments():,} phân khúc (Hãng, Dòng xe, {segment_thresholds.YEAR_BAND} năm) có ≥ {segment_thresholds.MIN_SEGMENT_ROWS} tin, phân khúc nhỏ hơn dùng ngưỡng của cấp gộp.")
+
+                    if scan_mode == SCAN_STREAMING:
+                        # Streaming: lượt 1 tính mode/median, lượt 2 clean -> impute -> predict -> flag từng lô
+                        with perf_trace.span("scan"):
+                            progress = st.progress(0.0, text="Đang tính thống kê impute (mode / median)...")
+                            live_status = st.empty()
+                            live_table = st.empty()
+                            source = scoring.frame_chunks(df, int(scan_chunk_size))
+                            stats = scoring.compute_impute_stats(source)
+                            parts = []
+                            n_found = 0
+                            for done, total, anom_chunk in scoring.iter_scan(source, model_state, admin_threshold, stats=stats, add_price_min=add_price_min, workers=int(scan_workers), store=store, reuse=reuse, rule=segment_rule, dedup=dedup):
+                                if not anom_chunk.empty:
+                                    parts.append(anom_chunk)
+                                    n_found += len(anom_chunk)
+                                    live_table.dataframe(anom_chunk.head(REVIEW_PAGE_SIZES[-1]), use_container_width=True)
+                                progress.progress(done / total, text=f"Đã quét {done:,}/{total:,} dòng")
+                                live_status.write(f"Đang quét... **{n_found:,}** giao dịch bất thường tới lúc này (bảng dưới: tối đa {REVIEW_PAGE_SIZES[-1]} dòng của lô mới nhất).")
+                            live_status.empty()
+                            live_table.empty()
+                            df_anom = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+                    elif scan_mode == SCAN_SPARK:
+                        # Spark local[*]: 2 lượt chạy trên mọi core qua mapInPandas, model broadcast 1 lần / worker Python
+                        with st.spinner("Đang quét bằng Spark (local)..."), perf_trace.span("scan"):
+                            df_anom = spark_scan.scan_dataframe(df, model_state, admin_threshold, rule=segment_rule, chunk_size=int(scan_chunk_size))
+                    else:
+                        with st.spinner('Đang kiểm tra toàn bộ Data Lake...'), perf_trace.span("scan"):
+                            # Dùng lại frame sạch đã memo (shallow copy: chỉ thêm/thay cột, không đụng frame dùng chung)
+                            df_clean = cleaned_dataset(df).copy(deep=False)
+                            if add_price_min:
+                                df_clean['Khoảng giá min'] = 0
+
+                            # Fixes for prediction data quality
+                            # (gán lại cột thay vì fillna(inplace=True) để không ghi vào frame memo dùng chung)
+                            for col in ['Thương hiệu', 'Dòng xe', 'Tình trạng', 'Loại xe', 'Dung tích xe', 'Xuất xứ']:
+                                mode_val = df_clean[col].mode().iloc[0] if not df_clean[col].mode().empty else 'Unknown'
+                                df_clean[col] = df_clean[col].fillna(mode_val)
+
+                            km_median = df_clean['Số Km đã đi'].median()
+                            df_clean['Số Km đã đi'] = df_clean['Số Km đã đi'].fillna(km_median)
+                            gia_median = df_clean['Giá'].median()
+                            df_clean['Giá'] = df_clean['Giá'].fillna(gia_median)
+
+                            if df_clean.empty:
+                                st.warning("⚠️ Dataframe rỗng sau xử lý.")
+                            else:
+                                pred_prices = scoring.predict_chunk(df_clean, model_state, int(scan_workers), store, reuse, dedup)
+                                if store is not None:
+                                    store.save()
+                                df_anom = scoring.flag_chunk(df_clean, pred_prices, admin_threshold, segment_rule)
+
+                    if store is not None and reuse.total:
+                        st.caption(f"♻️ Dùng lại kết quả đã lưu cho **{reuse.reused:,}** dòng (bỏ qua predict), dự đoán mới **{reuse.predicted:,}** dòng.")
+                    if dedup.rows:
+                        st.caption(f"🧬 Dedup: {dedup.summary()}.")
+                    if int(scan_workers) > 1 and scoring.pool_error():
+                        st.warning(f"⚠️ Predict song song: {scoring.pool_error()}.")
+
+                    if df_anom is None:
+                        pass
+                    elif df_anom.empty:
+                        st.success("🎉 **SUCCESS**: Không tìm thấy giao dịch bất thường nào trong dataset này.")
+                    else:
+                        st.write(f"**KẾT QUẢ**: Tìm thấy **{df_anom.shape[0]}** giao dịch bất thường.")
+                        # Đưa vào hàng đợi duyệt: thay các cảnh báo Pending của lần quét trước (cùng dataset), giữ dòng đã duyệt
+                        n_new = queue.add_scan(df_anom, dataset_fingerprint(df)[:16])
+                        st.caption(f"📥 Đã đưa **{n_new:,}** cảnh báo mới vào hàng đợi duyệt (dòng đã duyệt trước đó được giữ nguyên).")
+
+                except scoring.MissingColumnsError as e:
+                    st.error(f"❌ {e}")
+                    return
+                except Exception as e:
+                    st.error("❌ Lỗi trong quá trình quét dataset. Vui lòng kiểm tra lại data đầu vào hoặc file model.")
+                    # st.exception(e) # Dùng st.exception(e) để xem chi tiết lỗi nếu cần debug thêm.
+
+        # Hàng đợi duyệt kết quả quét: hiển thị cả khi không bấm quét (duyệt tiếp sau rerun / từ session khác)
+        st.markdown("##### 📋 **HÀNG ĐỢI DUYỆT (DATASET)**")
+        if not queue.exists(review_queue.SOURCE_DATASET):
+            st.info("Chưa có kết quả quét dataset nào trong hàng đợi.")
+        else:
+            render_review_queue(queue, review_queue.SOURCE_DATASET, "df_queue", label_suffix=" (DF)")
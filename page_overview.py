@@ -0,0 +1,405 @@
+# page_overview.py
+# Trang "Tổng quan": mục tiêu, dữ liệu, EDA, kết quả mô hình, phân công.
+# matplotlib / seaborn chỉ trang này dùng -> được import khi trang được mở lần đầu (startup.import_page), không phải lúc khởi động app.
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import streamlit as st
+from matplotlib.colors import to_rgba
+
+import assets
+import eda_cache # Số liệu EDA (histogram, KDE, tương quan) tính sẵn theo dataset
+import perf_trace
+from ui_common import STATIC_SERVING, display_title_overlay
+
+
+# Helper function để hiển thị profile image với scaling và cropping (100x100)
+@perf_trace.traced("images")
+def display_profile_image(image_path, caption_text):
+    
+    img_src = ""
+    # CSS cho thẻ chứa 100x100 và ảnh bên trong
+    style_css = """
+        width: 100px;
+        height: 100px;
+        border-radius: 50%; /* Làm tròn để nhìn giống profile */
+        overflow: hidden;
+        margin-bottom: 10px;
+        border: 2px solid #00bcd4;
+        display: inline-block;
+    """
+    
+    # Placeholder HTML nếu không tìm thấy ảnh
+    placeholder_html = f"""
+        <div style="{style_css} background-color:#161b22; display: flex; align-items: center; justify-content: center;">
+            <p style="color: #c9d1d9; font-size: 0.8em; text-align: center;">[{caption_text}]</p>
+        </div>
+    """
+
+    if os.path.exists(image_path):
+        try:
+            # Ảnh đã cắt sẵn 100x100 WebP (tạo 1 lần / process)
+            img_src = assets.asset_src(image_path, "profile", STATIC_SERVING)
+            
+            # HTML cho ảnh, sử dụng object-fit: cover để scaling và crop
+            image_html = f"""
+                <div style="{style_css}">
+                    <img src="{img_src}" style="width: 100%; height: 100%; object-fit: cover;">
+                </div>
+            """
+            st.markdown(image_html, unsafe_allow_html=True)
+            return
+            
+        except Exception:
+            # Fallback nếu có lỗi Base64
+            pass
+            
+    # Hiển thị Placeholder nếu ảnh không tồn tại hoặc lỗi
+    st.markdown(placeholder_html, unsafe_allow_html=True)
+
+# Sơ đồ cho st.image: bytes WebP đã nén lại (Streamlit phục vụ qua media URL, không nhúng vào HTML)
+@perf_trace.traced("images")
+def diagram_image(image_path):
+    return assets.get_asset(image_path, "diagram").data
+
+
+def plot_hist_kde(ax, artifact, color):
+    # Vẽ lại histogram + KDE từ số liệu đã cache (thay cho sns.histplot(bins=50, kde=True) trên toàn bộ dữ liệu)
+    edges = artifact.edges
+    ax.bar(edges[:-1], artifact.counts, width=np.diff(edges), align='edge', color=to_rgba(color, 0.5), edgecolor='black', linewidth=0.5)
+    x, y = artifact.kde_curve()
+    ax.plot(x, y, color=color)
+
+
+def render(df, model_state=None):
+    
+    # Notes for the title page (bottom right, left aligned internally, bỏ dấu **)
+    notes_content = """
+    Giảng viên: Khuat Thuy Phuong<br>
+    Nhóm 6: Tran Thien Thanh & Nguyen Quoc Thinh<br>
+    Ngày báo cáo: 29/11/2025
+    """
+    
+    # Use Title Overlay for the main page with line break in title (xuống hàng sau Project:, dòng 2 không wrap)
+    display_title_overlay(
+        "Final Data Science Project:<br><span style='white-space: nowrap;'>Price Prediction and Anomaly Detection</span>", 
+        "hero_bike.jpg", 
+        notes_html=notes_content
+    )
+    
+    # Define main tabs
+    tab_titles = ["Mục tiêu nghiệp vụ", "Thu thập dữ liệu", "EDA", "SKlearn", "Pyspark", "Phân công công việc", "Bài học kinh nghiệm"]
+    tabs = st.tabs(tab_titles)
+
+    # --- 1. Mục tiêu nghiệp vụ ---
+    with tabs[0]:
+        st.header("🎯 Mục tiêu nghiệp vụ")
+        
+        st.markdown("""
+        Dự án xây dựng hai tính năng cốt lõi dựa trên Machine Learning để nâng cao độ tin cậy và minh bạch cho nền tảng giao dịch xe máy cũ: 
+        """)
+        
+        st.markdown("##### 💰 1. Định Giá Thị Trường (Price Prediction)")
+        st.markdown("""
+        * **Mục tiêu**: Phát triển mô hình hồi quy (Regression Model) để ước tính **Giá Tham Chiếu Công Bằng** (Fair Market Price) cho xe máy cũ.
+        * **Giá trị**: Giúp người bán định giá hợp lý, người mua có cơ sở tham khảo chính xác.
+        """)
+        
+        st.markdown("##### 🚨 2. Cảnh Báo Gian Lận (Anomaly Detection)")
+        st.markdown("""
+        * **Mục tiêu**: Sử dụng các phương pháp thống kê hoặc học máy (dựa trên residual của mô hình giá) để xác định các giao dịch có giá **quá thấp** (nguy cơ lừa đảo, lỗi nhập liệu) hoặc **quá cao** (thổi phồng giá).
+        * **Giá trị**: Tăng cường **Độ Tin Cậy** và **Minh Bạch** của sàn giao dịch.
+        """)
+        
+        st.markdown("---")
+        st.subheader("Phạm vi & Công nghệ")
+        st.info("""
+        * **Phạm vi Data**: Dữ liệu giao dịch xe máy cũ tại TP.HCM.
+        * **Công nghệ ML**: Thử nghiệm và so sánh giữa thư viện **Scikit-learn (SKlearn)** và **PySpark MLlib** để đánh giá hiệu suất trên tập dữ liệu.
+        """)
+
+
+    # --- 2. Thu thập dữ liệu ---
+    with tabs[1]:
+        st.header("🛠️ Thu thập dữ liệu")
+        st.markdown("""
+        Dữ liệu được thu thập thông qua Web Scraping từ một nền tảng giao dịch xe máy cũ lớn, tập trung vào thị trường **TP.HCM**.
+        
+        ### 📊 Tóm tắt Data Set
+        """)
+        st.info("""
+        * **Kích thước ban đầu**: 7208 rows và 18 columns.
+        * **Các cột chính**: `Giá` (Target), `Thương hiệu`, `Dòng xe`, `Năm đăng ký`, `Số Km đã đi`, `Tình trạng`, `Loại xe`, `Dung tích xe`, `Xuất xứ`.
+        * **Định dạng thô**: Các cột `Giá`, `Năm đăng ký`, `Số Km đã đi` cần được xử lý/chuẩn hóa vì chứa chuỗi ký tự không phải số (`trước năm 1980`, đơn vị tiền tệ, v.v.).
+        """)
+        st.subheader("🧹 Data Cleaning")
+        st.code("""
+# Xử lý cột 'Giá'
+df["Giá"] = df["Giá"].astype(str).str.replace(r"[^0-9]", "", regex=True)
+df["Giá"] = pd.to_numeric(df["Giá"], errors="coerce")
+
+# Xử lý cột 'Năm đăng ký'
+df["Năm đăng ký"] = df["Năm đăng ký"].apply(
+    lambda x: 1980 if "trước" in str(x).lower() else x
+)
+df["Năm đăng ký"] = pd.to_numeric(df["Năm đăng ký"], errors="coerce").fillna(1980)
+
+# Xử lý Outlier: IQR method được áp dụng cho cột 'Giá' và 'Số Km đã đi' để loại bỏ các giá trị cực đoan.
+""", language='python')
+
+
+    # --- 3. EDA (Exploratory Data Analysis) ---
+    with tabs[2]:
+        st.header("🔍 EDA - Phân tích Dữ liệu Khám phá")
+        st.markdown("""
+        Phân tích EDA nhằm hiểu rõ phân bố dữ liệu, tìm kiếm mối quan hệ giữa các biến, và phát hiện outliers.
+        """)
+        
+        # Tạo Biểu đồ 1: Phân bố Giá (Log Transformed)
+        st.subheader("1. 📈 Phân bố biến mục tiêu (Giá)")
+        if df is not None and 'Giá' in df.columns:
+            # Histogram / KDE / tương quan tính sẵn 1 lần theo fingerprint dataset (chỉ Giá > 0, bỏ NaN),
+            # rerun chỉ vẽ lại từ các mảng nhỏ đã cache
+            with perf_trace.span("preprocess"):
+                eda = eda_cache.eda_artifacts(df)
+            
+            if eda.price is not None:
+                with perf_trace.span("render_chart"):
+                    fig, ax = plt.subplots(1, 2, figsize=(12, 4))
+                
+                    # Plot 1: Original Distribution (Price)
+                    plot_hist_kde(ax[0], eda.price, color='#00e5ff')
+                    ax[0].set_title('Phân bố Giá gốc (Lệch phải)', color='white')
+                    ax[0].tick_params(colors='white')
+                    ax[0].set_xlabel('Giá (VND)', color='white')
+                    ax[0].set_ylabel('Tần suất', color='white')
+
+                    # Plot 2: Log-Transformed Distribution
+                    plot_hist_kde(ax[1], eda.log_price, color='#00bcd4')
+                    ax[1].set_title('Phân bố Log Giá (Gần chuẩn)', color='white')
+                    ax[1].tick_params(colors='white')
+                    ax[1].set_xlabel('Log(Giá)', color='white')
+                    ax[1].set_ylabel('Tần suất', color='white')
+                
+                    # Theme adjustments for dark mode
+                    fig.patch.set_facecolor('#0d1117')
+                    ax[0].set_facecolor('#161b22')
+                    ax[1].set_facecolor('#161b22')
+                    ax[0].spines['top'].set_color('white')
+                    ax[0].spines['bottom'].set_color('white')
+                    ax[0].spines['left'].set_color('white')
+                    ax[0].spines['right'].set_color('white')
+                    ax[1].spines['top'].set_color('white')
+                    ax[1].spines['bottom'].set_color('white')
+                    ax[1].spines['left'].set_color('white')
+                    ax[1].spines['right'].set_color('white')
+                
+                    plt.tight_layout()
+                    st.pyplot(fig)
+                st.info("Biểu đồ cho thấy cột Giá gốc bị lệch phải nghiêm trọng, việc Log-Transformation giúp phân bố gần Normal hơn, rất quan trọng cho các mô hình hồi quy tuyến tính.")
+            else:
+                st.warning("Không đủ dữ liệu hợp lệ (Giá > 0) để vẽ biểu đồ.")
+        else:
+            st.warning("Dataframe không được tải hoặc thiếu cột 'Giá'.")
+
+        
+        # Tạo Biểu đồ 2: Ma trận Tương quan (Correlation Heatmap)
+        st.subheader("2. 🔗 Ma trận Tương quan giữa các biến Số")
+        numerical_cols = ['Giá', 'Năm đăng ký', 'Số Km đã đi']
+        if df is not None and all(col in df.columns for col in numerical_cols):
+            with perf_trace.span("preprocess"):
+                corr_matrix = eda_cache.eda_artifacts(df).correlation()
+            
+            if corr_matrix is not None:
+                
+                with perf_trace.span("render_chart"):
+                    fig_corr, ax_corr = plt.subplots(figsize=(8, 6))
+                    sns.heatmap(
+                        corr_matrix, 
+                        annot=True, 
+                        cmap='coolwarm', 
+                        fmt=".2f", 
+                        linewidths=.5, 
+                        linecolor='#0d1117',
+                        cbar_kws={'label': 'Hệ số tương quan'},
+                        ax=ax_corr
+                    )
+                    ax_corr.set_title('Ma trận Tương quan', color='white')
+                    fig_corr.patch.set_facecolor('#0d1117')
+                    ax_corr.set_facecolor('#161b22')
+                    ax_corr.tick_params(colors='white')
+                
+                    plt.tight_layout()
+                    st.pyplot(fig_corr)
+                st.info("Ma trận tương quan cho thấy 'Giá' có mối tương quan âm mạnh với 'Năm đăng ký' (xe càng cũ, giá càng giảm) và 'Số Km đã đi' (chạy càng nhiều, giá càng giảm).")
+            else:
+                st.warning("Không đủ biến số hợp lệ để tính toán ma trận tương quan.")
+        else:
+            st.warning("Dataframe không được tải hoặc thiếu các cột số cần thiết.")
+
+        st.markdown("---")
+
+
+    # --- 4. SKlearn (Traditional ML) ---
+    with tabs[3]:
+        st.header("⚙️ SKlearn - Mô hình Machine Learning Truyền thống")
+        
+        tab_sk_pred, tab_sk_anom = st.tabs(["Mô hình Dự đoán Giá (Regression)", "Mô hình Phát hiện Bất thường (Anomaly)"])
+        
+        with tab_sk_pred:
+            st.subheader("🤖 Dự đoán Giá (Regression)")
+            st.markdown("""
+            Thử nghiệm 4 mô hình hồi quy phổ biến sau khi tiền xử lý dữ liệu (Log-Transformation, Scaling, One-Hot Encoding).
+            """)
+            
+            # Bảng so sánh mô hình SKlearn (Giữ nguyên)
+            st.table(
+            pd.DataFrame({
+                "Mô hình": ["Linear Regression", "Random Forest Regressor", "**Gradient Boosting Regressor (GBR)**", "XGBoost Regressor"],
+                "RMSE (triệu VND)": ["9.39", "8.92", "**8.86**", "8.81"],
+                "MAE (triệu VND)": ["5.88", "5.42", "**5.22**", "5.29"],
+                "R²": ["0.62", "0.66", "**0.66**", "0.66"],
+                "Ghi chú": ["Cơ bản", "Tốt", "**Tốt nhất MAE**", "Tốt, nhanh"]
+            })
+            )
+            st.success("""
+            **Kết luận & Lựa chọn**: **Gradient Boosting Regressor (GBR)** được chọn để triển khai API/GUI. Mặc dù RMSE hơi cao hơn XGBoost, nhưng **MAE (Sai số tuyệt đối trung bình)** thấp nhất (**5.22 triệu VND**) cho thấy mô hình dự đoán giá chính xác hơn đối với phần lớn giao dịch.
+            """)
+            
+            # Hình ảnh sơ đồ Pipeline
+            if os.path.exists("ml_pipeline.jpg"):
+                 st.image(diagram_image("ml_pipeline.jpg"), caption="ML Pipeline Architecture", use_container_width=True)
+            else:
+                 # FIX: Sử dụng triple quotes
+                 st.markdown("""<div style="background-color:#161b22; height: 150px; border-radius: 10px; border: 2px dashed #00bcd4; display: flex; align-items: center; justify-content: center;"><h5 style="color: #c9d1d9;">[PLACEHOLDER: ml_pipeline.jpg - Sơ đồ quy trình ML]</h5></div>""", unsafe_allow_html=True)
+
+
+        with tab_sk_anom:
+            st.subheader("⚠️ Phát hiện Bất thường (Anomaly Detection)")
+            st.markdown("""
+            **Phương pháp Residual-based**: Sử dụng mô hình **GBR** đã huấn luyện để ước tính giá trị thị trường $ \hat{y} $ của một giao dịch. Bất thường được phát hiện dựa trên độ lớn của **phần dư (residual)**: $ |y - \hat{y}| $.
+            """)
+            st.code(r"Anomaly = True \text{ if } |Giá thực tế - Giá dự đoán| > Threshold", language='text')
+            st.info("""
+            * **Phần dư Dương ($y - \hat{y} > 0$):** Giá thực tế **cao hơn** giá thị trường -> **Cảnh báo giá quá cao** (thổi phồng/xe hiếm).
+            * **Phần dư Âm ($y - \hat{y} < 0$):** Giá thực tế **thấp hơn** giá thị trường -> **Cảnh báo giá quá thấp** (lỗi nhập liệu/gian lận).
+            * **Ngưỡng ($Threshold$)**: Được đặt bằng **1.5 lần độ lệch chuẩn (Standard Deviation)** của residuals trên tập Train/Validation để xác định một giao dịch là bất thường.
+            """)
+
+
+    # --- 5. Pyspark (Big Data ML) ---
+    with tabs[4]:
+        st.header("☁️ PySpark - Xử lý & Mô hình PySpark MLlib")
+        st.markdown("""
+        PySpark được sử dụng để mô phỏng khả năng mở rộng xử lý dữ liệu (ETL) và huấn luyện mô hình trên môi trường Big Data (Spark Cluster).
+        """)
+        tab_spark_pred, tab_spark_anom = st.tabs(["Mô hình Dự đoán Giá (Regression)", "Mô hình Phát hiện Bất thường (Anomaly)"])
+        
+        with tab_spark_pred:
+            st.subheader("🚀 Dự đoán Giá (PySpark Regression)")
+            st.markdown("""
+            Thử nghiệm với các mô hình PySpark MLlib sau khi xử lý dữ liệu bằng **VectorAssembler**, **StringIndexer** và **OneHotEncoder**.
+            """)
+            
+            # Bảng so sánh mô hình PySpark (Giữ nguyên)
+            st.table(
+            pd.DataFrame({
+                "Mô hình": ["Linear Regression (PySpark)", "Decision Tree Regressor", "**Gradient Boosted Tree Regressor (GBT)**", "Random Forest Regressor"],
+                "RMSE (triệu VND)": ["10.21", "10.05", "**8.95**", "9.01"],
+                "MAE (triệu VND)": ["6.15", "6.12", "**5.30**", "5.45"],
+                "Ghi chú": ["Hiệu suất thấp", "Tốt", "**Tốt nhất PySpark**", "Tốt"]
+            })
+            )
+            st.success("""
+            **Kết luận & Lựa chọn (PySpark)**: **Gradient Boosted Tree Regressor (GBT)** cho thấy hiệu suất cao nhất trong môi trường PySpark, với MAE là **5.30 triệu VND**, gần bằng với GBR của SKlearn. Mô hình này được chọn cho quy trình xử lý Big Data.
+            """)
+            
+            # Hình ảnh sơ đồ Big Data Workflow
+            if os.path.exists("mechanical_bg.jpg"):
+                 st.image(diagram_image("mechanical_bg.jpg"), caption="PySpark GBT Workflow", use_container_width=True)
+            else:
+                 # FIX: Sử dụng triple quotes
+                 st.markdown("""<div style="background-color:#161b22; height: 150px; border-radius: 10px; border: 2px dashed #00bcd4; display: flex; align-items: center; justify-content: center;"><h5 style="color: #c9d1d9;">[PLACEHOLDER: mechanical_bg.jpg - Sơ đồ quy trình Big Data]</h5></div>""", unsafe_allow_html=True)
+
+
+        with tab_spark_anom:
+            st.subheader("🚨 Phát hiện Bất thường (PySpark Anomaly Detection)")
+            st.markdown("""
+            **Phương pháp Residual-based**: Sử dụng mô hình **GBT (PySpark)** để tính residuals và xác định ngưỡng bất thường.
+            """)
+            st.code(r"PySpark Anomaly = True \text{ if } |Giá thực tế - GBT\_Giá dự đoán| > Threshold", language='text')
+            st.info("""
+            * **Ưu điểm PySpark**: Quá trình tính toán residuals và xác định ngưỡng (ví dụ: tính $\sigma$ của residuals) có thể được thực hiện song song trên cluster, rất hiệu quả cho lượng dữ liệu lớn.
+            """)
+
+    # --- 6. Phân công công việc ---
+    with tabs[5]:
+        st.header("👥 Phân công công việc")
+        st.markdown("""
+        Dự án được thực hiện bởi nhóm hai người với sự phân công chuyên môn hóa rõ ràng:
+        """)
+        
+        col_thanh, col_thinh = st.columns(2)
+        
+        with col_thanh:
+            st.subheader("👤 **Trần Thiện Thanh**")
+            display_profile_image("profile_thanh.jpg", "Ảnh Thanh")
+                 
+            st.markdown("""
+            * **Chuyên môn**: **Modelling** & **Deployment**.
+            * **Công việc chính**:
+                * Xây dựng và so sánh các Mô hình dự đoán **Regression** (SKlearn & PySpark).
+                * Xây dựng Mô hình **Phát hiện Bất thường** (Anomaly Detection).
+                * **Tối ưu hóa Hyperparameters** (GridSearch/RandomSearch).
+                * **Đóng gói Model** (Joblib) và tích hợp vào Streamlit App.
+            """)
+            
+        with col_thinh:
+            st.subheader("👤 **Nguyễn Quốc Thịnh**")
+            display_profile_image("profile_thinh.jpg", "Ảnh Thịnh")
+                 
+            st.markdown("""
+            * **Chuyên môn**: **Data Analysis** & **GUI/UX**.
+            * **Công việc chính**:
+                * **Thu thập dữ liệu** (Web Scraping).
+                * Thực hiện **EDA (Exploratory Data Analysis)** và Data Cleaning ban đầu.
+                * **Thiết kế giao diện người dùng (GUI)** bằng Streamlit.
+                * Đảm bảo tính **User Experience (UX)** và thẩm mỹ (Dark/Futuristic Theme).
+            """)
+            
+        st.markdown("---")
+        st.info("Sự kết hợp giữa chuyên môn ML/Deployment và Data Analysis/UX đảm bảo dự án có cả tính chính xác và tính ứng dụng cao.")
+
+    # --- 7. Learning points ---
+    with tabs[6]:
+        st.header("🧠 Bài học kinh nghiệm")
+        st.markdown("""
+        Dự án đã mang lại nhiều bài học quan trọng trong việc triển khai giải pháp ML từ A đến Z:
+        """)
+        
+        st.markdown("##### 🧪 1. Xử lý Dữ liệu Lệch (Skewed Data)")
+        st.info("""
+        * **Thử thách**: Biến Target (`Giá`) bị Right-Skewed nặng, làm giảm hiệu suất của các mô hình hồi quy tuyến tính.
+        * **Bài học**: Việc áp dụng **Log-Transformation** cho biến Target là cực kỳ quan trọng đối với các mô hình tuyến tính và ensemble tree (dù ít nhạy cảm hơn) để đạt được phân bố gần Gaussian, cải thiện đáng kể chỉ số RMSE/MAE.
+        """)
+        
+        st.markdown("##### ⚖️ 2. So sánh Công nghệ (SKlearn vs. PySpark)")
+        st.info("""
+        * **Thử thách**: Đánh giá sự cần thiết của môi trường Big Data (PySpark) so với môi trường truyền thống (SKlearn) trên một tập data trung bình.
+        * **Bài học**: Mặc dù SKlearn (Python đơn) cho kết quả **MAE tốt hơn chút ít** (5.22 triệu VND so với 5.30 triệu VND của PySpark GBT), PySpark chứng minh khả năng xử lý **Mở Rộng** (Scalability) và quy trình **ETL song song** nhanh hơn khi khối lượng data tăng lên.
+        """)
+        
+        st.markdown("##### 🎯 3. Anomaly Detection (Residual-based)")
+        st.info("""
+        * **Thử thách**: Xây dựng cơ chế phát hiện bất thường thực tế, hữu dụng cho Business.
+        * **Bài học**: Phương pháp **Residual-based** (dựa trên sự khác biệt giữa giá thực tế và giá dự đoán của mô hình Regression) là một cách tiếp cận **hiệu quả và dễ giải thích** cho Business để phát hiện các giao dịch không hợp lý so với xu hướng thị trường.
+        """)
+        
+        st.markdown("##### 🖥️ 4. Tích hợp & GUI/UX")
+        st.info("""
+        * **Thử thách**: Đóng gói mô hình và tạo giao diện trực quan, hấp dẫn cho người dùng cuối.
+        * **Bài học**: Việc sử dụng **Streamlit** giúp triển khai nhanh chóng. Thiết kế **Dark Theme & Futuristic UX** không chỉ đẹp mắt mà còn cải thiện khả năng đọc và thu hút người dùng trong môi trường ứng dụng phân tích.
+        """)
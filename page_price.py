@@ -0,0 +1,94 @@
+# page_price.py
+# Trang "Dự đoán giá": chọn thông số xe -> giá tham chiếu (qua cache dự đoán dùng chung).
+import streamlit as st
+
+import perf_trace
+from prediction_cache import cached_predict # Cache LRU/TTL kết quả dự đoán dùng chung
+from ui_common import display_title_overlay, vehicle_selectors
+
+
+def render(df, model_state):
+    model = model_state.model
+    model_load_error = model_state.error
+
+    # Use Title Overlay for the prediction page
+    display_title_overlay("PRICE PREDICTION", "price_prediction.jpg")
+
+    if df is None:
+        st.error("⚠️ Hệ thống chưa có dữ liệu. Vui lòng **Upload File Data** ở Sidebar.")
+        return
+
+    # --- Hướng dẫn cho người dùng ---
+    st.markdown("### 📋 **HƯỚNG DẪN SỬ DỤNG TÍNH NĂNG ĐỊNH GIÁ**")
+    st.info("""
+    AI sẽ tính toán **Giá Tham Chiếu Hợp Lý** (Fair Market Price) cho chiếc xe của bạn dựa trên dữ liệu thị trường đã huấn luyện.
+    
+    **Các bước:**
+    1. **Chọn** tất cả các thông số kỹ thuật (Hãng xe, Dòng xe, Tình trạng, v.v.).
+    2. **Nhập** chỉ số `Số Km đã đi` hiện tại của xe.
+    3. Nhấn nút **TÍNH TOÁN GIÁ THỊ TRƯỜNG**.
+    
+    Kết quả sẽ hiển thị **GIÁ ƯỚC TÍNH HỢP LÝ** (VND), là mức giá thị trường bạn nên tham khảo.
+    """)
+    # --- Kết thúc Hướng dẫn ---
+
+    # Inputs layout with columns
+    st.subheader("⚙️ **NHẬP THÔNG SỐ XE**")
+    try:
+        # Danh sách lựa chọn lấy từ chỉ mục dựng sẵn (không quét lại 6 cột mỗi rerun)
+        thuong_hieu, tinh_trang, dong_xe, loai_xe, dung_tich_xe, xuat_xu = vehicle_selectors(df, free_key="p_free")
+            
+        col_num1, col_num2 = st.columns(2)
+        with col_num1:
+            # Hoán đổi: Năm đăng ký -> Number Input
+            nam_dang_ky = st.number_input("Năm đăng ký", min_value=1980, max_value=2025, value=2015, step=1)
+        with col_num2:
+            # Hoán đổi: Số Km đã đi -> Slider
+            so_km_da_di = st.slider("Số Km đã đi", min_value=0, max_value=500000, value=50000, step=1000)
+
+    except Exception:
+        # Giữ nguyên source Code cho phần này theo yêu cầu của user
+        st.error("❌ Data mẫu bị lỗi hoặc thiếu cột thông số xe.")
+        return
+
+    if model is None:
+        st.warning(f"⚠️ Mô hình định giá chưa sẵn sàng ({model_load_error}).")
+
+    st.markdown("---")
+    du_doan_gia = st.button("✨ **TÍNH TOÁN GIÁ THỊ TRƯỜNG**", type="primary")
+    
+    if du_doan_gia:
+        with st.spinner('Đang phân tích dữ liệu thị trường...'):
+            if model is None:
+                st.error("❌ Không thể dự đoán vì Mô hình không load được.")
+            else:
+                # FIX: Thêm cột 'Khoảng giá min' với giá trị 0 vì nó bị thiếu trong input_data nhưng cần cho model.
+                input_data = {
+                    'Thương hiệu': thuong_hieu,
+                    'Dòng xe': dong_xe,
+                    'Tình trạng': tinh_trang,
+                    'Loại xe': loai_xe,
+                    'Dung tích xe': dung_tich_xe,
+                    'Xuất xứ': xuat_xu,
+                    'Năm đăng ký': nam_dang_ky,
+                    'Số Km đã đi': so_km_da_di,
+                    'Khoảng giá min': 0 # Cột bị thiếu trong lỗi
+                }
+                try:
+                    # Bộ thông số đã được định giá (bởi bất kỳ user nào) lấy từ cache, không gọi model
+                    with perf_trace.span("predict"):
+                        pred = cached_predict(model_state, input_data)
+                    st.markdown("### 📈 **KẾT QUẢ ĐỊNH GIÁ**")
+                    
+                    st.metric(
+                        label="GIÁ ƯỚC TÍNH HỢP LÝ (VND)",
+                        value=f"{pred:,.0f}",
+                        delta="Giá được đề xuất",
+                        delta_color="normal"
+                    )
+                    st.success(f"🔑 Giá tham chiếu cho chiếc **{thuong_hieu} {dong_xe}** là **{pred:,.0f} VND**.")
+
+                except Exception as e:
+                    # Generic error message to handle the wide variety of missing columns
+                    st.error("❌ Lỗi trong quá trình tính toán giá. Vui lòng kiểm tra lại dữ liệu đầu vào.")
+                    # st.exception(e) # Dùng st.exception(e) để xem chi tiết lỗi nếu cần debug thêm.
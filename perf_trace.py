@@ -0,0 +1,221 @@
+# perf_trace.py
+# Đo thời gian các giai đoạn của 1 lần rerun Streamlit (load dữ liệu, load model, làm sạch, predict, vẽ biểu đồ, ảnh...):
+# - begin_rerun() ở đầu script, set_page(trang) khi biết trang, end_rerun() ở cuối (hoặc trước st.stop());
+#   span("stage") bọc từng đoạn cần đo, gọi nhiều lần trong 1 rerun thì cộng dồn thành 1 mẫu / rerun.
+# - Gom theo (trang, giai đoạn) cho cả process và theo từng session; giữ WINDOW lần rerun gần nhất để tính p50 / p95
+#   (kiểu deque như scoring_service.Metrics), tổng số lần / tổng giây thì cộng dồn (cho Prometheus).
+# - Rerun bị ngắt giữa chừng (exception, rerun mới đè lên) không được ghi.
+# - Xuất JSON và Prometheus text (summary) cho monitoring; MOTOBIKE_PERF_PROM_FILE = đường dẫn file .prom
+#   (textfile collector của node_exporter) -> tự ghi lại sau mỗi rerun, tối đa 1 lần / EXPORT_INTERVAL giây.
+#   Kèm số liệu khởi động của process (startup.report: import từng phần, time-to-first-render).
+# - MOTOBIKE_PERF_TRACE=0 tắt hẳn (span không làm gì).
+import datetime
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+import startup
+
+ENABLED = os.environ.get("MOTOBIKE_PERF_TRACE", "1") != "0"
+WINDOW = int(os.environ.get("MOTOBIKE_PERF_WINDOW", "500"))  # số lần rerun gần nhất / (trang, giai đoạn) để tính phân vị
+PROM_FILE = os.environ.get("MOTOBIKE_PERF_PROM_FILE")
+EXPORT_INTERVAL = float(os.environ.get("MOTOBIKE_PERF_EXPORT_INTERVAL", "15"))
+MAX_SESSIONS = 64  # số session giữ thống kê riêng (session cũ nhất bị bỏ)
+METRIC_NAME = "motobike_stage_seconds"
+
+STAGE_RERUN = "rerun"  # cả lần chạy script, từ begin_rerun tới end_rerun
+
+
+class StageStats:
+    def __init__(self):
+        self.recent_ms = deque(maxlen=WINDOW)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        self.recent_ms.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self):
+        arr = np.fromiter(self.recent_ms, dtype=np.float64)
+        p50, p95 = np.percentile(arr, [50, 95]) if len(arr) else (np.nan, np.nan)
+        return {"count": self.count, "p50_ms": float(p50), "p95_ms": float(p95),
+                "max_ms": float(arr.max()) if len(arr) else np.nan, "total_ms": self.total_ms}
+
+
+class _Run:
+    def __init__(self, session):
+        self.page = None
+        self.session = session
+        self.started = time.perf_counter()
+        self.stages = {}  # giai đoạn -> ms cộng dồn trong lần rerun này
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # mỗi session Streamlit chạy script trong thread riêng
+        self._process = {}  # (trang, giai đoạn) -> StageStats
+        self._sessions = OrderedDict()  # session id -> {(trang, giai đoạn): StageStats}
+        self._last_runs = {}  # session id -> (trang, {giai đoạn: ms}) của lần rerun gần nhất
+        self._last_export = 0.0
+        self.started_at = time.time()
+
+    # ---------- Ghi nhận ----------
+    def begin_rerun(self, session=None):
+        self._local.run = _Run(session or session_id()) if ENABLED else None
+
+    def set_page(self, page):
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.page = page
+
+    def end_rerun(self):
+        run = getattr(self._local, "run", None)
+        if run is None:
+            return
+        self._local.run = None
+        run.stages[STAGE_RERUN] = (time.perf_counter() - run.started) * 1000
+        self._record(run)
+        if PROM_FILE and time.time() - self._last_export >= EXPORT_INTERVAL:
+            self._last_export = time.time()
+            try:
+                self.write_prometheus(PROM_FILE)
+            except OSError:
+                pass  # thư mục monitoring không ghi được thì bỏ qua, không làm hỏng trang
+
+    @contextmanager
+    def span(self, stage):
+        run = getattr(self._local, "run", None)
+        if run is None:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            run.stages[stage] = run.stages.get(stage, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def traced(self, stage):
+        # decorator: cả lời gọi hàm là 1 span
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _record(self, run):
+        page = run.page or "?"
+        with self._lock:
+            per_session = self._sessions.get(run.session)
+            if per_session is None:
+                per_session = self._sessions[run.session] = {}
+                while len(self._sessions) > MAX_SESSIONS:
+                    old, _ = self._sessions.popitem(last=False)
+                    self._last_runs.pop(old, None)
+            else:
+                self._sessions.move_to_end(run.session)
+            for stage, ms in run.stages.items():
+                self._process.setdefault((page, stage), StageStats()).add(ms)
+                per_session.setdefault((page, stage), StageStats()).add(ms)
+            self._last_runs[run.session] = (page, dict(run.stages))
+
+    def reset(self):
+        with self._lock:
+            self._process.clear()
+            self._sessions.clear()
+            self._last_runs.clear()
+            self.started_at = time.time()
+
+    # ---------- Đọc / xuất ----------
+    def _summaries(self, session=None):
+        with self._lock:
+            source = self._process if session is None else self._sessions.get(session, {})
+            return {key: stats.summary() for key, stats in source.items()}
+
+    def table(self, session=None):
+        # DataFrame (trang, giai đoạn) x (số lần, p50, p95, max, tổng); session=None -> cả process
+        rows = [{"Trang": page, "Giai đoạn": stage, "Số lần": s["count"], "p50 (ms)": s["p50_ms"],
+                 "p95 (ms)": s["p95_ms"], "max (ms)": s["max_ms"], "Tổng (s)": s["total_ms"] / 1000}
+                for (page, stage), s in self._summaries(session).items()]
+        if not rows:
+            return pd.DataFrame(columns=["Trang", "Giai đoạn", "Số lần", "p50 (ms)", "p95 (ms)", "max (ms)", "Tổng (s)"])
+        return pd.DataFrame(rows).sort_values(["Trang", "p95 (ms)"], ascending=[True, False], ignore_index=True)
+
+    def last_run(self, session=None):
+        # -> (trang, {giai đoạn: ms}) của lần rerun hoàn tất gần nhất trong session (None nếu chưa có)
+        with self._lock:
+            return self._last_runs.get(session or session_id())
+
+    def n_sessions(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def to_json(self):
+        def rows(summaries):
+            # NaN (giai đoạn chưa có mẫu) không hợp lệ trong JSON chuẩn -> null
+            return [{"page": page, "stage": stage, **{k: None if v != v else v for k, v in s.items()}}
+                    for (page, stage), s in summaries.items()]
+        with self._lock:
+            sessions = list(self._sessions)
+        payload = {
+            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "started_at": datetime.datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "window": WINDOW,
+            "process": rows(self._summaries()),
+            "sessions": {session: rows(self._summaries(session)) for session in sessions},
+            "startup": startup.report(),
+        }
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        # Chỉ số cấp process (không gắn nhãn session để không bùng số time series)
+        lines = [f"# HELP {METRIC_NAME} Thời gian từng giai đoạn rerun Streamlit theo trang (cửa sổ {WINDOW} lần gần nhất).",
+                 f"# TYPE {METRIC_NAME} summary"]
+        for (page, stage), s in sorted(self._summaries().items()):
+            labels = f'page="{prometheus_label(page)}",stage="{prometheus_label(stage)}"'
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+                lines.append(f'{METRIC_NAME}{{{labels},quantile="{quantile}"}} {s[key] / 1000:.6f}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {s['total_ms'] / 1000:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {s['count']}")
+        lines += startup.prometheus_lines()
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # ghi file tạm rồi đổi tên: collector không bao giờ đọc phải file ghi dở
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def prometheus_label(value):
+    # Escape giá trị nhãn theo định dạng text của Prometheus (\\, ", xuống dòng)
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else "local"
+    except Exception:
+        return "local"
+
+
+TRACER = Tracer()
+begin_rerun = TRACER.begin_rerun
+set_page = TRACER.set_page
+end_rerun = TRACER.end_rerun
+span = TRACER.span
+traced = TRACER.traced
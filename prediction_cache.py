@@ -0,0 +1,123 @@
+# prediction_cache.py
+# Cache LRU + TTL dùng chung cho cả process: kết quả predict theo bộ thông số xe đã chuẩn hoá
+# = đúng các cột model dùng (Hãng, Loại, Dung tích, Dòng, Xuất xứ, Năm đăng ký, Số Km); ô trống giữ riêng là None.
+# - Trang "Dự đoán giá" và tab "Người dùng" của "Phát hiện bất thường" dùng chung 1 cache.
+# - Model luôn nhận dòng đã chuẩn hoá giống key (model_row) -> 2 dòng cùng key được định giá như nhau, không phụ thuộc
+#   dòng nào được hỏi trước.
+# - Tự xoá toàn bộ khi model đổi (so model_state.version = sha1 nội dung file model, kể cả khi hot-swap).
+# - Có bộ đếm hit / miss / eviction / expiration để hiển thị ở Admin.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cột đầu vào của pipeline GBR (model_manager.DEFAULT_FEATURE_COLS); 'Tình trạng' model không dùng nên không vào key
+KEY_CAT_COLS = ['Thương hiệu', 'Loại xe', 'Dung tích xe', 'Dòng xe', 'Xuất xứ']
+KEY_NUM_COLS = ['Năm đăng ký', 'Số Km đã đi']
+
+DEFAULT_MAXSIZE = int(os.environ.get("MOTOBIKE_PRED_CACHE_SIZE", "10000"))
+DEFAULT_TTL = float(os.environ.get("MOTOBIKE_PRED_CACHE_TTL", "3600"))
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def normalize_key(row):
+    # Chuỗi: bỏ khoảng trắng thừa; số: làm tròn về int -> (2015, 50000) và (2015.0, "50000") là cùng 1 key.
+    # Thiếu / None / NaN -> None (khác hẳn 0 hay ""), model sẽ tự impute; số không đọc được -> ValueError
+    cats = tuple(None if _is_missing(row.get(col)) else str(row.get(col)).strip() for col in KEY_CAT_COLS)
+    nums = tuple(None if _is_missing(row.get(col)) else int(round(float(row.get(col)))) for col in KEY_NUM_COLS)
+    return cats + nums
+
+
+def model_row(row, key=None):
+    # Dòng đưa vào model = đúng giá trị của key (chuỗi đã strip, số đã làm tròn, thiếu -> NaN); các cột khác giữ nguyên
+    key = normalize_key(row) if key is None else key
+    out = dict(row)
+    for col, value in zip(KEY_CAT_COLS + KEY_NUM_COLS, key):
+        out[col] = float("nan") if value is None else value
+    return out
+
+
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl_seconds=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (giá trị, thời điểm hết hạn)
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at >= self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version):
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (value, self._clock() + self.ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, version):
+        value = self.get(key, version)
+        if value is None:
+            value = compute()  # tính ngoài lock để các session khác không phải chờ
+            self.put(key, value, version)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+PREDICTION_CACHE = PredictionCache()
+
+
+def cached_predict(model_state, row, cache=PREDICTION_CACHE):
+    # Giá dự đoán cho 1 xe; bộ thông số đã gặp (từ session bất kỳ) trả về ngay, không gọi model
+    key = normalize_key(row)
+    return cache.get_or_compute(key, lambda: float(model_state.predict_one(model_row(row, key))),
+                                model_state.version)
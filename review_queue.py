@@ -0,0 +1,231 @@
+# review_queue.py
+# Hàng đợi duyệt cảnh báo lưu trong SQLite (WAL): dùng chung cho mọi moderator / session, không mất khi reload.
+# - Thay cho st.session_state.anomaly_records / df_anom_records (list dict sống trong 1 tab trình duyệt).
+# - Index theo source (thứ tự id) và (source, status / brand / thời gian / chênh lệch) -> lọc + phân trang bằng LIMIT/OFFSET, không dựng cả bảng.
+# - Duyệt / từ chối = 1 câu UPDATE theo khoá chính.
+# - 1 connection / file DB / process dùng chung cho mọi thread (check_same_thread=False + lock), không mở thêm
+#   connection theo thread của từng lần rerun Streamlit.
+# - Kết quả quét dataset: quét lại cùng dataset thì thay các dòng còn Pending, giữ nguyên dòng đã duyệt.
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.environ.get("MOTOBIKE_REVIEW_DB", "review_queue.sqlite3")
+
+SOURCE_USER = "user"
+SOURCE_DATASET = "dataset"
+PENDING, APPROVED, REJECTED = "Pending", "Approved", "Rejected"
+STATUSES = [PENDING, APPROVED, REJECTED]
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# cột SQLite -> tên cột hiển thị (giống bảng cảnh báo cũ)
+DISPLAY_COLS = {
+    "id": "Mã duyệt",
+    "created_at": "Thời gian",
+    "brand": "Hãng xe",
+    "model_line": "Dòng xe",
+    "price": "Giá thực tế",
+    "pred_price": "Giá dự đoán",
+    "residual": "Chênh lệch",
+    "status": "Status",
+    "is_anomaly": "Bất thường",
+    "anomaly_type": "Bất thường loại",
+}
+SORTABLE_COLS = {"created_at", "brand", "price", "pred_price", "residual", "status", "id"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    item_key TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    brand TEXT,
+    model_line TEXT,
+    price REAL,
+    pred_price REAL,
+    residual REAL,
+    is_anomaly INTEGER NOT NULL DEFAULT 1,
+    anomaly_type TEXT,
+    status TEXT NOT NULL,
+    payload TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_reviews_item ON reviews(source, item_key);
+CREATE INDEX IF NOT EXISTS ix_reviews_source ON reviews(source);
+CREATE INDEX IF NOT EXISTS ix_reviews_status ON reviews(source, status, created_at);
+CREATE INDEX IF NOT EXISTS ix_reviews_brand_residual ON reviews(source, brand, residual);
+CREATE INDEX IF NOT EXISTS ix_reviews_created ON reviews(source, created_at);
+CREATE INDEX IF NOT EXISTS ix_reviews_residual ON reviews(source, residual);
+"""
+
+
+def _now():
+    return datetime.datetime.now().strftime(TIME_FORMAT)
+
+
+def _to_sql(value):
+    # numpy / pandas scalar -> kiểu Python mà sqlite3 hiểu; NaN -> NULL
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _json_default(value):
+    value = _to_sql(value)
+    return value if not isinstance(value, (pd.Timestamp, datetime.datetime)) else str(value)
+
+
+class ReviewQueue:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()  # tuần tự hoá các câu lệnh trên connection dùng chung
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")  # đọc không chặn ghi -> nhiều process / moderator cùng lúc
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # Giữ lock suốt transaction (thread khác không chen câu lệnh vào giữa), commit / rollback khi ra khỏi khối
+        with self._lock, self._db:
+            yield self._db
+
+    def _fetch(self, sql, params, one=False):
+        with self._lock:
+            cur = self._db.execute(sql, params)
+            return cur.fetchone() if one else cur.fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---- Ghi ----
+    def add(self, source, brand, model_line, price, pred_price, residual, is_anomaly, anomaly_type=None,
+            status=PENDING, created_at=None, item_key=None, payload=None):
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO reviews (source, item_key, created_at, brand, model_line, price, pred_price, residual,"
+                " is_anomaly, anomaly_type, status, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, item_key, created_at or _now(), _to_sql(brand), _to_sql(model_line), _to_sql(price),
+                 _to_sql(pred_price), _to_sql(residual), int(bool(is_anomaly)), anomaly_type, status,
+                 json.dumps(payload, ensure_ascii=False, default=_json_default) if payload else None))
+            return cur.lastrowid
+
+    def add_scan(self, df_anom, dataset_key):
+        # Kết quả quét 1 dataset: xoá các dòng Pending của lần quét trước (cùng dataset) rồi thêm mới;
+        # dòng đã Approved / Rejected được giữ (INSERT OR IGNORE theo item_key).
+        main = {"Thương hiệu", "Dòng xe", "Giá", "Giá dự đoán", "Chênh lệch", "Bất thường loại", "Status", "Original Index"}
+        extra_cols = [c for c in df_anom.columns if c not in main]
+        now = _now()
+        rows = []
+        for rec in df_anom.to_dict("records"):
+            payload = {c: rec[c] for c in extra_cols}
+            rows.append((SOURCE_DATASET, f"{dataset_key}:{rec['Original Index']}", now, _to_sql(rec.get("Thương hiệu")),
+                         _to_sql(rec.get("Dòng xe")), _to_sql(rec.get("Giá")), _to_sql(rec.get("Giá dự đoán")),
+                         _to_sql(rec.get("Chênh lệch")), rec.get("Bất thường loại"), rec.get("Status", PENDING),
+                         json.dumps(payload, ensure_ascii=False, default=_json_default)))
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM reviews WHERE source = ? AND status = ? AND item_key LIKE ?",
+                         (SOURCE_DATASET, PENDING, f"{dataset_key}:%"))
+            cur = conn.executemany(
+                "INSERT OR IGNORE INTO reviews (source, item_key, created_at, brand, model_line, price, pred_price,"
+                " residual, anomaly_type, status, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("PRAGMA optimize")  # cập nhật thống kê để planner chọn đúng index khi lọc
+            return cur.rowcount
+
+    def set_status(self, review_id, status):
+        if status not in STATUSES:
+            raise ValueError(f"Status không hợp lệ: {status}")
+        with self._transaction() as conn:
+            cur = conn.execute("UPDATE reviews SET status = ?, updated_at = ? WHERE id = ?",
+                               (status, _now(), int(review_id)))
+            return cur.rowcount == 1
+
+    # ---- Đọc ----
+    @staticmethod
+    def _where(source, status=None, brand=None, anomaly_type=None, residual_min=None, residual_max=None,
+               anomalies_only=False):
+        clauses, params = ["source = ?"], [source]
+        for col, value in (("status", status), ("brand", brand), ("anomaly_type", anomaly_type)):
+            if value:
+                values = [value] if isinstance(value, str) else list(value)
+                clauses.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if residual_min is not None:
+            clauses.append("residual >= ?")
+            params.append(float(residual_min))
+        if residual_max is not None:
+            clauses.append("residual <= ?")
+            params.append(float(residual_max))
+        if anomalies_only:
+            clauses.append("is_anomaly = 1")
+        return " AND ".join(clauses), params
+
+    def count(self, source, cap=None, **filters):
+        # cap: chỉ đếm tới cap dòng (UI hiện "cap+") -> thời gian không tăng theo kích thước hàng đợi
+        where, params = self._where(source, **filters)
+        if cap is None:
+            sql = f"SELECT COUNT(*) FROM reviews WHERE {where}"
+        else:
+            sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM reviews WHERE {where} LIMIT ?)"
+            params = params + [int(cap)]
+        return self._fetch(sql, params, one=True)[0]
+
+    def exists(self, source):
+        return self._fetch("SELECT 1 FROM reviews WHERE source = ? LIMIT 1", (source,), one=True) is not None
+
+    def status_counts(self, source):
+        rows = self._fetch("SELECT status, COUNT(*) FROM reviews WHERE source = ? GROUP BY status", (source,))
+        return dict(rows)
+
+    def distinct(self, source, column):
+        if column not in ("brand", "anomaly_type", "status"):
+            raise ValueError(column)
+        rows = self._fetch(
+            f"SELECT DISTINCT {column} FROM reviews WHERE source = ? AND {column} IS NOT NULL ORDER BY 1", (source,))
+        return [r[0] for r in rows]
+
+    def page(self, source, limit=50, offset=0, order_by="id", descending=False, with_payload=False, **filters):
+        # Chỉ lấy đúng 1 trang (LIMIT/OFFSET trên index), trả về DataFrame với tên cột hiển thị
+        if order_by not in SORTABLE_COLS:
+            raise ValueError(f"Không sắp xếp được theo cột: {order_by}")
+        where, params = self._where(source, **filters)
+        cols = list(DISPLAY_COLS) + (["payload"] if with_payload else [])
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(cols)} FROM reviews WHERE {where} "
+               f"ORDER BY {order_by} {direction}, id {direction} LIMIT ? OFFSET ?")
+        rows = self._fetch(sql, params + [int(limit), int(offset)])
+        df = pd.DataFrame(rows, columns=cols)
+        df["is_anomaly"] = df["is_anomaly"].astype(bool)
+        payloads = df.pop("payload") if with_payload else None
+        df = df.rename(columns=DISPLAY_COLS)
+        if payloads is not None:
+            extra = pd.DataFrame([json.loads(p) if p else {} for p in payloads], index=df.index)
+            df = pd.concat([df, extra.drop(columns=[c for c in extra.columns if c in df.columns])], axis=1)
+        return df
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(path=DB_PATH):
+    # 1 đối tượng (= 1 connection) / file DB / process, dùng chung cho mọi session
+    abspath = os.path.abspath(path)
+    with _queues_lock:
+        queue = _queues.get(abspath)
+        if queue is None:
+            queue = _queues[abspath] = ReviewQueue(abspath)
+    return queue
@@ -0,0 +1,172 @@
+# score_cli.py
+# Chấm điểm hàng loạt không cần Streamlit (chạy định kỳ, vd cron hằng đêm):
+#   python score_cli.py data.csv -o scored.parquet --threshold 10000000 --chunk-size 50000 --workers 4
+# - Đọc CSV / XLSX / Parquet theo lô, làm sạch + impute + predict + gắn cờ bằng đúng các hàm của scoring.py
+#   (cùng quy tắc với tab Admin của app).
+# - Ghi ra Parquet hoặc CSV (theo đuôi file output) từng lô một: Giá dự đoán, Chênh lệch, Bất thường loại.
+# - --segment-thresholds quantile|zscore: ngưỡng theo phân khúc (segment_thresholds) thay cho --threshold chung.
+# - --incremental: dùng lại giá dự đoán đã lưu (score_store) cho dòng không đổi, chỉ predict dòng mới / đã đổi.
+# - Mã thoát: 0 = OK, 1 = lỗi model, 2 = lỗi dữ liệu đầu vào.
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+import data_cache
+import model_manager
+import score_store
+import scoring
+import segment_thresholds
+
+
+class OutputWriter:
+    # Ghi nối từng lô ra file tạm rồi đổi tên khi xong (job lỗi giữa chừng không để lại file dở dang)
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        ext = os.path.splitext(path)[1].lower()
+        if ext in (".parquet", ".pq"):
+            self.fmt = "parquet"
+        elif ext == ".csv":
+            self.fmt = "csv"
+        else:
+            raise ValueError(f"File output phải là .parquet hoặc .csv: {path}")
+        self._writer = None
+        self._schema = None
+        self.rows = 0
+
+    @staticmethod
+    def _stable_types(df):
+        # Schema Parquet phải giống nhau giữa các lô: cột số -> float64, cột còn lại -> chuỗi
+        out = df.copy(deep=False)
+        for col in out.columns:
+            if pd.api.types.is_bool_dtype(out[col]):
+                continue
+            if pd.api.types.is_numeric_dtype(out[col]):
+                out[col] = out[col].astype("float64")
+            else:
+                out[col] = out[col].astype("string")
+        return out
+
+    def write(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self.tmp_path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(self._stable_types(df), preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            self._writer.write_table(table.cast(self._schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chấm điểm giá và phát hiện bất thường cho file tin đăng xe máy.")
+    parser.add_argument("input", help="File đầu vào (.csv, .xlsx, .parquet)")
+    parser.add_argument("-o", "--output", required=True, help="File kết quả (.parquet hoặc .csv)")
+    parser.add_argument("--model", default=model_manager.MODEL_PATH, help="Đường dẫn pipeline .pkl")
+    parser.add_argument("--threshold", type=float, default=scoring.DEFAULT_THRESHOLD,
+                        help="Ngưỡng |Giá - Giá dự đoán| (VND) để gắn cờ bất thường")
+    parser.add_argument("--segment-thresholds", choices=segment_thresholds.METHODS,
+                        help="Gắn cờ theo phân phối chênh lệch của từng phân khúc (Hãng, Dòng xe, khoảng năm)")
+    parser.add_argument("--segment-level", type=float,
+                        help="quantile: tỷ lệ cảnh báo / phân khúc (mặc định 0.05); zscore: ngưỡng |z| (mặc định 3)")
+    parser.add_argument("--chunk-size", type=int, default=scoring.DEFAULT_CHUNK_SIZE, help="Số dòng mỗi lô")
+    parser.add_argument("--workers", type=int, default=scoring.DEFAULT_WORKERS, help="Số process predict song song")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Chỉ predict dòng mới / đã đổi so với các lần chạy trước (cùng model)")
+    parser.add_argument("--anomalies-only", action="store_true", help="Chỉ ghi các dòng bất thường")
+    parser.add_argument("--quiet", action="store_true", help="Không in tiến độ")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    log = (lambda *a: None) if args.quiet else (lambda *a: print(*a, file=sys.stderr))
+
+    model_state = model_manager.get_model_state(args.model)
+    if model_state.model is None:
+        log(f"Lỗi load model: {model_state.error}")
+        return 1
+    log(f"Model: {model_state.summary()}")
+
+    try:
+        add_price_min = scoring.check_columns(scoring.read_columns(args.input))
+        source = scoring.file_chunks(args.input, args.chunk_size)
+    except (ValueError, OSError) as e:  # MissingColumnsError là ValueError
+        log(f"Lỗi dữ liệu đầu vào: {e}")
+        return 2
+
+    t0 = time.perf_counter()
+    stats = scoring.compute_impute_stats(source)
+    log(f"Lượt 1: {stats.n_rows:,} dòng, {time.perf_counter() - t0:,.1f} s")
+
+    store = score_store.get_store(model_state.version) if args.incremental else None
+    reuse = scoring.ReuseStats()
+    dedup = scoring.DedupStats()
+    rule = None
+    if args.segment_thresholds:
+        level = args.segment_level
+        if level is None:
+            level = 0.05 if args.segment_thresholds == segment_thresholds.METHOD_QUANTILE else 3.0
+        try:
+            segments = segment_thresholds.get_segments(source, data_cache.dataset_cache_key(args.input), model_state,
+                                                       stats=stats, add_price_min=add_price_min,
+                                                       workers=args.workers, store=store)
+            rule = segment_thresholds.SegmentRule(segments, args.segment_thresholds, level)
+        except ValueError as e:
+            log(f"Lỗi ngưỡng theo phân khúc: {e}")
+            return 2
+        log(f"Ngưỡng {rule.describe()} ({segments.n_segments():,} phân khúc)")
+
+    writer = OutputWriter(args.output)
+    done = anomalies = 0
+    try:
+        for scored in scoring.iter_score(source, model_state, args.threshold, stats=stats,
+                                         add_price_min=add_price_min, workers=args.workers,
+                                         store=store, reuse=reuse, rule=rule, dedup=dedup):
+            done += len(scored)
+            is_anom = scored["Bất thường loại"].notna()
+            anomalies += int(is_anom.sum())
+            writer.write(scored[is_anom] if args.anomalies_only else scored)
+            log(f"  {done:,}/{stats.n_rows:,} dòng · {anomalies:,} bất thường")
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        scoring.shutdown_pool()
+
+    elapsed = time.perf_counter() - t0
+    log(f"Xong: {done:,} dòng, {anomalies:,} bất thường, ghi {writer.rows:,} dòng -> {args.output} "
+        f"({elapsed:,.1f} s, {done / elapsed if elapsed else 0:,.0f} dòng/s)")
+    if store is not None:
+        log(f"Incremental: dùng lại {reuse.reused:,} dòng, predict mới {reuse.predicted:,} dòng")
+    if dedup.rows:
+        log(f"Dedup: {dedup.summary()}")
+    if args.workers > 1 and scoring.pool_error():
+        log(f"Cảnh báo: {scoring.pool_error()}")
+    return 0
+
+
+def main(argv=None):
+    return run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# score_store.py
+# Lưu kết quả chấm điểm theo dấu vân tay từng dòng để quét lại chỉ predict các dòng mới / đã đổi.
+# - Fingerprint = hash ổn định (uint64) của các cột đầu vào model SAU khi clean + impute và cột 'Giá',
+#   nên dòng nào có cùng fingerprint thì chắc chắn cho cùng giá dự đoán / chênh lệch.
+# - Mỗi phiên bản model (sha1 file .pkl) có 1 file Arrow riêng trong CACHE_DIR; đổi model -> bắt đầu lại từ rỗng.
+# - Đổi ngưỡng chỉ cần gắn cờ lại từ 'Chênh lệch' đã lưu, không gọi model.
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # không có pyarrow -> store chỉ sống trong bộ nhớ của process
+    pa = None
+    pa_ipc = None
+
+STORE_PREFIX = "scores-"
+
+
+def row_fingerprints(df_clean, feature_cols, price_col="Giá"):
+    # Chuẩn hoá kiểu trước khi hash: 2015 (int) và 2015.0 (float) ở 2 lô khác nhau phải ra cùng fingerprint
+    parts = {}
+    for col in list(feature_cols) + [price_col]:
+        series = df_clean[col]
+        if pd.api.types.is_numeric_dtype(series):
+            parts[col] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            parts[col] = series.astype(str)  # cột category đã impute nên không còn NaN
+    frame = pd.DataFrame(parts)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+class ScoreStore:
+    def __init__(self, model_version, directory=CACHE_DIR):
+        self.model_version = model_version
+        self.path = os.path.join(directory, f"{STORE_PREFIX}{model_version}.arrow")
+        self._lock = threading.Lock()
+        self._fps = np.empty(0, dtype=np.uint64)
+        self._preds = np.empty(0, dtype=np.float64)
+        self._residuals = np.empty(0, dtype=np.float64)
+        self._index = pd.Index(self._fps)
+        self._dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self._fps)
+
+    def _load(self):
+        if pa is None or not os.path.exists(self.path):
+            return
+        try:
+            with pa.memory_map(self.path, "r") as source:
+                table = pa_ipc.open_file(source).read_all()
+            self._fps = table.column("fingerprint").to_numpy().astype(np.uint64)
+            self._preds = table.column("pred").to_numpy().astype(np.float64)
+            self._residuals = table.column("residual").to_numpy().astype(np.float64)
+            self._index = pd.Index(self._fps)
+        except Exception:
+            pass  # file hỏng -> coi như store rỗng, lần save sau ghi đè
+
+    def lookup(self, fps):
+        # -> (pred, residual, found): dòng chưa có trong store có found = False và pred/residual = NaN
+        with self._lock:
+            pos = self._index.get_indexer(fps) if len(self._fps) else np.full(len(fps), -1)
+            found = pos >= 0
+            preds = np.full(len(fps), np.nan)
+            residuals = np.full(len(fps), np.nan)
+            preds[found] = self._preds[pos[found]]
+            residuals[found] = self._residuals[pos[found]]
+        return preds, residuals, found
+
+    def add(self, fps, preds, residuals):
+        if not len(fps):
+            return
+        with self._lock:
+            # bỏ fingerprint trùng (trong lô mới và với store) -> index luôn unique
+            fps, first = np.unique(np.asarray(fps, dtype=np.uint64), return_index=True)
+            new = self._index.get_indexer(fps) < 0 if len(self._fps) else np.ones(len(fps), dtype=bool)
+            if not new.any():
+                return
+            self._fps = np.concatenate([self._fps, fps[new]])
+            self._preds = np.concatenate([self._preds, np.asarray(preds, dtype=np.float64)[first][new]])
+            self._residuals = np.concatenate([self._residuals, np.asarray(residuals, dtype=np.float64)[first][new]])
+            self._index = pd.Index(self._fps)
+            self._dirty = True
+
+    def save(self):
+        if pa is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            table = pa.table({"fingerprint": self._fps, "pred": self._preds, "residual": self._residuals})
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with pa_ipc.new_file(tmp_path, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, self.path)  # ghi atomic
+            self._dirty = False
+        _remove_other_versions(os.path.dirname(self.path), keep=self.path)
+
+
+def _remove_other_versions(directory, keep):
+    # Kết quả của model cũ không dùng lại được nữa
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(STORE_PREFIX) and name.endswith(".arrow") and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(model_version, directory=CACHE_DIR):
+    # 1 store / phiên bản model / process, dùng chung giữa các session
+    key = (os.path.abspath(directory), model_version)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            for k in [k for k in _stores if k[0] == key[0]]:
+                del _stores[k]
+            store = _stores[key] = ScoreStore(model_version, directory)
+    return store
@@ -0,0 +1,413 @@
+# scoring.py
+# Quét anomaly toàn bộ dataset theo lô (streaming): clean -> impute -> predict -> flag.
+# - Lượt 1 (nhẹ): chỉ đếm mode của 6 cột categorical và gom 'Số Km đã đi' / 'Giá' đã làm sạch để lấy median,
+#   nên kết quả impute giống hệt bản quét một lần (batch) cũ.
+# - Lượt 2: xử lý từng lô cố định, chỉ giữ lại các dòng bất thường -> bộ nhớ đỉnh không phụ thuộc kích thước file.
+# Nguồn dữ liệu là một hàm trả về iterator các DataFrame lô (gọi lại được cho lượt 2),
+# ví dụ frame_chunks(df) hoặc lambda: pd.read_csv(path, chunksize=...).
+# - workers > 1: bước predict được chia shard cho process pool (mỗi worker giữ sẵn pipeline,
+#   không unpickle lại theo từng task), kết quả ghép lại đúng thứ tự dòng gốc. Pool tạo 1 lần rồi dùng lại, start method
+#   forkserver / spawn (không fork từ process Streamlit / ASGI nhiều thread). Pool hỏng -> predict tuần tự lần đó,
+#   ghi log và pool_error() trả lý do để UI / CLI báo lại.
+# - store (score_store.ScoreStore): dòng đã chấm với cùng model + cùng dữ liệu thì lấy lại giá dự đoán đã lưu,
+#   chỉ predict dòng mới / đã đổi -> quét lại export hằng ngày hoặc đổi ngưỡng gần như không gọi model.
+# - Dedup: trong mỗi lô, dòng có cùng vector đặc trưng (các cột model dùng, sau clean + impute) chỉ predict 1 lần,
+#   kết quả trải lại cho từng dòng -> tin đăng lại / trùng không tốn thêm predict, kết quả y hệt predict từng dòng.
+#   MOTOBIKE_SCAN_DEDUP=0 tắt; DedupStats ghi tỷ lệ trùng và thời gian tiết kiệm (ước lượng).
+# - rule (segment_thresholds.SegmentRule): ngưỡng theo phân khúc (Hãng, Dòng xe, khoảng năm) thay cho 1 ngưỡng VND chung.
+# - Không phụ thuộc Streamlit: app và CLI chấm điểm hàng loạt (score_cli.py) dùng chung các hàm ở đây.
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+import model_manager
+from preprocessing import preprocess_df_before_predict
+from score_store import row_fingerprints
+
+REQUIRED_COLS = ['Giá', 'Thương hiệu', 'Dòng xe', 'Tình trạng', 'Loại xe', 'Dung tích xe', 'Xuất xứ', 'Năm đăng ký', 'Số Km đã đi', 'Khoảng giá min']
+CAT_COLS = ['Thương hiệu', 'Dòng xe', 'Tình trạng', 'Loại xe', 'Dung tích xe', 'Xuất xứ']
+INTEGRAL_COLS = ['Giá', 'Số Km đã đi', 'Năm đăng ký']  # cột số nguyên, Parquet có thể lưu dạng float khi có ô trống
+PRICE_MIN_COL = 'Khoảng giá min'  # pipeline cần cột này, thiếu thì đặt mặc định 0
+
+SCORE_COLS = ['Giá dự đoán', 'Chênh lệch', 'Bất thường loại']
+
+DEFAULT_CHUNK_SIZE = 20_000
+DEFAULT_THRESHOLD = 10_000_000
+DEFAULT_WORKERS = int(os.environ.get("MOTOBIKE_SCAN_WORKERS", "1"))
+DEDUP = os.environ.get("MOTOBIKE_SCAN_DEDUP", "1") != "0"
+MIN_SHARD_ROWS = 2_000  # shard nhỏ hơn thì chi phí gửi sang process lớn hơn lợi ích
+# Không fork thẳng từ process nhiều thread (lock đang bị thread khác giữ sẽ bị copy sang con -> treo);
+# forkserver / spawn: mỗi worker tự load model 1 lần trong _init_worker, pool được dùng lại giữa các lần quét
+MP_START_METHOD = os.environ.get(
+    "MOTOBIKE_MP_START",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+log = logging.getLogger(__name__)
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        self.missing = list(missing)
+        super().__init__(f"Dataframe thiếu cột quan trọng: {', '.join(self.missing)}")
+
+
+def check_columns(columns):
+    # Trả về True nếu phải tự thêm 'Khoảng giá min'; raise MissingColumnsError nếu thiếu cột khác
+    missing = [col for col in REQUIRED_COLS if col not in columns]
+    add_price_min = PRICE_MIN_COL in missing
+    missing = [col for col in missing if col != PRICE_MIN_COL]
+    if missing:
+        raise MissingColumnsError(missing)
+    return add_price_min
+
+
+def frame_chunks(df, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Nguồn lô từ DataFrame đã có trong bộ nhớ: các lát iloc (không copy)
+    def source():
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    return source
+
+
+# ---------- Nguồn lô từ file (CSV / XLSX / Parquet) ----------
+INPUT_FORMATS = {".csv": "csv", ".xlsx": "xlsx", ".xls": "xlsx", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def input_format(path):
+    fmt = INPUT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Không hỗ trợ định dạng file: {path} (chỉ nhận {', '.join(sorted(INPUT_FORMATS))})")
+    return fmt
+
+
+def integral_floats_to_int(chunk):
+    # Parquet lưu cột số có NaN dạng float (14000.0) -> astype(str) sẽ thành "14000.0" và lọc số sai.
+    # Đưa về Int64 (nullable) để làm sạch giống hệt dữ liệu đọc từ Excel.
+    for col in INTEGRAL_COLS:
+        if col in chunk.columns and pd.api.types.is_float_dtype(chunk[col]):
+            values = chunk[col].dropna()
+            if (values == np.floor(values)).all():
+                chunk[col] = chunk[col].astype("Int64")
+    return chunk
+
+
+def read_columns(path):
+    # Chỉ đọc header để kiểm tra cột trước khi quét
+    fmt = input_format(path)
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_excel(path, nrows=0, engine="openpyxl").columns)
+
+
+def file_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Nguồn lô đọc lại được từ file: CSV và Parquet đọc từng lô (bộ nhớ không phụ thuộc kích thước file);
+    # Excel không đọc theo lô được nên đọc 1 lần rồi cắt lát.
+    fmt = input_format(path)
+    if fmt == "csv":
+        # Đọc các cột thô dạng chuỗi như Excel: tránh pandas suy kiểu float ("14000.0") ở lô có ô trống
+        text_cols = {col: str for col in REQUIRED_COLS}
+
+        def source():
+            yield from pd.read_csv(path, chunksize=chunk_size, dtype=text_cols)
+        return source
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        def source():
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield integral_floats_to_int(batch.to_pandas())
+        return source
+    return frame_chunks(pd.read_excel(path, engine="openpyxl"), chunk_size)
+
+
+class ImputeStats:
+    def __init__(self, modes, km_median, gia_median, n_rows):
+        self.modes = modes
+        self.km_median = km_median
+        self.gia_median = gia_median
+        self.n_rows = n_rows
+
+
+def mode_from_counts(counts):
+    # Giống Series.mode().iloc[0]: giá trị xuất hiện nhiều nhất, hoà thì lấy giá trị nhỏ nhất theo thứ tự tự nhiên
+    # (50 < 100); lẫn kiểu không so được với nhau thì mới so theo chuỗi. Category đếm 0 -> bỏ, cột toàn NaN -> 'Unknown'
+    counts = {v: c for v, c in counts.items() if c > 0}
+    if not counts:
+        return 'Unknown'
+    top = max(counts.values())
+    tied = [v for v, c in counts.items() if c == top]
+    try:
+        return min(tied)
+    except TypeError:
+        return min(tied, key=str)
+
+
+def compute_impute_stats(chunk_source):
+    # Lượt 1: chỉ đọc 8 cột cần cho mode / median
+    counts = {col: Counter() for col in CAT_COLS}
+    km_parts, gia_parts = [], []
+    n_rows = 0
+    for chunk in chunk_source():
+        n_rows += len(chunk)
+        for col in CAT_COLS:
+            counts[col].update(chunk[col].value_counts(dropna=True).to_dict())
+        cleaned = preprocess_df_before_predict(chunk[['Giá', 'Số Km đã đi']])
+        km_parts.append(cleaned['Số Km đã đi'].to_numpy(dtype=np.float64, na_value=np.nan))
+        gia_parts.append(cleaned['Giá'].to_numpy(dtype=np.float64, na_value=np.nan))
+    km = pd.Series(np.concatenate(km_parts)) if km_parts else pd.Series(dtype=np.float64)
+    gia = pd.Series(np.concatenate(gia_parts)) if gia_parts else pd.Series(dtype=np.float64)
+    modes = {col: mode_from_counts(counts[col]) for col in CAT_COLS}
+    return ImputeStats(modes, km.median(), gia.median(), n_rows)
+
+
+def clean_chunk(chunk, stats, add_price_min=False):
+    # clean + impute 1 lô, cùng thứ tự và quy tắc với bản quét batch
+    df_clean = preprocess_df_before_predict(chunk)
+    if add_price_min:
+        df_clean[PRICE_MIN_COL] = 0
+    for col in CAT_COLS:
+        df_clean[col] = df_clean[col].fillna(stats.modes[col])
+    df_clean['Số Km đã đi'] = df_clean['Số Km đã đi'].fillna(stats.km_median)
+    df_clean['Giá'] = df_clean['Giá'].fillna(stats.gia_median)
+    return df_clean
+
+
+def anomaly_flags(df_clean, residuals, threshold, rule=None):
+    # -> (bất thường?, quá cao?) cho từng dòng. rule (vd segment_thresholds.SegmentRule) cho cận dưới / trên
+    # theo từng dòng; không có rule thì dùng ngưỡng |Chênh lệch| > threshold chung
+    if rule is not None:
+        lo, hi = rule.bounds(df_clean)
+        return (residuals < lo) | (residuals > hi), residuals > hi
+    return np.abs(residuals) > threshold, residuals > 0
+
+
+def flag_chunk(df_clean, pred_prices, threshold, rule=None):
+    # Chỉ giữ các dòng bất thường, kèm cột kết quả như bảng Admin
+    residuals = df_clean["Giá"].to_numpy(dtype=np.float64) - pred_prices
+    is_anom, is_high = anomaly_flags(df_clean, residuals, threshold, rule)
+    df_anom = df_clean[is_anom].copy()
+    df_anom["Giá dự đoán"] = pred_prices[is_anom]
+    df_anom["Chênh lệch"] = residuals[is_anom]
+    df_anom["Bất thường loại"] = np.where(is_high[is_anom], "Quá cao", "Quá thấp")
+    df_anom["Status"] = "Pending"
+    return df_anom.reset_index(names=['Original Index'])
+
+
+def score_chunk(df_clean, pred_prices, threshold, rule=None):
+    # Giữ mọi dòng: thêm giá dự đoán, chênh lệch và loại bất thường (None nếu trong ngưỡng)
+    residuals = df_clean["Giá"].to_numpy(dtype=np.float64) - pred_prices
+    is_anom, is_high = anomaly_flags(df_clean, residuals, threshold, rule)
+    df_scored = df_clean.copy(deep=False)
+    df_scored["Giá dự đoán"] = pred_prices
+    df_scored["Chênh lệch"] = residuals
+    df_scored["Bất thường loại"] = pd.Series(
+        np.where(is_anom, np.where(is_high, "Quá cao", "Quá thấp"), None), index=df_clean.index, dtype=object)
+    return df_scored
+
+
+# ---------- Predict song song ----------
+_worker_state = None  # ModelState trong process worker
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+_pool_error = None  # lý do lần predict song song gần nhất phải chạy tuần tự (None = pool chạy bình thường)
+
+
+def _init_worker(model_path):
+    # Chạy 1 lần khi worker khởi động: load model (+ compiled) 1 lần / worker
+    global _worker_state
+    _worker_state = model_manager.get_model_state(model_path)
+
+
+def _predict_shard(X_shard):
+    return np.asarray(_worker_state.predict(X_shard), dtype=np.float64)
+
+
+def _get_pool(workers, model_state):
+    # Pool dùng lại giữa các lần quét; tạo lại khi đổi số worker hoặc model
+    global _pool, _pool_key
+    key = (workers, model_state.path, model_state.file_key, MP_START_METHOD)
+    with _pool_lock:
+        if _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(MP_START_METHOD),
+                initializer=_init_worker,
+                initargs=(model_state.path,),
+            )
+            _pool_key = key
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+def parallel_predict(X, model_state, workers=1):
+    # Chia X thành `workers` shard liên tiếp, predict song song, ghép lại theo thứ tự shard = thứ tự dòng gốc
+    workers = max(1, int(workers))
+    n_shards = min(workers, len(X) // MIN_SHARD_ROWS)
+    if n_shards <= 1:
+        return np.asarray(model_state.predict(X), dtype=np.float64)
+    # chỉ gửi các cột model dùng để giảm chi phí pickle sang worker
+    X = X[[c for c in model_manager.feature_columns(model_state.model) if c in X.columns]]
+    bounds = np.linspace(0, len(X), n_shards + 1).astype(int)
+    shards = [X.iloc[bounds[i]:bounds[i + 1]] for i in range(n_shards)]
+    global _pool_error
+    try:
+        pool = _get_pool(workers, model_state)
+        pred_prices = np.concatenate(list(pool.map(_predict_shard, shards)))
+    except (OSError, BrokenProcessPool) as e:
+        # không tạo được process / worker chết giữa chừng -> tạo lại pool ở lần sau, lần này predict tuần tự
+        shutdown_pool()
+        _pool_error = f"{workers} worker không chạy được ({type(e).__name__}: {e}), đã predict tuần tự"
+        log.warning("parallel_predict: %s", _pool_error)
+        return np.asarray(model_state.predict(X), dtype=np.float64)
+    _pool_error = None
+    return pred_prices
+
+
+def pool_error():
+    return _pool_error
+
+
+class ReuseStats:
+    # Đếm số dòng lấy lại từ store / phải predict mới trong 1 lần quét
+    def __init__(self):
+        self.reused = 0
+        self.predicted = 0
+
+    @property
+    def total(self):
+        return self.reused + self.predicted
+
+
+class DedupStats:
+    # Đếm số dòng cần predict / số vector đặc trưng duy nhất thực sự predict trong 1 lần quét
+    def __init__(self):
+        self.rows = 0
+        self.unique = 0
+        self.group_seconds = 0.0
+        self.predict_seconds = 0.0
+
+    @property
+    def ratio(self):
+        # số dòng / số vector duy nhất (1.0 = không có dòng trùng)
+        return self.rows / self.unique if self.unique else 1.0
+
+    @property
+    def saved_seconds(self):
+        # predict gần như tuyến tính theo số dòng: thời gian / vector x số dòng trùng đã bỏ qua, trừ chi phí gom nhóm
+        if not self.unique:
+            return 0.0
+        return self.predict_seconds / self.unique * (self.rows - self.unique) - self.group_seconds
+
+    def summary(self):
+        return (f"{self.rows:,} dòng -> {self.unique:,} vector đặc trưng duy nhất (x{self.ratio:,.2f}, "
+                f"bỏ qua {self.rows - self.unique:,} lần predict), tiết kiệm ~{self.saved_seconds * 1000:,.0f} ms")
+
+
+def dedup_predict(X, model_state, workers=1, dedup=None):
+    # Gom dòng theo vector đặc trưng, predict mỗi vector 1 lần rồi trải lại theo thứ tự dòng gốc
+    if not DEDUP or len(X) < 2:
+        return parallel_predict(X, model_state, workers)
+    t0 = time.perf_counter()
+    feature_cols = [c for c in model_manager.feature_columns(model_state.model) if c in X.columns]
+    groups = X.groupby(feature_cols, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    n_unique = int(groups.max()) + 1
+    t1 = time.perf_counter()
+    if n_unique < len(X):
+        _, first = np.unique(groups, return_index=True)  # sort=False -> mã nhóm theo thứ tự xuất hiện đầu tiên
+        pred_prices = parallel_predict(X.iloc[first], model_state, workers)[groups]
+    else:
+        pred_prices = parallel_predict(X, model_state, workers)
+    if dedup is not None:
+        dedup.rows += len(X)
+        dedup.unique += n_unique
+        dedup.group_seconds += t1 - t0
+        dedup.predict_seconds += time.perf_counter() - t1
+    return pred_prices
+
+
+def predict_chunk(df_clean, model_state, workers=1, store=None, reuse=None, dedup=None):
+    # Giá dự đoán cho 1 lô đã clean + impute; có store thì chỉ predict các dòng chưa có trong store
+    X = df_clean.drop(columns=["Giá"])
+    if store is None:
+        if reuse is not None:
+            reuse.predicted += len(X)
+        return dedup_predict(X, model_state, workers, dedup)
+    feature_cols = [c for c in model_manager.feature_columns(model_state.model) if c in X.columns]
+    fps = row_fingerprints(df_clean, feature_cols)
+    pred_prices, _, found = store.lookup(fps)
+    missing = ~found
+    if missing.any():
+        new_preds = dedup_predict(X[missing], model_state, workers, dedup)
+        pred_prices[missing] = new_preds
+        prices = df_clean["Giá"].to_numpy(dtype=np.float64)[missing]
+        store.add(fps[missing], new_preds, prices - new_preds)
+    if reuse is not None:
+        reuse.reused += int(found.sum())
+        reuse.predicted += int(missing.sum())
+    return pred_prices
+
+
+def iter_scan(chunk_source, model_state, threshold, stats=None, add_price_min=False, workers=1,
+              store=None, reuse=None, rule=None, dedup=None):
+    # Lượt 2: sinh ra (số dòng đã xử lý, tổng số dòng, DataFrame bất thường của lô) sau mỗi lô
+    if stats is None:
+        stats = compute_impute_stats(chunk_source)
+    done = 0
+    for chunk in chunk_source():
+        if chunk.empty:
+            continue
+        df_clean = clean_chunk(chunk, stats, add_price_min)
+        pred_prices = predict_chunk(df_clean, model_state, workers, store, reuse, dedup)
+        done += len(chunk)
+        yield done, stats.n_rows, flag_chunk(df_clean, pred_prices, threshold, rule)
+    if store is not None:
+        store.save()
+
+
+def iter_score(chunk_source, model_state, threshold, stats=None, add_price_min=False, workers=1,
+               store=None, reuse=None, rule=None, dedup=None):
+    # Như iter_scan nhưng trả về mọi dòng đã chấm điểm (dùng cho CLI ghi file kết quả)
+    if stats is None:
+        stats = compute_impute_stats(chunk_source)
+    for chunk in chunk_source():
+        if chunk.empty:
+            continue
+        df_clean = clean_chunk(chunk, stats, add_price_min)
+        pred_prices = predict_chunk(df_clean, model_state, workers, store, reuse, dedup)
+        yield score_chunk(df_clean, pred_prices, threshold, rule)
+    if store is not None:
+        store.save()
+
+
+def scan_dataframe(df, model_state, threshold, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, store=None, reuse=None,
+                   rule=None, dedup=None):
+    # Quét cả DataFrame, trả về bảng bất thường (cột 'Original Index' = index gốc)
+    add_price_min = check_columns(df.columns)
+    parts = [anom for _, _, anom in iter_scan(frame_chunks(df, chunk_size), model_state, threshold,
+                                               add_price_min=add_price_min, workers=workers,
+                                               store=store, reuse=reuse, rule=rule, dedup=dedup)]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
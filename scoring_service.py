@@ -0,0 +1,300 @@
+# scoring_service.py
+# Dịch vụ HTTP (ASGI) chấm giá / phát hiện bất thường cho các hệ thống nội bộ, cùng logic với tab "Người dùng":
+#   uvicorn scoring_service:app --host 127.0.0.1 --port 8000
+# - POST /predict  {"Thương hiệu": ..., "Dòng xe": ..., "Năm đăng ký": 2015, "Số Km đã đi": 50000, ...}
+# - POST /anomaly  như trên + "Giá" (VND), "threshold" (tuỳ chọn, mặc định 10.000.000)
+# - GET  /metrics  độ sâu hàng đợi, kích thước batch, latency (JSON);  GET /health
+# - Micro-batching: các request đồng thời được gom thành 1 lần predict trong cửa sổ MOTOBIKE_BATCH_WAIT_MS
+#   (tối đa MOTOBIKE_BATCH_MAX_SIZE dòng); bộ thông số đã gặp trả về ngay từ PREDICTION_CACHE dùng chung.
+# - Body phải có đủ các cột model dùng (REQUIRED_COLS, không rỗng) -> thiếu thì 400, không đoán / không cache.
+#   Model nhận dòng dựng từ key chuẩn hoá (prediction_cache.model_row, như cached_predict của app) -> mọi tin đăng
+#   cùng key được định giá như nhau, dù gom chung lô hay lấy từ cache.
+# ASGI thuần (không cần framework), chạy được với uvicorn / hypercorn.
+import asyncio
+import json
+import os
+import time
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+import model_manager
+import scoring
+from prediction_cache import KEY_CAT_COLS, KEY_NUM_COLS, PREDICTION_CACHE, model_row, normalize_key
+
+MODEL_PATH = os.environ.get("MOTOBIKE_MODEL_PATH", model_manager.MODEL_PATH)
+BATCH_MAX_SIZE = int(os.environ.get("MOTOBIKE_BATCH_MAX_SIZE", "64"))
+BATCH_WAIT_MS = float(os.environ.get("MOTOBIKE_BATCH_WAIT_MS", "5"))
+LATENCY_WINDOW = 10_000  # số request gần nhất dùng để tính p50/p95/p99
+REQUIRED_COLS = KEY_CAT_COLS + KEY_NUM_COLS
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    arr = np.fromiter(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
+
+
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.requests = Counter()  # theo endpoint
+        self.errors = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.rows_predicted = 0
+        self.batch_sizes = Counter()
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self.request_ms = deque(maxlen=LATENCY_WINDOW)
+        self.predict_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self, queue_depth):
+        uptime = time.time() - self.started_at
+        total = sum(self.requests.values())
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": dict(self.requests),
+            "requests_per_s": round(total / uptime, 2) if uptime else 0.0,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "queue_depth": queue_depth,
+            "queue_depth_max": self.max_queue_depth,
+            "batches": self.batches,
+            "rows_predicted": self.rows_predicted,
+            "batch_size_avg": round(self.rows_predicted / self.batches, 2) if self.batches else 0.0,
+            "batch_size_max": self.max_batch_size,
+            "batch_size_hist": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "request_latency_ms": _percentiles(self.request_ms),
+            "predict_latency_ms": _percentiles(self.predict_ms),
+            "batch_max_size": BATCH_MAX_SIZE,
+            "batch_wait_ms": BATCH_WAIT_MS,
+        }
+
+
+class MicroBatcher:
+    # Gom các dòng đang chờ thành 1 DataFrame: request đầu tiên mở cửa sổ chờ BATCH_WAIT_MS,
+    # đủ max_size dòng thì predict ngay. Predict chạy trong thread để event loop vẫn nhận request mới.
+    def __init__(self, metrics, max_size=BATCH_MAX_SIZE, wait_ms=BATCH_WAIT_MS):
+        self.metrics = metrics
+        self.max_size = max(1, max_size)
+        self.wait_s = max(0.0, wait_ms) / 1000
+        self._queue = None
+        self._task = None
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, key):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((key, future))
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.wait_s
+        while len(batch) < self.max_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        while len(batch) < self.max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())  # các request đã tới trong lúc predict lô trước
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                preds = await loop.run_in_executor(None, _predict_keys, [key for key, _ in batch], self.metrics)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), pred in zip(batch, preds):
+                if not future.done():
+                    future.set_result(pred)
+
+
+def _model_row(key):
+    # Dòng đưa vào model = đúng giá trị của key (chuỗi đã strip, số đã làm tròn), không phải giá trị thô của client
+    row = model_row({}, key)
+    row[scoring.PRICE_MIN_COL] = 0
+    return row
+
+
+def _cache_version(model_state):
+    return model_state.version
+
+
+def _predict_keys(keys, metrics):
+    # Chạy trong thread: bộ thông số trùng nhau trong cùng lô chỉ predict 1 lần, kết quả ghi vào cache dùng chung
+    model_state = model_manager.get_model_state(MODEL_PATH)
+    if model_state.model is None:
+        raise RuntimeError(f"Model chưa sẵn sàng: {model_state.error}")
+    unique_keys = list(dict.fromkeys(keys))
+    t0 = time.perf_counter()
+    X = pd.DataFrame([_model_row(k) for k in unique_keys])
+    preds = np.asarray(model_state.predict(X), dtype=np.float64)
+    metrics.predict_ms.append((time.perf_counter() - t0) * 1000)
+    metrics.batches += 1
+    metrics.rows_predicted += len(unique_keys)
+    metrics.batch_sizes[len(unique_keys)] += 1
+    metrics.max_batch_size = max(metrics.max_batch_size, len(unique_keys))
+    version = _cache_version(model_state)
+    by_key = {}
+    for key, pred in zip(unique_keys, preds):
+        by_key[key] = float(pred)
+        PREDICTION_CACHE.put(key, float(pred), version)
+    return [by_key[k] for k in keys]
+
+
+class ScoringService:
+    def __init__(self):
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(self.metrics)
+
+    async def predict_price(self, listing):
+        try:
+            key = normalize_key(listing)
+        except (TypeError, ValueError, OverflowError):
+            raise BadRequest("'Năm đăng ký' và 'Số Km đã đi' phải là số.")
+        missing = [col for col, value in zip(REQUIRED_COLS, key) if value is None or value == ""]
+        if missing:
+            raise BadRequest(f"Thiếu trường bắt buộc: {', '.join(missing)}.")
+        model_state = model_manager.get_model_state(MODEL_PATH)
+        cached = PREDICTION_CACHE.get(key, _cache_version(model_state))
+        if cached is not None:
+            self.metrics.cache_hits += 1
+            return cached
+        return await self.batcher.submit(key)
+
+    async def handle(self, path, listing):
+        if not isinstance(listing, dict):
+            raise BadRequest("Body phải là 1 object JSON mô tả tin đăng.")
+        if path == "/predict":
+            return {"predicted_price": await self.predict_price(listing)}
+        # /anomaly: cùng quy tắc với detect_residual_anomaly_single của tab "Người dùng"
+        try:
+            price = float(listing["Giá"])
+            threshold = float(listing.get("threshold", scoring.DEFAULT_THRESHOLD))
+        except KeyError:
+            raise BadRequest("Thiếu trường 'Giá'.")
+        except (TypeError, ValueError):
+            raise BadRequest("'Giá' và 'threshold' phải là số.")
+        pred_price = await self.predict_price(listing)
+        residual = price - pred_price
+        is_anom = abs(residual) > threshold
+        return {
+            "predicted_price": pred_price,
+            "residual": residual,
+            "is_anomaly": is_anom,
+            "anomaly_type": ("Quá cao" if residual > 0 else "Quá thấp") if is_anom else None,
+            "threshold": threshold,
+        }
+
+
+# ---------- ASGI ----------
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_app(service=None):
+    service = service or ScoringService()
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # load model + warm-up trước khi nhận request
+                state = await asyncio.get_running_loop().run_in_executor(None, model_manager.get_model_state, MODEL_PATH)
+                if state.model is None:
+                    await send({"type": "lifespan.startup.failed", "message": str(state.error)})
+                    return
+                model_manager.start_watcher(MODEL_PATH)  # model mới được load + swap ở nền, không cần restart
+                service.batcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await service.batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        if service.batcher._task is None:
+            service.batcher.start()  # server không gửi lifespan -> khởi động ở request đầu tiên
+            model_manager.start_watcher(MODEL_PATH)
+        t0 = time.perf_counter()
+        path, method = scope["path"], scope["method"]
+        status, payload = 200, None
+        if method == "GET" and path == "/health":
+            state = model_manager.get_model_state(MODEL_PATH)
+            status = 200 if state.model is not None else 503
+            payload = {"ok": state.model is not None, "model": state.summary(), "version": state.version,
+                       "swaps": model_manager.swap_history(MODEL_PATH)[:5]}
+        elif method == "GET" and path == "/metrics":
+            payload = service.metrics.snapshot(service.batcher.depth)
+            payload["prediction_cache"] = PREDICTION_CACHE.stats()
+        elif method == "POST" and path in ("/predict", "/anomaly"):
+            service.metrics.requests[path] += 1
+            try:
+                listing = json.loads(await _read_body(receive) or b"null")
+                payload = await service.handle(path, listing)
+            except (json.JSONDecodeError, BadRequest) as e:
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            if status != 200:
+                service.metrics.errors += 1
+            service.metrics.request_ms.append((time.perf_counter() - t0) * 1000)
+        else:
+            status, payload = 404, {"error": f"Không có endpoint {method} {path}"}
+        await _send_json(send, status, payload)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,221 @@
+# segment_thresholds.py
+# Ngưỡng bất thường theo phân khúc thay cho 1 ngưỡng VND chung (10 triệu là nhiễu với SH 300 triệu nhưng là gian lận với Wave 15 triệu):
+# - Bảng phân phối 'Chênh lệch' (phân vị + mean/std) theo (Hãng, Dòng xe, khoảng năm 5 năm), kèm các cấp gộp
+#   (Hãng, Dòng xe) -> (Hãng) -> toàn bộ cho phân khúc ít hơn MIN_SEGMENT_ROWS dòng.
+# - Gắn cờ: join vectorized (MultiIndex.get_indexer theo từng cấp) ra cận dưới / cận trên cho mọi dòng, không có vòng lặp Python theo dòng.
+# - Bảng lưu trong CACHE_DIR theo (phiên bản model, dataset) -> chỉ tính lại khi đổi model hoặc dữ liệu;
+#   trong process chỉ giữ MEMO_MAX_ENTRIES bảng dùng gần nhất (LRU), bảng của model cũ bỏ ngay.
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from data_cache import CACHE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # không có pyarrow -> bảng chỉ sống trong bộ nhớ của process
+    pa = None
+    pa_ipc = None
+
+TABLE_PREFIX = "segments-"
+YEAR_BAND = 5
+MIN_SEGMENT_ROWS = 30
+QUANTILES = [0.005, 0.01, 0.025, 0.05, 0.95, 0.975, 0.99, 0.995]
+KEY_COLS = ["brand", "model_line", "year_band"]
+# Các cấp từ cụ thể nhất tới chung nhất (cấp cuối = toàn bộ dataset, luôn có)
+LEVELS = [("brand", "model_line", "year_band"), ("brand", "model_line"), ("brand",), ()]
+MEMO_MAX_ENTRIES = 4
+
+METHOD_QUANTILE = "quantile"
+METHOD_ZSCORE = "zscore"
+METHODS = [METHOD_QUANTILE, METHOD_ZSCORE]
+
+
+def _q_col(q):
+    return f"q{q:g}"
+
+
+def segment_keys(df_clean):
+    # (Hãng, Dòng xe, khoảng năm) của các dòng đã clean + impute
+    years = df_clean["Năm đăng ký"].to_numpy(dtype=np.float64, na_value=np.nan)
+    bands = np.where(np.isnan(years), -1, np.floor(np.nan_to_num(years) / YEAR_BAND) * YEAR_BAND).astype(np.int64)
+    return pd.DataFrame({
+        "brand": df_clean["Thương hiệu"].astype(str).to_numpy(),
+        "model_line": df_clean["Dòng xe"].astype(str).to_numpy(),
+        "year_band": bands,
+    })
+
+
+class SegmentTable:
+    def __init__(self, table):
+        # table: 1 dòng / (cấp, phân khúc) với n, mean, std và các cột phân vị
+        self.table = table.reset_index(drop=True)
+        self._levels = []
+        for depth, cols in enumerate(LEVELS):
+            rows = self.table[(self.table["level"] == depth) & (self.table["n"] >= MIN_SEGMENT_ROWS if cols else True)]
+            index = None
+            if cols:
+                # year_band đọc từ file là float (NaN ở các cấp gộp) -> ép về int64 như segment_keys
+                index = pd.MultiIndex.from_frame(rows[list(cols)].astype({c: np.int64 for c in cols if c == "year_band"}))
+            self._levels.append((cols, index, rows.index.to_numpy()))
+
+    @classmethod
+    def from_residuals(cls, keys, residuals):
+        frame = keys.assign(residual=np.asarray(residuals, dtype=np.float64))
+        parts = []
+        for depth, cols in enumerate(LEVELS):
+            grouped = frame.groupby(list(cols), sort=False)["residual"] if cols else frame.assign(_all=0).groupby("_all")["residual"]
+            stats = grouped.agg(["size", "mean", "std"]).rename(columns={"size": "n"})
+            quantiles = grouped.quantile(QUANTILES).unstack()
+            quantiles.columns = [_q_col(q) for q in quantiles.columns]
+            part = stats.join(quantiles).reset_index()
+            if not cols:
+                part = part.drop(columns="_all")
+            part["level"] = depth
+            parts.append(part)
+        table = pd.concat(parts, ignore_index=True)
+        for col in KEY_COLS:
+            if col not in table.columns:
+                table[col] = None
+        table["std"] = table["std"].fillna(0.0)
+        return cls(table[["level"] + KEY_COLS + ["n", "mean", "std"] + [_q_col(q) for q in QUANTILES]])
+
+    def rows_for(self, df_clean):
+        # Vị trí dòng bảng áp dụng cho từng dòng dữ liệu: phân khúc cụ thể nhất có đủ MIN_SEGMENT_ROWS mẫu
+        keys = segment_keys(df_clean)
+        pos = np.full(len(keys), -1, dtype=np.int64)
+        for cols, index, table_rows in self._levels:
+            todo = pos < 0
+            if not todo.any():
+                break
+            if not cols:
+                pos[todo] = table_rows[0]
+                break
+            if not len(index):
+                continue
+            lookup = pd.MultiIndex.from_frame(keys.loc[todo, list(cols)])
+            hit = index.get_indexer(lookup)
+            found = hit >= 0
+            idx = np.flatnonzero(todo)[found]
+            pos[idx] = table_rows[hit[found]]
+        return pos
+
+    def n_segments(self):
+        return int(((self.table["level"] == 0) & (self.table["n"] >= MIN_SEGMENT_ROWS)).sum())
+
+
+class SegmentRule:
+    # Quy tắc gắn cờ theo phân khúc, dùng trong scoring.anomaly_flags:
+    # - quantile: ngoài [phân vị level/2, phân vị 1 - level/2] của phân khúc (level = tỷ lệ cảnh báo mong muốn)
+    # - zscore: |Chênh lệch - mean| > level * std của phân khúc
+    def __init__(self, segments, method=METHOD_QUANTILE, level=0.05):
+        if method not in METHODS:
+            raise ValueError(f"Cách tính ngưỡng không hợp lệ: {method}")
+        if method == METHOD_QUANTILE and _q_col(level / 2) not in segments.table.columns:
+            raise ValueError(f"Tỷ lệ cảnh báo phải là một trong {[q * 2 for q in QUANTILES if q < 0.5]}")
+        self.segments = segments
+        self.method = method
+        self.level = level
+
+    def bounds(self, df_clean):
+        rows = self.segments.table.iloc[self.segments.rows_for(df_clean)]
+        if self.method == METHOD_QUANTILE:
+            lo = rows[_q_col(self.level / 2)].to_numpy(dtype=np.float64)
+            hi = rows[_q_col(round(1 - self.level / 2, 6))].to_numpy(dtype=np.float64)
+        else:
+            mean = rows["mean"].to_numpy(dtype=np.float64)
+            spread = self.level * rows["std"].to_numpy(dtype=np.float64)
+            lo, hi = mean - spread, mean + spread
+        return lo, hi
+
+    def describe(self):
+        if self.method == METHOD_QUANTILE:
+            return f"phân vị {self.level / 2:.1%} / {1 - self.level / 2:.1%} theo phân khúc"
+        return f"|z| > {self.level:g} theo phân khúc"
+
+
+# ---------- Tính + lưu bảng ----------
+def build_segments(chunk_source, model_state, stats=None, add_price_min=False, workers=1, store=None):
+    # 1 lượt clean -> predict (dùng lại store nếu có) trên toàn bộ dữ liệu, chỉ giữ khoá phân khúc + chênh lệch
+    if stats is None:
+        stats = scoring.compute_impute_stats(chunk_source)
+    keys, residuals = [], []
+    for chunk in chunk_source():
+        if chunk.empty:
+            continue
+        df_clean = scoring.clean_chunk(chunk, stats, add_price_min)
+        pred_prices = scoring.predict_chunk(df_clean, model_state, workers, store)
+        keys.append(segment_keys(df_clean))
+        residuals.append(df_clean["Giá"].to_numpy(dtype=np.float64) - pred_prices)
+    if store is not None:
+        store.save()
+    if not keys:
+        raise ValueError("Không có dữ liệu để tính ngưỡng theo phân khúc.")
+    return SegmentTable.from_residuals(pd.concat(keys, ignore_index=True), np.concatenate(residuals))
+
+
+def _table_path(model_version, dataset_key, directory):
+    return os.path.join(directory, f"{TABLE_PREFIX}{model_version}-{dataset_key}.arrow")
+
+
+def _read_table(path):
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, "r") as source:
+            return SegmentTable(pa_ipc.open_file(source).read_all().to_pandas())
+    except Exception:
+        return None  # file hỏng -> tính lại
+
+
+def _write_table(segments, path, model_version):
+    if pa is None:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(segments.table, preserve_index=False)
+    tmp_path = path + ".tmp"
+    with pa_ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    # bảng của model cũ không dùng lại được nữa
+    keep_prefix = f"{TABLE_PREFIX}{model_version}-"
+    directory = os.path.dirname(path) or "."
+    for name in os.listdir(directory):
+        if name.startswith(TABLE_PREFIX) and name.endswith(".arrow") and not name.startswith(keep_prefix):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+_memo = OrderedDict()  # (thư mục, phiên bản model, dataset) -> SegmentTable, cũ nhất ở đầu
+_memo_lock = threading.Lock()
+
+
+def get_segments(chunk_source, dataset_key, model_state, stats=None, add_price_min=False, workers=1, store=None,
+                 directory=CACHE_DIR):
+    # Bảng phân khúc cho (model, dataset): memo trong process -> file trên đĩa -> tính mới
+    key = (os.path.abspath(directory), model_state.version, dataset_key)
+    with _memo_lock:
+        segments = _memo.get(key)
+        if segments is not None:
+            _memo.move_to_end(key)
+            return segments
+    path = _table_path(model_state.version, dataset_key, directory)
+    segments = _read_table(path)
+    if segments is None:
+        segments = build_segments(chunk_source, model_state, stats, add_price_min, workers, store)
+        _write_table(segments, path, model_state.version)
+    with _memo_lock:
+        for k in [k for k in _memo if k[:2] != key[:2]]:
+            del _memo[k]
+        _memo[key] = segments
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return segments
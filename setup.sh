@@ -7,5 +7,6 @@ echo "\
 [server]\n\
 headless = true\n\
 enableCORS=false\n\
+enableStaticServing = true\n\
 port = $PORT\n\
 " > ~/.streamlit/config.toml
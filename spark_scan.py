@@ -0,0 +1,238 @@
+# spark_scan.py
+# Backend quét anomaly bằng Spark chạy local[*] (không cần cluster), cùng logic với scoring.scan_dataframe:
+# - Tuỳ chọn: cần `pip install pyspark` + Java 17 (JAVA_HOME hoặc java trong PATH); thiếu thì available() = False.
+#   App chỉ hiện chế độ Spark khi bật MOTOBIKE_SPARK_SCAN=1: trên máy 1 core Spark chậm hơn pandas ở mọi kích thước đã đo
+#   (benchmarks/bench_spark_scan.py), chỉ đáng bật khi có nhiều core. pyspark chỉ được import khi thật sự quét.
+# - Nguồn: DataFrame pandas (file upload / .xlsx) -> createDataFrame qua Arrow; file CSV / Parquet đọc thẳng bằng spark.read
+#   (Parquet: cột số nguyên lưu dạng float được đổi về số nguyên như scoring.file_chunks trước khi làm sạch).
+# - Lượt 1 (impute): đếm 6 cột categorical trong 1 lượt mapInPandas (giá trị qua Spark dạng chuỗi, driver đổi lại
+#   đúng kiểu của cột trước khi chọn mode) và median 'Số Km đã đi' / 'Giá' đã làm sạch trên Spark
+#   (percentile chính xác, không approx) -> cùng ImputeStats với
+#   scoring.compute_impute_stats (kiểm tra: benchmarks/check_spark_parity.py). Cột object lẫn kiểu đã bị from_pandas
+#   ép về chuỗi để ghi Arrow, nên cả đếm lẫn chấm điểm trên Spark đều thấy giá trị chuỗi.
+# - Lượt 2: ModelState (pipeline sklearn + bản compiled / surrogate đang dùng) broadcast 1 lần cho mỗi worker Python,
+#   mapInPandas (pandas UDF theo lô Arrow) chạy clean_chunk -> predict_chunk (có dedup) -> anomaly_flags, chỉ trả dòng
+#   bất thường; driver gom lại, làm sạch phần nhỏ đó và dựng bảng như scoring.flag_chunk (cùng ngưỡng / rule).
+# - MOTOBIKE_SPARK_MASTER (mặc định local[*]), MOTOBIKE_SPARK_DRIVER_MEMORY (mặc định 2g).
+import importlib.util
+import os
+import shutil
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from data_cache import to_arrow_safe
+from preprocessing import preprocess_df_before_predict
+
+SPARK_MASTER = os.environ.get("MOTOBIKE_SPARK_MASTER", "local[*]")
+DRIVER_MEMORY = os.environ.get("MOTOBIKE_SPARK_DRIVER_MEMORY", "2g")
+APP_NAME = "motobike-anomaly-scan"
+ENABLED = os.environ.get("MOTOBIKE_SPARK_SCAN", "0") == "1"
+ROW_ID = "__row_id"  # index gốc của dòng -> cột 'Original Index' của bảng kết quả
+PRED_COL = "__pred"
+
+_spark = None
+_spark_lock = threading.Lock()
+
+
+def available():
+    # Có pyspark và Java không (không import thật, không khởi động JVM)
+    java_home = os.environ.get("JAVA_HOME")
+    has_java = bool(java_home and os.path.exists(os.path.join(java_home, "bin", "java"))) or shutil.which("java") is not None
+    return has_java and importlib.util.find_spec("pyspark") is not None
+
+
+def enabled():
+    # Hiện chế độ Spark trong app: phải bật tường minh và có đủ pyspark + Java
+    return ENABLED and available()
+
+
+def get_spark():
+    # 1 SparkSession / process; worker Python của Spark cần import được scoring / model_manager... của repo
+    global _spark
+    with _spark_lock:
+        if _spark is None:
+            from pyspark.sql import SparkSession
+            root = os.path.dirname(os.path.abspath(__file__))
+            paths = [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p]
+            if root not in paths:
+                os.environ["PYTHONPATH"] = os.pathsep.join([root] + paths)
+            _spark = (SparkSession.builder.master(SPARK_MASTER).appName(APP_NAME)
+                      .config("spark.driver.memory", DRIVER_MEMORY)
+                      .config("spark.executorEnv.PYTHONPATH", os.environ["PYTHONPATH"])
+                      .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+                      .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "false")
+                      .config("spark.sql.shuffle.partitions", str(os.cpu_count() or 1))
+                      .config("spark.ui.enabled", "false")
+                      .config("spark.ui.showConsoleProgress", "false")
+                      .getOrCreate())
+        return _spark
+
+
+def stop():
+    global _spark
+    with _spark_lock:
+        if _spark is not None:
+            _spark.stop()
+            _spark = None
+
+
+# ---------- Nguồn dữ liệu ----------
+def from_pandas(spark, df):
+    # Cột category / chuỗi pandas -> object, cột lẫn kiểu -> chuỗi (như cache Arrow); index gốc giữ trong ROW_ID
+    pdf = df.copy(deep=False)
+    for col in pdf.columns:
+        if isinstance(pdf[col].dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            pdf[col] = pdf[col].astype(object).where(pdf[col].notna(), None)
+    pdf = to_arrow_safe(pdf)
+    pdf[ROW_ID] = np.asarray(df.index, dtype=np.int64)
+    return spark.createDataFrame(pdf)
+
+
+def read_file(spark, path):
+    # CSV / Parquet đọc song song bằng Spark; .xlsx thì đọc bằng pandas rồi chuyển sang
+    from pyspark.sql.types import LongType
+    fmt = scoring.input_format(path)
+    if fmt == "xlsx":
+        return from_pandas(spark, pd.read_excel(path, engine="openpyxl"))
+    if fmt == "csv":
+        sdf = spark.read.csv(path, header=True, inferSchema=False, multiLine=True, escape='"')
+    else:
+        sdf = _integral_floats_as_text(spark.read.parquet(path))
+    # ROW_ID = vị trí dòng trong file, như index của pd.read_csv theo lô
+    schema = _with_field(sdf.schema, ROW_ID, LongType())
+    return sdf.rdd.zipWithIndex().map(lambda pair: (*pair[0], pair[1])).toDF(schema)
+
+
+def _integral_floats_as_text(sdf):
+    # Như nguồn Parquet của scoring.file_chunks: cột số nguyên lưu dạng float (có ô trống) -> integral_floats_to_int
+    # theo lô, rồi đưa sang chuỗi để clean_chunk thấy "14000" chứ không phải "14000.0" (lọc số ra 140000)
+    from pyspark.sql.types import FractionalType, StringType, StructField, StructType
+    cols = [f.name for f in sdf.schema.fields
+            if f.name in scoring.INTEGRAL_COLS and isinstance(f.dataType, FractionalType)]
+    if not cols:
+        return sdf
+    schema = StructType([StructField(f.name, StringType(), nullable=True) if f.name in cols else f
+                         for f in sdf.schema.fields])
+
+    def convert(batches):
+        for batch in batches:
+            batch = scoring.integral_floats_to_int(batch)
+            for col in cols:
+                # object (không để pandas 3 suy ra dtype str kiểu Arrow mà pyspark 3.5 chưa đọc được)
+                batch[col] = pd.Series([None if pd.isna(v) else str(v) for v in batch[col].astype(object)],
+                                       index=batch.index, dtype=object)
+            yield batch
+
+    return sdf.mapInPandas(convert, schema)
+
+
+def _with_field(schema, name, data_type):
+    # StructType.add sửa tại chỗ (và sdf.schema được cache) -> dựng schema mới
+    from pyspark.sql.types import StructField, StructType
+    return StructType(schema.fields + [StructField(name, data_type, nullable=True)])
+
+
+# ---------- Lượt 1: thống kê impute ----------
+def _value_counts(batches):
+    # value_counts(dropna=True) từng lô cho cả 6 cột; giá trị gửi về dạng chuỗi, _from_text đổi lại kiểu trên driver
+    for batch in batches:
+        parts = []
+        for i, col in enumerate(scoring.CAT_COLS):
+            counts = batch[col].value_counts(dropna=True)
+            # object (không để pandas 3 suy ra dtype str kiểu Arrow mà pyspark 3.5 chưa đọc được)
+            parts.append(pd.DataFrame({"col": i, "value": pd.Series([str(v) for v in counts.index], dtype=object),
+                                       "n": counts.to_numpy(dtype=np.int64)}))
+        yield pd.concat(parts, ignore_index=True)
+
+
+def _from_text(text, data_type):
+    # Chuỗi -> đúng kiểu Python của cột Spark (cột long có null tới lô pandas dạng float: "125.0" -> 125)
+    from pyspark.sql.types import BooleanType, FractionalType, IntegralType
+    if isinstance(data_type, IntegralType):
+        return int(text) if text.lstrip("-").isdigit() else int(float(text))
+    if isinstance(data_type, FractionalType):
+        return float(text)
+    if isinstance(data_type, BooleanType):
+        return text == "True"
+    return text
+
+
+def _cleaned_numbers(batches):
+    for batch in batches:
+        cleaned = preprocess_df_before_predict(batch[['Giá', 'Số Km đã đi']])
+        yield pd.DataFrame({"km": cleaned['Số Km đã đi'].to_numpy(dtype=np.float64, na_value=np.nan),
+                            "gia": cleaned['Giá'].to_numpy(dtype=np.float64, na_value=np.nan)})
+
+
+def compute_impute_stats(sdf):
+    from pyspark.sql import functions as F
+    rows = (sdf.select(*scoring.CAT_COLS).mapInPandas(_value_counts, "col int, value string, n long")
+            .groupBy("col", "value").agg(F.sum("n").alias("n")).collect())
+    # gộp lại trên driver sau khi đổi kiểu: 125 và "125.0" (cùng giá trị, khác lô) là 1 giá trị
+    counts = [Counter() for _ in scoring.CAT_COLS]
+    for row in rows:
+        col = scoring.CAT_COLS[row["col"]]
+        counts[row["col"]][_from_text(row["value"], sdf.schema[col].dataType)] += int(row["n"])
+    modes = {col: scoring.mode_from_counts(counts[i]) for i, col in enumerate(scoring.CAT_COLS)}
+    medians = (sdf.select('Giá', 'Số Km đã đi').mapInPandas(_cleaned_numbers, "km double, gia double")
+               .select(*[F.expr(f"percentile(CASE WHEN isnan({c}) THEN NULL ELSE {c} END, 0.5)").alias(c)
+                         for c in ("km", "gia")], F.count(F.lit(1)).alias("n"))
+               .first())
+    return scoring.ImputeStats(modes, _float_or_nan(medians["km"]), _float_or_nan(medians["gia"]), int(medians["n"]))
+
+
+def _float_or_nan(value):
+    # percentile trên cột toàn null -> None; pandas median trả NaN
+    return np.nan if value is None else float(value)
+
+
+# ---------- Lượt 2: chấm điểm trên worker ----------
+def _score_partition(broadcast):
+    def score(batches):
+        job = broadcast.value  # dict: ModelState, ImputeStats, ngưỡng, rule... (giải nén 1 lần / worker)
+        for batch in batches:
+            chunk = batch.set_index(ROW_ID)
+            df_clean = scoring.clean_chunk(chunk, job["stats"], job["add_price_min"])
+            pred_prices = scoring.predict_chunk(df_clean, job["model_state"])
+            residuals = df_clean["Giá"].to_numpy(dtype=np.float64) - pred_prices
+            is_anom, _ = scoring.anomaly_flags(df_clean, residuals, job["threshold"], job["rule"])
+            out = batch[is_anom].copy()
+            out[PRED_COL] = pred_prices[is_anom]
+            yield out
+    return score
+
+
+def scan(sdf, model_state, threshold, rule=None, stats=None, chunk_size=scoring.DEFAULT_CHUNK_SIZE):
+    # Quét Spark DataFrame (có cột ROW_ID), trả về bảng bất thường pandas giống scoring.scan_dataframe
+    from pyspark.sql.types import DoubleType
+    spark = sdf.sparkSession
+    add_price_min = scoring.check_columns([c for c in sdf.columns if c != ROW_ID])
+    spark.conf.set("spark.sql.execution.arrow.maxRecordsPerBatch", str(int(chunk_size)))
+    if stats is None:
+        stats = compute_impute_stats(sdf)
+    broadcast = spark.sparkContext.broadcast({"model_state": model_state, "stats": stats, "threshold": threshold,
+                                              "rule": rule, "add_price_min": add_price_min})
+    try:
+        schema = _with_field(sdf.schema, PRED_COL, DoubleType())
+        anomalies = sdf.mapInPandas(_score_partition(broadcast), schema).toPandas()
+    finally:
+        broadcast.unpersist()
+    if anomalies.empty:
+        return pd.DataFrame()
+    anomalies = anomalies.set_index(ROW_ID).sort_index()
+    anomalies.index.name = None
+    pred_prices = anomalies.pop(PRED_COL).to_numpy(dtype=np.float64)
+    # chỉ vài dòng bất thường: làm sạch lại trên driver (cùng stats) để ra đúng các cột của flag_chunk
+    return scoring.flag_chunk(scoring.clean_chunk(anomalies, stats, add_price_min), pred_prices, threshold, rule)
+
+
+def scan_dataframe(df, model_state, threshold, rule=None, chunk_size=scoring.DEFAULT_CHUNK_SIZE):
+    return scan(from_pandas(get_spark(), df), model_state, threshold, rule=rule, chunk_size=chunk_size)
+
+
+def scan_file(path, model_state, threshold, rule=None, chunk_size=scoring.DEFAULT_CHUNK_SIZE):
+    return scan(read_file(get_spark(), path), model_state, threshold, rule=rule, chunk_size=chunk_size)
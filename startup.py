@@ -0,0 +1,192 @@
+# startup.py
+# Báo cáo khởi động (cold start) cho deploy Procfile:
+# - Trong app: lúc process bắt đầu (đọc /proc, độ phân giải ~1 s), thời gian import phần dùng chung của demo_streamlit và
+#   từng trang (trang chỉ được import khi mở lần đầu qua import_page), time-to-first-render = process bắt đầu -> lần
+#   rerun đầu tiên chạy xong. Hiện ở tab Admin, xuất kèm JSON / Prometheus của perf_trace.
+# - CLI: python startup.py [--budget 15] chạy mỗi trang trong 1 process mới (python -X importtime + AppTest), in thời gian
+#   import theo package và time-to-first-render. Mặc định chỉ báo cáo (release phase trong Procfile không chặn deploy khi
+#   builder chậm); --strict hoặc MOTOBIKE_COLD_START_STRICT=1 (CI) -> trang vượt budget / lỗi thì mã thoát 1.
+import argparse
+import datetime
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+MODULE_LOADED_AT = time.time()
+BUDGET_SECONDS = float(os.environ.get("MOTOBIKE_COLD_START_BUDGET", "15"))
+STRICT = os.environ.get("MOTOBIKE_COLD_START_STRICT", "0") == "1"
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_streamlit.py")
+PAGE_KEY = "page"  # key của selectbox chọn trang trong demo_streamlit
+
+
+def process_start_time():
+    # epoch lúc process khởi động (Linux: starttime trong /proc/self/stat + btime); không đọc được thì lấy lúc import module này
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])  # trường 22 (starttime), sau "(comm)" là trường 3
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return min(boot_time + start_ticks / os.sysconf("SC_CLK_TCK"), MODULE_LOADED_AT)
+    except (OSError, ValueError, IndexError, StopIteration):
+        return MODULE_LOADED_AT
+
+
+PROCESS_START = process_start_time()
+
+_lock = threading.Lock()
+_imports = OrderedDict()  # tên -> giây của lần import đầu tiên
+_first_render = None  # giây từ lúc process bắt đầu tới khi lần rerun đầu tiên chạy xong
+
+
+def record_import(name, seconds):
+    with _lock:
+        _imports.setdefault(name, seconds)
+
+
+def mark_imports_done(name):
+    # gọi ngay sau khối import của script: lần đầu = thời gian từ lúc import startup tới đây, các rerun sau bỏ qua
+    with _lock:
+        if name not in _imports:
+            _imports[name] = time.time() - MODULE_LOADED_AT
+
+
+def import_page(module_name):
+    # import module trang lần đầu khi trang được mở (kéo theo matplotlib / seaborn / sklearn... của riêng trang đó)
+    module = sys.modules.get(module_name)
+    if module is None:
+        t0 = time.perf_counter()
+        module = importlib.import_module(module_name)
+        record_import(module_name, time.perf_counter() - t0)
+    return module
+
+
+def mark_rendered():
+    global _first_render
+    if _first_render is None:
+        with _lock:
+            if _first_render is None:
+                _first_render = time.time() - PROCESS_START
+
+
+def report():
+    with _lock:
+        imports = dict(_imports)
+        first_render = _first_render
+    return {
+        "process_start": datetime.datetime.fromtimestamp(PROCESS_START).isoformat(timespec="seconds"),
+        "server_boot_s": MODULE_LOADED_AT - PROCESS_START,  # python + streamlit server tới lúc script chạy lần đầu
+        "imports_s": imports,
+        "time_to_first_render_s": first_render,
+        "budget_s": BUDGET_SECONDS,
+    }
+
+
+def table():
+    import pandas as pd
+    info = report()
+    rows = [("Khởi động server (python + streamlit)", info["server_boot_s"])]
+    rows += [(f"import {name}", seconds) for name, seconds in info["imports_s"].items()]
+    if info["time_to_first_render_s"] is not None:
+        rows.append(("Time-to-first-render", info["time_to_first_render_s"]))
+    return pd.DataFrame(rows, columns=["Giai đoạn", "Giây"])
+
+
+def prometheus_lines():
+    from perf_trace import prometheus_label  # perf_trace import module này -> import trong hàm, tránh vòng lặp
+    info = report()
+    lines = ["# HELP motobike_startup_import_seconds Thời gian import lần đầu (module dùng chung / từng trang).",
+             "# TYPE motobike_startup_import_seconds gauge"]
+    for name, seconds in info["imports_s"].items():
+        lines.append(f'motobike_startup_import_seconds{{module="{prometheus_label(name)}"}} {seconds:.6f}')
+    lines += ["# HELP motobike_time_to_first_render_seconds Từ lúc process bắt đầu tới khi lần rerun đầu tiên chạy xong.",
+              "# TYPE motobike_time_to_first_render_seconds gauge"]
+    if info["time_to_first_render_s"] is not None:
+        lines.append(f"motobike_time_to_first_render_seconds {info['time_to_first_render_s']:.6f}")
+    return lines
+
+
+# ---------- CLI: đo cold start từng trang trong process mới ----------
+_CHILD = """
+import time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=600)
+at.session_state[{key!r}] = {page!r}
+at.run()
+print("STARTUP_RESULT", time.time(), len(at.exception), flush=True)
+"""
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package" -> giây self-time theo package gốc
+    per_package = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return per_package
+
+
+def measure_page(page, python=sys.executable):
+    launched = time.time()
+    proc = subprocess.run([python, "-X", "importtime", "-c", _CHILD.format(app=APP_PATH, key=PAGE_KEY, page=page)],
+                          cwd=os.path.dirname(APP_PATH), capture_output=True, text=True)
+    result = next((line.split() for line in proc.stdout.splitlines() if line.startswith("STARTUP_RESULT")), None)
+    if proc.returncode != 0 or result is None:
+        raise RuntimeError(f"Không chạy được trang {page}: {proc.stderr[-2000:]}")
+    imports = parse_importtime(proc.stderr)
+    return {
+        "page": page,
+        "time_to_first_render_s": float(result[1]) - launched,
+        "exceptions": int(result[2]),
+        "import_total_s": sum(imports.values()),
+        "imports_s": dict(imports.most_common()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo cold start (import + lần render đầu) của từng trang demo_streamlit.")
+    parser.add_argument("--pages", nargs="+", default=["Tổng quan", "Dự đoán giá", "Phát hiện bất thường"])
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS, help="Giây tối đa cho time-to-first-render")
+    parser.add_argument("--top", type=int, default=10, help="Số package import chậm nhất cần in")
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--strict", action="store_true", default=STRICT,
+                        help="Mã thoát 1 khi có trang vượt budget / lỗi (mặc định chỉ báo cáo)")
+    args = parser.parse_args(argv)
+
+    results, over_budget = [], []
+    for page in args.pages:
+        try:
+            res = measure_page(page)
+        except (RuntimeError, OSError) as e:
+            # process con không chạy được (thiếu file model / dữ liệu...) -> ghi nhận trang lỗi, đo tiếp trang khác
+            over_budget.append(page)
+            results.append({"page": page, "error": str(e)})
+            print(f"[LỖI] {page}: {e}")
+            continue
+        results.append(res)
+        status = "OK" if res["time_to_first_render_s"] <= args.budget and not res["exceptions"] else "VƯỢT"
+        if status != "OK":
+            over_budget.append(page)
+        print(f"[{status}] {page}: first render {res['time_to_first_render_s']:.2f} s (budget {args.budget:g} s) · "
+              f"import {res['import_total_s']:.2f} s · exception {res['exceptions']}")
+        for name, seconds in list(res["imports_s"].items())[:args.top]:
+            print(f"      {name:<24}{seconds * 1000:>10,.0f} ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"budget_s": args.budget, "pages": results}, f, ensure_ascii=False, indent=2)
+    if over_budget:
+        print(f"Trang vượt budget / lỗi: {', '.join(over_budget)}")
+        return 1 if args.strict else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+# surrogate.py
+# Model thay thế (surrogate) chưng cất từ GBR: bảng tra giá theo (tổ hợp Hãng / Loại / Dung tích / Dòng / Xuất xứ,
+# năm đăng ký, khoảng Số Km), giá trị = dự đoán của chính GBR -> predict = vài phép tra mảng thay cho 300 cây.
+# - Dựng: tổ hợp lấy từ data_motobikes.xlsx; mỗi năm nguyên trong khoảng ngưỡng của GBR (năm chính xác tuyệt đối);
+#   Số Km chia KM_BINS khoảng theo phân vị của dữ liệu thật + mẫu giả lập (năm lệch ±2, km nhân nhiễu log-normal),
+#   cạnh khoảng bám theo ngưỡng km của GBR, giá trị ô = GBR dự đoán tại km trung vị của khoảng.
+# - Impute giống pipeline (median / most_frequent); tổ hợp chưa có trong bảng hoặc category lạ -> gọi GBR (fallback).
+# - Cổng chất lượng: chỉ chấp nhận khi MAE (so với giá thật) <= MAE của GBR x (1 + tolerance); lưu .npz (không pickle)
+#   kèm số đo MAE, độ lệch so với GBR và tốc độ (dòng/s batch, p50 1 dòng) của cả 2.
+# - App dùng surrogate khi MOTOBIKE_SURROGATE=1 và file khớp đúng phiên bản GBR (model_manager).
+# Dựng: python surrogate.py [--synthetic 200000] [--km-bins 64] [--tolerance 0.02] [-o car_price_surrogate.npz]
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+SURROGATE_PATH = os.environ.get("MOTOBIKE_SURROGATE_PATH", "car_price_surrogate.npz")
+DEFAULT_TOLERANCE = float(os.environ.get("MOTOBIKE_SURROGATE_TOLERANCE", "0.02"))
+KM_BINS = 64
+SYNTHETIC_ROWS = 200_000
+YEAR_RANGE = (1980, 2025)
+SPEED_ROWS = 100_000
+SINGLE_ROWS = 300
+GRID_BATCH = 200_000  # số ô bảng gửi cho GBR mỗi lần khi dựng
+
+
+class SurrogateError(ValueError):
+    pass
+
+
+class LookupSurrogate:
+    def __init__(self, num_cols, num_fill, cat_cols, cat_fill, categories, combo_keys, year_min, km_edges, table, meta):
+        self.num_cols = list(num_cols)      # [cột năm, cột km]
+        self.num_fill = [float(v) for v in num_fill]
+        self.cat_cols = list(cat_cols)
+        self.cat_fill = list(cat_fill)
+        self.categories = [list(c) for c in categories]
+        self.cat_lookup = [{v: i for i, v in enumerate(cats)} for cats in self.categories]
+        self.radix = np.array([len(c) for c in self.categories], dtype=np.int64)
+        self.combo_keys = np.asarray(combo_keys, dtype=np.int64)  # đã sắp xếp tăng dần
+        self.year_min = int(year_min)
+        self.km_edges = np.asarray(km_edges, dtype=np.float64)
+        self.table = np.asarray(table, dtype=np.float32)  # (tổ hợp, năm, khoảng km)
+        self.meta = meta
+        self._combo_index = {int(k): i for i, k in enumerate(self.combo_keys)}
+
+    @property
+    def year_max(self):
+        return self.year_min + self.table.shape[1] - 1
+
+    @property
+    def digest(self):
+        h = hashlib.sha1(self.table.tobytes())
+        h.update(self.combo_keys.tobytes())
+        h.update(self.km_edges.tobytes())
+        return h.hexdigest()[:12]
+
+    # ---------- Predict ----------
+    def _mixed_key(self, codes):
+        key = np.zeros(len(codes), dtype=np.int64)
+        for j in range(len(self.cat_cols)):
+            key = key * self.radix[j] + codes[:, j]
+        return key
+
+    def lookup(self, X):
+        # -> (giá, mask dòng tra được); dòng không tra được (category lạ, tổ hợp chưa có, năm lẻ) để NaN
+        n = len(X)
+        codes = np.empty((n, len(self.cat_cols)), dtype=np.int64)
+        for j, col in enumerate(self.cat_cols):
+            s = X[col]
+            s = s.where(s.notna(), self.cat_fill[j])
+            codes[:, j] = pd.Categorical(s, categories=self.categories[j]).codes
+        year = pd.to_numeric(X[self.num_cols[0]], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        year = np.where(np.isnan(year), self.num_fill[0], year)
+        km = pd.to_numeric(X[self.num_cols[1]], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        km = np.where(np.isnan(km), self.num_fill[1], km)
+
+        key = self._mixed_key(np.maximum(codes, 0))
+        pos = np.minimum(np.searchsorted(self.combo_keys, key), len(self.combo_keys) - 1)
+        ok = (codes >= 0).all(axis=1) & (self.combo_keys[pos] == key) & (year == np.floor(year))
+        year_idx = np.clip(year, self.year_min, self.year_max).astype(np.int64) - self.year_min
+        km_idx = np.searchsorted(self.km_edges, km, side="left")  # x <= ngưỡng -> nhánh trái như cây sklearn
+        out = np.full(n, np.nan)
+        out[ok] = self.table[pos[ok], year_idx[ok], km_idx[ok]]
+        return out, ok
+
+    def predict(self, X, fallback=None):
+        out, ok = self.lookup(X)
+        if not ok.all():
+            if fallback is None:
+                raise SurrogateError(f"{int((~ok).sum())} dòng ngoài bảng tra và không có model fallback")
+            out[~ok] = fallback(X.iloc[np.flatnonzero(~ok)])
+        return out
+
+    def predict_one(self, row, fallback=None):
+        codes = []
+        for j, col in enumerate(self.cat_cols):
+            v = row.get(col)
+            if v is None or (isinstance(v, float) and np.isnan(v)):
+                v = self.cat_fill[j]
+            codes.append(self.cat_lookup[j].get(v, -1))
+        nums = []
+        for j, col in enumerate(self.num_cols):
+            try:
+                v = float(row.get(col))
+            except (TypeError, ValueError):
+                v = np.nan
+            nums.append(self.num_fill[j] if np.isnan(v) else v)
+        year, km = nums
+        key = 0
+        for code, radix in zip(codes, self.radix.tolist()):
+            key = key * radix + code
+        combo = self._combo_index.get(key) if min(codes) >= 0 else None
+        if combo is None or year != int(year):
+            if fallback is None:
+                raise SurrogateError("Dòng ngoài bảng tra và không có model fallback")
+            return fallback(row)
+        year_idx = min(max(int(year), self.year_min), self.year_max) - self.year_min
+        km_idx = int(np.searchsorted(self.km_edges, km, side="left"))
+        return float(self.table[combo, year_idx, km_idx])
+
+    # ---------- Lưu / đọc ----------
+    def save(self, path):
+        meta = {**self.meta, "num_cols": self.num_cols, "num_fill": self.num_fill, "cat_cols": self.cat_cols,
+                "cat_fill": self.cat_fill, "categories": self.categories, "year_min": self.year_min}
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, combo_keys=self.combo_keys, km_edges=self.km_edges, table=self.table,
+                            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            return cls(meta.pop("num_cols"), meta.pop("num_fill"), meta.pop("cat_cols"), meta.pop("cat_fill"),
+                       meta.pop("categories"), data["combo_keys"], meta.pop("year_min"), data["km_edges"],
+                       data["table"], meta)
+
+    def describe(self):
+        speed = self.meta.get("speed", {})
+        metrics = self.meta.get("metrics", {})
+        parts = [f"surrogate {self.table.shape[0]:,} tổ hợp x {self.table.shape[1]} năm x {self.table.shape[2]} khoảng km"]
+        if speed.get("batch_speedup"):
+            parts.append(f"batch x{speed['batch_speedup']:,.0f}, 1 dòng x{speed['single_speedup']:,.0f} so với GBR")
+        if metrics.get("mae_teacher"):
+            parts.append(f"MAE {metrics['mae_surrogate'] / 1e6:,.2f}M (GBR {metrics['mae_teacher'] / 1e6:,.2f}M)")
+        return " · ".join(parts)
+
+
+# ---------- Dựng bảng từ GBR ----------
+def _gbr_parts(pipeline):
+    # cột / giá trị impute / categories của pipeline GBR + ngưỡng của cây trên từng cột số (qua bản compiled)
+    from compiled_gbr import compile_pipeline
+    compiled = compile_pipeline(pipeline)
+    thresholds = []
+    for i in range(len(compiled.num_cols)):
+        split = (compiled.node_src == i) & (compiled.node_cat < 0) & (compiled.node_left != np.arange(len(compiled.node_left)))
+        thresholds.append(np.unique(compiled.node_thr[split].astype(np.float64)))
+    return compiled, thresholds
+
+
+def synthetic_features(X, n_rows, seed=0):
+    # mẫu giả lập quanh dữ liệu thật: giữ nguyên tổ hợp xe, năm lệch ±2, km nhân nhiễu log-normal
+    rng = np.random.default_rng(seed)
+    out = X.iloc[rng.integers(0, len(X), n_rows)].reset_index(drop=True)
+    year, km = out.columns[0], out.columns[1]
+    out[year] = np.clip(out[year].to_numpy(dtype=np.int64) + rng.integers(-2, 3, n_rows), *YEAR_RANGE)
+    out[km] = np.round(out[km].to_numpy(dtype=np.float64) * rng.lognormal(0.0, 0.3, n_rows))
+    return out
+
+
+def _km_bins(km, gbr_thresholds, n_bins):
+    # cạnh = phân vị của km mẫu, dời về ngưỡng km gần nhất của GBR (trong 1 khoảng GBR ít đổi giá trị hơn)
+    quantiles = np.quantile(km, np.linspace(0, 1, n_bins + 1)[1:-1])
+    if len(gbr_thresholds):
+        nearest = np.clip(np.searchsorted(gbr_thresholds, quantiles), 1, len(gbr_thresholds) - 1)
+        left, right = gbr_thresholds[nearest - 1], gbr_thresholds[nearest]
+        quantiles = np.where(quantiles - left <= right - quantiles, left, right)
+    edges = np.unique(quantiles)
+    bin_idx = np.searchsorted(edges, km, side="left")
+    reps = np.empty(len(edges) + 1)
+    for b in range(len(edges) + 1):
+        in_bin = km[bin_idx == b]
+        if len(in_bin):
+            reps[b] = np.median(in_bin)
+        else:  # khoảng rỗng: lấy điểm giữa 2 cạnh
+            lo = edges[b - 1] if b > 0 else edges[0]
+            hi = edges[b] if b < len(edges) else edges[-1]
+            reps[b] = (lo + hi) / 2
+    return edges, reps
+
+
+def build(model_state, X_real, n_synthetic=SYNTHETIC_ROWS, km_bins=KM_BINS, seed=0):
+    compiled, thresholds = _gbr_parts(model_state.model)
+    num_cols, cat_cols = compiled.num_cols, compiled.cat_cols
+    X_real = X_real[num_cols + cat_cols]
+    samples = pd.concat([X_real, synthetic_features(X_real, n_synthetic, seed)], ignore_index=True)
+
+    # năm: mọi năm nguyên phủ hết ngưỡng của GBR -> kẹp năm ngoài khoảng vẫn ra đúng nhánh
+    year_thr = thresholds[0]
+    year_min = min(YEAR_RANGE[0], int(np.floor(year_thr.min()))) if len(year_thr) else YEAR_RANGE[0]
+    year_max = max(YEAR_RANGE[1], int(np.ceil(year_thr.max())) + 1) if len(year_thr) else YEAR_RANGE[1]
+    years = np.arange(year_min, year_max + 1)
+    km = pd.to_numeric(samples[num_cols[1]], errors="coerce").fillna(compiled.num_fill[1]).to_numpy(dtype=np.float64)
+    km_edges, km_reps = _km_bins(km, thresholds[1], km_bins)
+
+    # tổ hợp 5 cột phân loại có trong dữ liệu thật (đã impute như pipeline)
+    codes = np.empty((len(X_real), len(cat_cols)), dtype=np.int64)
+    for j, col in enumerate(cat_cols):
+        s = X_real[col].astype(object)
+        codes[:, j] = pd.Categorical(s.where(s.notna(), compiled.cat_fill[j]), categories=compiled.categories[j]).codes
+    codes = np.unique(codes[(codes >= 0).all(axis=1)], axis=0)
+    radix = np.array([len(c) for c in compiled.categories], dtype=np.int64)
+    keys = np.zeros(len(codes), dtype=np.int64)
+    for j in range(len(cat_cols)):
+        keys = keys * radix[j] + codes[:, j]
+    order = np.argsort(keys)
+    codes, keys = codes[order], keys[order]
+
+    # lưới (tổ hợp x năm x km đại diện) -> GBR dự đoán trên mã số trực tiếp (không dựng DataFrame chuỗi)
+    n_combo, n_year, n_km = len(codes), len(years), len(km_reps)
+    grid = np.empty((n_combo * n_year * n_km, len(num_cols) + len(cat_cols)), dtype=np.float32)
+    grid[:, 0] = np.tile(np.repeat(years, n_km), n_combo)
+    grid[:, 1] = np.tile(km_reps, n_combo * n_year)
+    grid[:, 2:] = np.repeat(codes, n_year * n_km, axis=0)
+    values = np.empty(len(grid))
+    for start in range(0, len(grid), GRID_BATCH):
+        values[start:start + GRID_BATCH] = compiled.predict_encoded(grid[start:start + GRID_BATCH])
+    table = values.reshape(n_combo, n_year, n_km)
+
+    meta = {"teacher_version": model_state.teacher_version, "km_bins": int(n_km), "n_synthetic": int(n_synthetic),
+            "seed": int(seed), "built_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+    return LookupSurrogate(num_cols, compiled.num_fill, cat_cols, compiled.cat_fill, compiled.categories,
+                           keys, year_min, km_edges, table, meta), samples
+
+
+# ---------- Cổng chất lượng + tốc độ ----------
+def evaluate(surrogate, model_state, X, y, samples, tolerance=DEFAULT_TOLERANCE):
+    teacher = model_state.predict_teacher
+    valid = ~np.isnan(y)
+    pred_teacher = teacher(X)
+    pred_surrogate = surrogate.predict(X, fallback=teacher)
+    sample_teacher = teacher(samples)
+    sample_surrogate, covered = surrogate.lookup(samples)
+    mae_teacher = float(np.mean(np.abs(pred_teacher - y)[valid]))
+    mae_surrogate = float(np.mean(np.abs(pred_surrogate - y)[valid]))
+    metrics = {
+        "rows": int(valid.sum()),
+        "mae_teacher": mae_teacher,
+        "mae_surrogate": mae_surrogate,
+        "mae_ratio": mae_surrogate / mae_teacher,
+        "tolerance": tolerance,
+        "fidelity_mae": float(np.mean(np.abs(pred_surrogate - pred_teacher))),  # lệch so với GBR trên dữ liệu thật
+        "fidelity_mae_synthetic": float(np.mean(np.abs(sample_surrogate[covered] - sample_teacher[covered]))),
+        "coverage": float(covered.mean()),  # tỷ lệ dòng tra được bảng (còn lại gọi GBR)
+    }
+    metrics["accepted"] = bool(mae_surrogate <= mae_teacher * (1 + tolerance))
+    return metrics
+
+
+def _p50_single_ms(fn, rows):
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        fn(row)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def measure_speed(surrogate, model_state, samples):
+    batch = samples.iloc[:SPEED_ROWS]
+    teacher = model_state.predict_teacher
+    t0 = time.perf_counter()
+    teacher(batch)
+    teacher_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    surrogate.predict(batch, fallback=teacher)
+    surrogate_s = time.perf_counter() - t0
+    rows = batch.iloc[:SINGLE_ROWS].to_dict("records")
+    teacher_one = _p50_single_ms(model_state.predict_teacher_one, rows)
+    surrogate_one = _p50_single_ms(lambda row: surrogate.predict_one(row, fallback=model_state.predict_teacher_one), rows)
+    return {
+        "teacher_engine": "compiled" if model_state.compiled is not None else "sklearn",
+        "batch_rows": len(batch),
+        "teacher_rows_per_s": len(batch) / teacher_s,
+        "surrogate_rows_per_s": len(batch) / surrogate_s,
+        "batch_speedup": teacher_s / surrogate_s,
+        "teacher_single_p50_ms": teacher_one,
+        "surrogate_single_p50_ms": surrogate_one,
+        "single_speedup": teacher_one / surrogate_one,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chưng cất GBR thành bảng tra giá (surrogate) có cổng kiểm tra MAE.")
+    parser.add_argument("-o", "--output", default=SURROGATE_PATH)
+    parser.add_argument("--data", default="data_motobikes.xlsx")
+    parser.add_argument("--synthetic", type=int, default=SYNTHETIC_ROWS, help="Số mẫu giả lập thêm vào dữ liệu thật")
+    parser.add_argument("--km-bins", type=int, default=KM_BINS)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="MAE surrogate <= MAE GBR x (1 + tolerance)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    import data_cache
+    import model_manager
+    import scoring
+    state = model_manager.get_model_state(model_manager.MODEL_PATH)
+    if state.model is None:
+        print(f"Lỗi load model: {state.error}")
+        return 1
+    df = data_cache.load_dataset(args.data)
+    clean = scoring.clean_chunk(df, scoring.compute_impute_stats(scoring.frame_chunks(df, len(df))), add_price_min=True)
+    y = clean["Giá"].to_numpy(dtype=np.float64, na_value=np.nan)
+    X = clean.drop(columns=["Giá"])
+
+    t0 = time.perf_counter()
+    surrogate, samples = build(state, X, args.synthetic, args.km_bins, args.seed)
+    build_s = time.perf_counter() - t0
+    metrics = evaluate(surrogate, state, X, y, samples, args.tolerance)
+    speed = measure_speed(surrogate, state, samples)
+    surrogate.meta.update({"metrics": metrics, "speed": speed, "build_seconds": build_s})
+
+    print(f"Bảng {surrogate.table.shape} ({surrogate.table.nbytes / 1e6:,.1f} MB) dựng trong {build_s:,.1f} s")
+    print(f"MAE GBR {metrics['mae_teacher'] / 1e6:,.3f}M · surrogate {metrics['mae_surrogate'] / 1e6:,.3f}M "
+          f"(x{metrics['mae_ratio']:.4f}, cho phép x{1 + args.tolerance:.4f}) · lệch so với GBR {metrics['fidelity_mae'] / 1e6:,.3f}M "
+          f"(giả lập {metrics['fidelity_mae_synthetic'] / 1e6:,.3f}M) · tra bảng được {metrics['coverage']:.1%}")
+    print(f"Batch {speed['batch_rows']:,} dòng: GBR ({speed['teacher_engine']}) {speed['teacher_rows_per_s']:,.0f} dòng/s -> "
+          f"surrogate {speed['surrogate_rows_per_s']:,.0f} dòng/s (x{speed['batch_speedup']:,.1f}) · 1 dòng p50 "
+          f"{speed['teacher_single_p50_ms']:.3f} -> {speed['surrogate_single_p50_ms']:.3f} ms (x{speed['single_speedup']:,.1f})")
+    if not metrics["accepted"]:
+        print("Không đạt cổng MAE -> không ghi surrogate.")
+        return 1
+    surrogate.save(args.output)
+    print(f"Đạt cổng MAE -> {args.output} (bật trong app: MOTOBIKE_SURROGATE=1)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
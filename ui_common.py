@@ -0,0 +1,188 @@
+# ui_common.py
+# Phần giao diện dùng chung cho mọi trang, chỉ phụ thuộc streamlit + assets + vehicle_index (không matplotlib / sklearn):
+# - THEME_CSS: CSS dark theme, bỏ comment + khoảng trắng thừa 1 lần khi import -> mỗi rerun gửi bản rút gọn.
+# - display_title_overlay (ảnh bìa + tiêu đề) và vehicle_selectors (selectbox thông số xe lồng nhau).
+import os
+import re
+
+import streamlit as st
+
+import assets # Ảnh giao diện đã thu nhỏ + nén WebP, cache theo process
+import perf_trace
+import vehicle_index # Chỉ mục Hãng -> Dòng -> Loại / Dung tích / Xuất xứ cho selectbox lồng nhau
+
+# Ảnh phục vụ qua ./static (URL, trình duyệt tự cache) nếu server bật enableStaticServing, ngược lại data URI WebP nhỏ
+STATIC_SERVING = bool(st.get_option("server.enableStaticServing"))
+
+# --- CUSTOM CSS FOR ENHANCED FUTURISTIC/MECHANICAL THEME ---
+_THEME_CSS_SOURCE = """
+<style>
+/* Global Background (Dark/Mechanical) */
+.stApp {
+    background-color: #0d1117; /* Dark Background */
+    color: #c9d1d9; /* Light gray text */
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+}
+
+/* Highlight/Primary Color (Deep Neon Cyan) */
+:root {
+    --primary-color: #00bcd4; /* Cyan/Teal Neon */
+    --secondary-color: #00e5ff; /* Brighter Cyan */
+    --text-glow: 0 0 15px rgba(0, 229, 255, 0.9), 0 0 25px rgba(0, 229, 255, 0.4);
+}
+
+/* Headers (H1, H2, H3, H4) in Content - NO GLOW, highlight with color and border */
+h1, h2, h3, h4 {
+    color: var(--secondary-color);
+    text-shadow: none; /* ĐÃ XÓA GLOW */
+    border-bottom: 2px solid rgba(0, 188, 212, 0.4);
+    padding-bottom: 8px;
+    margin-top: 20px;
+}
+
+/* Global Content Padding */
+.block-container {
+    padding-top: 2rem;
+    padding-bottom: 2rem;
+}
+
+/* --- CUSTOM HEADER OVERLAY STYLE (Dùng Background CSS) --- */
+/* Container for the image and text overlay */
+.cover-header {
+    position: relative; 
+    height: 300px; /* Chiều cao cố định */
+    margin-bottom: 30px;
+    border-radius: 10px;
+    box-shadow: 0 0 20px rgba(0, 188, 212, 0.5);
+    overflow: hidden; 
+    
+    /* Cần thiết cho Background Scaling */
+    background-position: center; 
+}
+
+/* Text Overlay Container */
+.cover-text-overlay {
+    position: absolute;
+    top: 0;
+    left: 0;
+    width: 100%;
+    height: 100%;
+    z-index: 10; 
+    
+    /* Centering the H1 text */
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    text-align: center;
+}
+
+/* Styling the H1 title overlay on the cover (GLOW KEPT ONLY HERE) */
+.cover-header h1 {
+    z-index: 10;
+    color: white; /* Màu trắng cho tiêu đề trên ảnh */
+    text-shadow: var(--text-glow); /* GLOW DUY NHẤT */
+    font-size: 3em;
+    padding: 0;
+    margin: 0;
+    border-bottom: none;
+    width: 90%; 
+    text-align: center;
+}
+
+/* New CSS for notes at the bottom right of the cover */
+.cover-notes {
+    position: absolute;
+    bottom: 15px; 
+    right: 20px; 
+    z-index: 10;
+    color: rgba(255, 255, 255, 0.9); 
+    font-size: 0.85em;
+    line-height: 1.4;
+    text-align: left; 
+    text-shadow: 0 0 5px rgba(0, 0, 0, 0.8); 
+    width: 300px; 
+}
+/* Style for pending rows in Admin table */
+.pending-row {
+    background-color: rgba(255, 0, 0, 0.2);
+}
+</style>
+"""
+THEME_CSS = re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", _THEME_CSS_SOURCE, flags=re.S)).strip()
+
+
+def inject_theme():
+    st.markdown(THEME_CSS, unsafe_allow_html=True)
+
+
+# Helper function for Image Overlay (Ảnh bìa WebP đã thu nhỏ làm CSS Background)
+@perf_trace.traced("images")
+def display_title_overlay(title_text, image_path, notes_html=""):
+    
+    background_style = ""
+    # Lớp phủ tối 15% (tương đương filter: brightness(0.85))
+    dark_filter = "linear-gradient(rgba(0,0,0,0.15), rgba(0,0,0,0.15))" 
+    
+    # Fallback box style nếu không tìm thấy ảnh
+    fallback_style = "background-color: #161b22; border: 2px dashed #00bcd4;"
+    
+    if os.path.exists(image_path):
+        try:
+            # Ảnh bìa đã thu nhỏ / cắt dải giữa (tạo 1 lần / process): URL tĩnh hoặc data URI
+            img_src = f"url({assets.asset_src(image_path, 'hero', STATIC_SERVING)})"
+            
+            # SỬA LỖI REPEAT VÀ ĐẢM BẢO SCALING (Sử dụng longhand properties)
+            # 1. Background Image: Filter (lớp 1) và Ảnh (lớp 2)
+            background_style += f"background-image: {dark_filter}, {img_src};"
+            # 2. Background Repeat: no-repeat cho cả hai lớp (Chặn lặp lại)
+            background_style += "background-repeat: no-repeat, no-repeat;"
+            # 3. Background Position: center cho cả hai lớp (Lấy phần trung tâm)
+            background_style += "background-position: center, center;"
+            # 4. Background Size: auto cho filter, cover cho ảnh (Scaling ra vừa khung)
+            background_style += "background-size: auto, cover;"
+            
+            # Reset fallback style nếu ảnh được load qua CSS
+            fallback_style = "" 
+            
+        except Exception:
+            # Giữ nguyên fallback style nếu có lỗi đọc ảnh
+            pass
+            
+    # HTML structure now uses inline style for background
+    html_content = f"""
+    <div class="cover-header" style="{fallback_style} {background_style}">
+        <div class="cover-text-overlay">
+            <h1>{title_text}</h1>
+            <div class="cover-notes">{notes_html}</div>
+        </div>
+    </div>
+    """
+    st.markdown(html_content, unsafe_allow_html=True)
+
+
+# Selectbox thông số xe lồng nhau theo chỉ mục (dựng 1 lần / dataset): Dòng xe chỉ gồm dòng của Hãng đã chọn, ...
+def vehicle_selectors(df, keys=(None,) * 6, free_key=None):
+    index = vehicle_index.vehicle_index(df)
+    free = st.checkbox("Cho phép chọn tổ hợp chưa có trong dữ liệu", key=free_key)
+
+    def options(*path):
+        return index.values(vehicle_index.LEVELS[len(path)]) if free else index.options(*path)
+
+    col_cat1, col_cat2, col_cat3 = st.columns(3)
+    with col_cat1:
+        thuong_hieu = st.selectbox("Hãng xe", options(), key=keys[0])
+        tinh_trang = st.selectbox("Tình trạng", index.values("Tình trạng"), key=keys[1])
+    with col_cat2:
+        dong_xe = st.selectbox("Dòng xe", options(thuong_hieu), key=keys[2])
+        loai_xe = st.selectbox("Loại xe", options(thuong_hieu, dong_xe), key=keys[3])
+    with col_cat3:
+        dung_tich_xe = st.selectbox("Dung tích xe (cc)", options(thuong_hieu, dong_xe, loai_xe), key=keys[4])
+        xuat_xu = st.selectbox("Xuất xứ", options(thuong_hieu, dong_xe, loai_xe, dung_tich_xe), key=keys[5])
+
+    n_listings = index.count(thuong_hieu, dong_xe, loai_xe, dung_tich_xe, xuat_xu)
+    if n_listings:
+        st.caption(f"📊 Dữ liệu có **{n_listings:,}** tin đăng cùng cấu hình "
+                   f"({index.count(thuong_hieu, dong_xe):,} tin {thuong_hieu} {dong_xe}, {index.count(thuong_hieu):,} tin {thuong_hieu}).")
+    else:
+        st.warning(f"⚠️ Tổ hợp **{thuong_hieu} {dong_xe} · {loai_xe} · {dung_tich_xe} · {xuat_xu}** chưa từng có trong dữ liệu huấn luyện: giá dự đoán là ngoại suy, độ tin cậy thấp.")
+    return thuong_hieu, tinh_trang, dong_xe, loai_xe, dung_tich_xe, xuat_xu
@@ -0,0 +1,90 @@
+# vehicle_index.py
+# Chỉ mục Hãng xe -> Dòng xe -> Loại xe -> Dung tích xe -> Xuất xứ, dựng 1 lần / dataset:
+# - Thay cho df[col].dropna().unique() trên 6 cột mỗi rerun (12 lần quét cột / tương tác ở 2 trang).
+# - Selectbox lồng nhau: danh sách lựa chọn của mỗi cấp = các nhánh con của tổ hợp đã chọn (tra dict O(1)),
+#   giữ thứ tự xuất hiện đầu tiên như unique().
+# - Mỗi nút mang số tin đăng của tổ hợp; count() == 0 nghĩa là dữ liệu chưa từng có tổ hợp đó (model phải ngoại suy).
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from preprocessing import dataset_fingerprint
+
+LEVELS = ["Thương hiệu", "Dòng xe", "Loại xe", "Dung tích xe", "Xuất xứ"]
+FLAT_COLS = ["Tình trạng"]  # không phụ thuộc dòng xe -> 1 danh sách chung
+MEMO_MAX_ENTRIES = 4
+
+
+class _Node:
+    __slots__ = ("count", "children")
+
+    def __init__(self):
+        self.count = 0
+        self.children = {}  # giá trị -> _Node (dict giữ thứ tự chèn)
+
+
+class VehicleIndex:
+    def __init__(self, df):
+        missing = [c for c in LEVELS + FLAT_COLS if c not in df.columns]
+        if missing:
+            raise KeyError(f"Thiếu cột thông số xe: {missing}")
+        self.root = _Node()
+        # 1 lần groupby trên 5 cột (sort=False -> thứ tự xuất hiện); NaN không thành lựa chọn nhưng vẫn được đếm ở cấp trên
+        sizes = df.groupby(LEVELS, dropna=False, sort=False).size()
+        for combo, n in zip(sizes.index, sizes.to_numpy()):
+            node = self.root
+            node.count += int(n)
+            for value in combo:
+                if pd.isna(value):
+                    break
+                node = node.children.setdefault(value, _Node())
+                node.count += int(n)
+        self.all_values = {c: df[c].dropna().unique().tolist() for c in LEVELS + FLAT_COLS}
+        self.n_combinations = len(sizes)
+
+    def _node(self, path):
+        node = self.root
+        for value in path:
+            node = node.children.get(value)
+            if node is None:
+                return None
+        return node
+
+    def options(self, *path):
+        # Lựa chọn cho cấp LEVELS[len(path)] khi các cấp trước đã chọn = path
+        node = self._node(path)
+        return list(node.children) if node is not None else []
+
+    def count(self, *path):
+        # Số tin đăng khớp tổ hợp (tiền tố) path; 0 = chưa có trong dữ liệu
+        node = self._node(path)
+        return node.count if node is not None else 0
+
+    def values(self, column):
+        return self.all_values[column]
+
+
+_memo = OrderedDict()  # dataset fingerprint -> VehicleIndex
+_memo_lock = threading.Lock()
+
+
+def vehicle_index(df):
+    fp = dataset_fingerprint(df)
+    with _memo_lock:
+        cached = _memo.get(fp)
+        if cached is not None:
+            _memo.move_to_end(fp)
+            return cached
+    index = VehicleIndex(df)
+    with _memo_lock:
+        _memo[fp] = index
+        _memo.move_to_end(fp)
+        while len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+    return index
+
+
+def clear_memo():
+    with _memo_lock:
+        _memo.clear()